@@ -0,0 +1,147 @@
+"""
+Pipelined batch engine - overlaps the stages of consecutive videos
+While video N renders, video N+1 is being prepared (topic, content, TTS, b-roll)
+and video N-1 uploads. Stages are connected by bounded queues and each stage has
+its own worker count; rate-limit spacing applies to a single stage (uploads)
+"""
+import time
+import queue
+import threading
+import traceback
+from typing import Any, Callable, Dict, Iterable, List
+
+
+_STOP = object()
+
+
+class PipelineStage:
+    """One step of the pipeline: func(item) -> next item (None drops the item)"""
+
+    def __init__(self, name: str, func: Callable[[Any], Any], workers: int = 1,
+                 min_interval_seconds: float = 0.0):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        # Minimum gap between the starts of two calls (e.g. spacing uploads for rate limits)
+        self.min_interval_seconds = min_interval_seconds
+        self._last_start = None
+        self._spacing_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {'processed': 0, 'failed': 0, 'dropped': 0, 'busy_seconds': 0.0}
+
+    def record(self, field: str, amount: float = 1):
+        with self._stats_lock:
+            self.stats[field] += amount
+
+    def wait_for_slot(self):
+        """Block until min_interval_seconds has passed since the previous call started"""
+        if not self.min_interval_seconds:
+            return
+        with self._spacing_lock:
+            if self._last_start is not None:
+                remaining = self._last_start + self.min_interval_seconds - time.time()
+                if remaining > 0:
+                    print(f"⏳ {self.name}: waiting {remaining:.0f}s (rate-limit spacing)")
+                    time.sleep(remaining)
+            self._last_start = time.time()
+
+
+class BatchPipeline:
+    """Runs items through a chain of stages, each on its own worker threads"""
+
+    def __init__(self, stages: List[PipelineStage], queue_size: int = 1):
+        if not stages:
+            raise ValueError("pipeline needs at least one stage")
+        self.stages = stages
+        # Bounded queues give backpressure: preparation can't run far ahead of rendering
+        self.queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in stages]
+        self.results: List[Any] = []
+        self._results_lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._remaining_workers = [stage.workers for stage in stages]
+        self._remaining_lock = threading.Lock()
+        self._started = False
+
+    def start(self):
+        """Start worker threads for every stage (use submit()/close() to feed items)"""
+        if self._started:
+            return self
+        self._started = True
+        for index, stage in enumerate(self.stages):
+            for worker in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._worker, args=(index,),
+                    name=f"pipeline-{stage.name}-{worker}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+        return self
+
+    def submit(self, item: Any):
+        """Add an item to the first stage (blocks while the first queue is full)"""
+        self.queues[0].put(item)
+
+    def close(self):
+        """No more items; workers exit once everything in flight has drained"""
+        for _ in range(self.stages[0].workers):
+            self.queues[0].put(_STOP)
+
+    def join(self) -> List[Any]:
+        for thread in self._threads:
+            thread.join()
+        return self.results
+
+    def run(self, items: Iterable[Any]) -> List[Any]:
+        """Push all items through the pipeline and return the final stage's outputs"""
+        self.start()
+        for item in items:
+            self.submit(item)
+        self.close()
+        return self.join()
+
+    def _worker(self, index: int):
+        stage = self.stages[index]
+        inbox = self.queues[index]
+        is_last = index == len(self.stages) - 1
+        while True:
+            item = inbox.get()
+            if item is _STOP:
+                break
+
+            stage.wait_for_slot()
+            started = time.time()
+            try:
+                output = stage.func(item)
+                stage.record('processed')
+                if output is None:
+                    stage.record('dropped')
+            except Exception as e:
+                print(f"❌ Pipeline stage '{stage.name}' failed: {e}")
+                traceback.print_exc()
+                stage.record('failed')
+                output = None
+            finally:
+                stage.record('busy_seconds', time.time() - started)
+
+            if output is None:
+                continue
+            if is_last:
+                with self._results_lock:
+                    self.results.append(output)
+            else:
+                self.queues[index + 1].put(output)
+
+        # Last worker of this stage out tells the next stage to stop
+        with self._remaining_lock:
+            self._remaining_workers[index] -= 1
+            last_out = self._remaining_workers[index] == 0
+        if last_out and not is_last:
+            for _ in range(self.stages[index + 1].workers):
+                self.queues[index + 1].put(_STOP)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Per-stage processed/failed counts, busy time and queue depth"""
+        return {
+            stage.name: dict(stage.stats, queued=self.queues[i].qsize(), workers=stage.workers)
+            for i, stage in enumerate(self.stages)
+        }
@@ -0,0 +1,188 @@
+"""
+Caption renderer - rasterizes captions with Pillow instead of ImageMagick
+Rendered captions are cached on disk, so re-renders and retries reuse the same PNG
+The cache is bounded by CAPTION_CACHE_MAX_MB: hits touch the file's mtime, and once the
+directory goes over budget the least recently used PNGs are deleted
+"""
+import os
+import json
+import hashlib
+import random
+import threading
+from typing import Dict, List
+from PIL import Image, ImageDraw, ImageFont
+from core.config import Config
+
+
+class CaptionRenderer:
+    """Renders stroked, wrapped caption text to transparent RGBA PNG overlays"""
+
+    # Bump when the drawing code changes so stale cached captions are ignored
+    RENDER_VERSION = 1
+    LINE_SPACING = 1.1
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = None):
+        self.cache_dir = cache_dir or Config.CAPTION_CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else Config.CAPTION_CACHE_MAX_MB * 1024 * 1024
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._fonts = {}
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()  # Captions render from parallel threads
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._disk_bytes = self._prune()
+
+    def cache_key(self, text: str, font_path: str, font_size: int, text_color: str,
+                  stroke_color: str, stroke_width: int, max_width: int) -> str:
+        """Cache key over everything that affects the rasterized pixels"""
+        payload = json.dumps([
+            self.RENDER_VERSION, text, os.path.abspath(font_path) if os.path.exists(font_path) else font_path,
+            font_size, text_color.lower(), stroke_color.lower(), stroke_width, max_width
+        ])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def render(self, text: str, font_path: str, font_size: int, text_color: str = '#FFFFFF',
+               stroke_color: str = '#000000', stroke_width: int = 8, max_width: int = 980) -> str:
+        """Return path to a cached RGBA PNG of the caption, rendering it on a miss"""
+        key = self.cache_key(text, font_path, font_size, text_color, stroke_color, stroke_width, max_width)
+        caption_path = os.path.join(self.cache_dir, f"{key}.png")
+
+        if os.path.exists(caption_path):
+            try:
+                os.utime(caption_path)  # mtime doubles as the LRU timestamp
+            except OSError:
+                pass
+            with self._stats_lock:
+                self.stats['hits'] += 1
+            return caption_path
+
+        image = self.render_image(text, font_path, font_size, text_color, stroke_color, stroke_width, max_width)
+
+        # Write atomically so a concurrent reader never sees a half-written PNG
+        temp_path = f"{caption_path}.{random.randint(10000, 99999)}.tmp"
+        image.save(temp_path, format='PNG')
+        os.replace(temp_path, caption_path)
+        with self._stats_lock:
+            self.stats['misses'] += 1
+            self._disk_bytes += os.path.getsize(caption_path)
+            over_budget = self._disk_bytes > self.max_bytes
+        if over_budget:
+            with self._lock:
+                self._disk_bytes = self._prune(keep=caption_path)
+        return caption_path
+
+    def _prune(self, keep: str = None) -> int:
+        """
+        Delete least recently used captions until the directory is back under 90% of the budget
+        Returns the bytes left (the scan also picks up other processes' captions)
+        """
+        files = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if not name.endswith('.png') or path == keep:
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files) + (os.path.getsize(keep) if keep and os.path.exists(keep) else 0)
+        if total <= self.max_bytes:
+            return total
+        evicted = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+        with self._stats_lock:
+            self.stats['evictions'] += evicted
+        return total
+
+    def render_image(self, text: str, font_path: str, font_size: int, text_color: str = '#FFFFFF',
+                     stroke_color: str = '#000000', stroke_width: int = 8, max_width: int = 980) -> Image.Image:
+        """Rasterize caption text (centered, word-wrapped to max_width) into an RGBA image"""
+        font = self._get_font(font_path, font_size)
+        lines = self._wrap(text, font, stroke_width, max_width)
+
+        ascent, descent = font.getmetrics()
+        line_height = int((ascent + descent) * self.LINE_SPACING)
+        height = line_height * len(lines) + stroke_width * 2
+
+        image = Image.new('RGBA', (max_width, max(height, 1)), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+
+        y = stroke_width
+        for line in lines:
+            x = (max_width - draw.textlength(line, font=font)) / 2
+            draw.text(
+                (x, y), line, font=font, fill=text_color,
+                stroke_width=stroke_width, stroke_fill=stroke_color
+            )
+            y += line_height
+
+        return image
+
+    def _wrap(self, text: str, font, stroke_width: int, max_width: int) -> List[str]:
+        """Greedy word wrap, measuring with the stroke included"""
+        usable = max_width - stroke_width * 2
+        lines = []
+        current = ''
+        for word in text.split():
+            candidate = f"{current} {word}".strip()
+            if not current or font.getlength(candidate) <= usable:
+                current = candidate
+            else:
+                lines.append(current)
+                current = word
+        if current:
+            lines.append(current)
+        return lines or ['']
+
+    def _get_font(self, font_path: str, font_size: int):
+        """Load (and memoize) a TrueType font, falling back to a bundled default"""
+        key = (font_path, font_size)
+        with self._lock:
+            if key in self._fonts:
+                return self._fonts[key]
+
+            font = None
+            for candidate in (font_path, "DejaVuSans-Bold.ttf"):
+                try:
+                    if candidate and candidate != "Arial-Bold":
+                        font = ImageFont.truetype(candidate, font_size)
+                        break
+                except OSError:
+                    continue
+            if font is None:
+                print(f"⚠️ Caption font not loadable ({font_path}), using Pillow default font")
+                font = ImageFont.load_default()
+
+            self._fonts[key] = font
+            return font
+
+    def get_stats(self) -> Dict:
+        """Cache hit/miss/eviction counters and disk usage"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+            stats['disk_bytes'] = self._disk_bytes
+        total = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / total * 100, 1) if total else 0.0
+        stats['budget_bytes'] = self.max_bytes
+        return stats
+
+
+_caption_renderer = None
+_caption_renderer_lock = threading.Lock()
+
+
+def get_caption_renderer() -> CaptionRenderer:
+    """Shared renderer for every VideoCreator in the process (one font cache and disk budget)"""
+    global _caption_renderer
+    with _caption_renderer_lock:
+        if _caption_renderer is None:
+            _caption_renderer = CaptionRenderer()
+        return _caption_renderer
@@ -18,6 +18,25 @@ class Config:
     YOUTUBE_CLIENT_SECRET = os.getenv("YOUTUBE_CLIENT_SECRET", "")
     YOUTUBE_REFRESH_TOKEN = os.getenv("YOUTUBE_REFRESH_TOKEN", "")
     YOUTUBE_CHANNEL_ID = os.getenv("YOUTUBE_CHANNEL_ID", "")
+    YOUTUBE_DAILY_QUOTA = int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000"))  # Units per Pacific day
+    YOUTUBE_UPLOAD_COST = int(os.getenv("YOUTUBE_UPLOAD_COST", "1600"))  # Units per videos.insert
+    YOUTUBE_API_BASE_URL = os.getenv("YOUTUBE_API_BASE_URL", "https://www.googleapis.com/youtube/v3")
+    # The access token is refreshed in the background this long before it expires
+    CREDENTIAL_REFRESH_MARGIN_SECONDS = int(os.getenv("CREDENTIAL_REFRESH_MARGIN_SECONDS", "600"))
+    # Saved youtube/v3 discovery document (only used when the client library doesn't bundle one)
+    YOUTUBE_DISCOVERY_DOC = os.getenv("YOUTUBE_DISCOVERY_DOC", "./cache/youtube_v3_discovery.json")
+    # Resumable uploads: chunk size (rounded to 256 KiB), retries per stall and the backoff ceiling
+    YOUTUBE_UPLOAD_BASE_URL = os.getenv("YOUTUBE_UPLOAD_BASE_URL", "https://www.googleapis.com/upload/youtube/v3")
+    UPLOAD_CHUNK_MB = float(os.getenv("UPLOAD_CHUNK_MB", "8"))
+    UPLOAD_MAX_RETRIES = int(os.getenv("UPLOAD_MAX_RETRIES", "8"))
+    UPLOAD_BACKOFF_MAX_SECONDS = float(os.getenv("UPLOAD_BACKOFF_MAX_SECONDS", "64"))
+    # Uploads allowed to run at the same time (each holds a quota reservation for its videos.insert)
+    UPLOAD_MAX_CONCURRENT = int(os.getenv("UPLOAD_MAX_CONCURRENT", "2"))
+    # Statistics refresh for uploaded videos (videos.list, 50 videos per quota unit)
+    STATS_INGEST_ENABLED = os.getenv("STATS_INGEST_ENABLED", "true").lower() == "true"
+    STATS_INGEST_INTERVAL_MINUTES = int(os.getenv("STATS_INGEST_INTERVAL_MINUTES", "15"))
+    STATS_MAX_CALLS_PER_RUN = int(os.getenv("STATS_MAX_CALLS_PER_RUN", "20"))
+    STATS_HOURLY_RETENTION_DAYS = int(os.getenv("STATS_HOURLY_RETENTION_DAYS", "7"))  # Then rolled up per day
     
     # AI Services (All Free Tier)
     GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")  # Free tier, fast
@@ -38,6 +57,14 @@ class Config:
     # Media Providers (Free APIs)
     PIXABAY_API_KEY = os.getenv("PIXABAY_API_KEY", "")
     PEXELS_API_KEY = os.getenv("PEXELS_API_KEY", "")
+    BROLL_SEARCH_WORKERS = int(os.getenv("BROLL_SEARCH_WORKERS", "8"))  # Concurrent b-roll searches
+    BROLL_SEARCH_DEADLINE_SECONDS = float(os.getenv("BROLL_SEARCH_DEADLINE_SECONDS", "20"))
+    BROLL_DOWNLOAD_WORKERS = int(os.getenv("BROLL_DOWNLOAD_WORKERS", "4"))  # Concurrent b-roll downloads
+    SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true"
+    SEARCH_CACHE_TTL_HOURS = float(os.getenv("SEARCH_CACHE_TTL_HOURS", "24"))  # Pixabay asks for 24h caching
+    DOWNLOAD_MAX_MB = int(os.getenv("DOWNLOAD_MAX_MB", "200"))  # Per-file download limit
+    DOWNLOAD_READ_TIMEOUT_SECONDS = float(os.getenv("DOWNLOAD_READ_TIMEOUT_SECONDS", "30"))  # Per-chunk stall timeout
+    DOWNLOAD_RETRIES = int(os.getenv("DOWNLOAD_RETRIES", "3"))  # Range-resume attempts after a dropped connection
     
     # Music APIs (All Free, no credit card)
     JAMENDO_CLIENT_ID = os.getenv("JAMENDO_CLIENT_ID", "")  # Free tier - no credit card
@@ -54,6 +81,62 @@ class Config:
     MIN_TREND_SCORE = 7.0  # Out of 10
     HASHTAG_COUNT = 5  # Optimal for Shorts
     
+    # Rendering
+    # "moviepy" (default) or "ffmpeg" (single filter-graph pass, falls back to MoviePy when unsupported)
+    RENDER_BACKEND = os.getenv("RENDER_BACKEND", "moviepy").lower()
+    # Encode each script segment in its own process, then stream-copy concat
+    RENDER_PARALLEL_SEGMENTS = os.getenv("RENDER_PARALLEL_SEGMENTS", "false").lower() == "true"
+    RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "0"))  # 0 = one per CPU core
+    # Caption engine: "pil" (built-in, cached) or "imagemagick" (MoviePy TextClip)
+    CAPTION_ENGINE = os.getenv("CAPTION_ENGINE", "pil").lower()
+    CAPTION_CACHE_DIR = os.getenv("CAPTION_CACHE_DIR", "./cache/captions")
+    CAPTION_CACHE_MAX_MB = int(os.getenv("CAPTION_CACHE_MAX_MB", "200"))  # LRU-evicted past this
+    # Normalized 1080x1920@30fps b-roll cache (transcoded once at download time)
+    MEZZANINE_CACHE_ENABLED = os.getenv("MEZZANINE_CACHE_ENABLED", "true").lower() == "true"
+    MEZZANINE_CACHE_DIR = os.getenv("MEZZANINE_CACHE_DIR", "./cache/mezzanine")
+    MEZZANINE_CACHE_MAX_MB = int(os.getenv("MEZZANINE_CACHE_MAX_MB", "2048"))
+    BROLL_PARTIAL_FETCH = os.getenv("BROLL_PARTIAL_FETCH", "true").lower() == "true"  # Range-fetch only the seconds used
+    BROLL_PARTIAL_MARGIN_SECONDS = float(os.getenv("BROLL_PARTIAL_MARGIN_SECONDS", "1.5"))
+    # Cross-video pipeline (batch + autonomous): prepare → render → upload
+    PIPELINE_PREPARE_WORKERS = int(os.getenv("PIPELINE_PREPARE_WORKERS", "1"))
+    PIPELINE_RENDER_WORKERS = int(os.getenv("PIPELINE_RENDER_WORKERS", "1"))
+    PIPELINE_UPLOAD_WORKERS = int(os.getenv("PIPELINE_UPLOAD_WORKERS", "1"))
+    PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "1"))  # Prepared videos waiting per stage
+    UPLOAD_SPACING_SECONDS = int(os.getenv("UPLOAD_SPACING_SECONDS", "300"))  # Gap between uploads (rate limits)
+    # Upload scheduler: rendered videos are queued and uploaded on their own schedule, packed into the quota
+    UPLOAD_SCHEDULER_ENABLED = os.getenv("UPLOAD_SCHEDULER_ENABLED", "true").lower() == "true"
+    UPLOAD_SCHEDULER_INTERVAL_MINUTES = int(os.getenv("UPLOAD_SCHEDULER_INTERVAL_MINUTES", "5"))
+    UPLOAD_MAX_ATTEMPTS = int(os.getenv("UPLOAD_MAX_ATTEMPTS", "3"))  # Failed uploads (not quota refusals)
+    UPLOAD_RETRY_BACKOFF_MINUTES = int(os.getenv("UPLOAD_RETRY_BACKOFF_MINUTES", "15"))  # Doubles per failure
+    
+    # Render-ahead inventory: keep videos rendered for the upcoming publish slots and upload them
+    # with publishAt, instead of rendering at the slot itself (needs the upload scheduler)
+    INVENTORY_MODE_ENABLED = os.getenv("INVENTORY_MODE_ENABLED", "false").lower() == "true"
+    INVENTORY_TARGET_DEPTH = int(os.getenv("INVENTORY_TARGET_DEPTH", "3"))  # Slots kept filled ahead
+    INVENTORY_RENDER_HOURS = os.getenv("INVENTORY_RENDER_HOURS", "0-6")  # Local idle hours [start-end) to fill in
+    INVENTORY_MIN_LEAD_MINUTES = int(os.getenv("INVENTORY_MIN_LEAD_MINUTES", "60"))  # Slots closer than this are skipped
+    INVENTORY_CHECK_MINUTES = int(os.getenv("INVENTORY_CHECK_MINUTES", "15"))
+    
+    # Stage-level span tracing per job (exported as Chrome trace JSON via /jobs/{id}/trace)
+    TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+    TRACE_RETENTION_DAYS = int(os.getenv("TRACE_RETENTION_DAYS", "14"))
+    
+    DASHBOARD_CACHE_SECONDS = float(os.getenv("DASHBOARD_CACHE_SECONDS", "10"))  # Snapshot reuse (writes invalidate it)
+    EVENT_BACKLOG = int(os.getenv("EVENT_BACKLOG", "500"))  # Live events kept for reconnecting dashboards
+
+    # Durable job queue (manual triggers + scheduled runs)
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # Jobs running at once per process
+    JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "120"))  # Reclaimed if not heartbeated within this
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    JOB_RETRY_BACKOFF_SECONDS = int(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "30"))
+
+    # Remote render workers (python main.py worker)
+    REMOTE_RENDER_ENABLED = os.getenv("REMOTE_RENDER_ENABLED", "false").lower() == "true"
+    REMOTE_RENDER_CLAIM_TIMEOUT_SECONDS = int(os.getenv("REMOTE_RENDER_CLAIM_TIMEOUT_SECONDS", "300"))  # 0 = wait forever
+    WORKER_TOKEN = os.getenv("WORKER_TOKEN", "")  # Shared secret; worker API is off when empty
+    RENDER_SERVER_URL = os.getenv("RENDER_SERVER_URL", "http://localhost:8080")
+    WORKER_POLL_SECONDS = int(os.getenv("WORKER_POLL_SECONDS", "5"))
+    
     # Paths
     TEMP_DIR = "./temp"
     OUTPUT_DIR = "./output"
@@ -64,4 +147,6 @@ class Config:
     
     # Database
     DATABASE_PATH = "./shorts_db.sqlite"
+    DB_WAL_ENABLED = os.getenv("DB_WAL_ENABLED", "true").lower() == "true"  # Readers don't block the writer
+    DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))  # Wait this long for a lock before failing
 
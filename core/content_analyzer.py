@@ -5,6 +5,7 @@ import json
 import re
 from typing import Dict
 from core.config import Config
+from core.tracing import span
 from groq import Groq
 import requests
 
@@ -61,15 +62,16 @@ Return ONLY a valid JSON object with this exact structure:
 }}"""
         
         try:
-            response = self.groq_client.chat.completions.create(
-                model="llama-3.1-8b-instant",
-                messages=[
-                    {"role": "system", "content": "You are an expert at analyzing video content to determine appropriate audio and visual styling. ALWAYS return ONLY valid JSON, no other text."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=500
-            )
+            with span('llm.groq', model="llama-3.1-8b-instant", purpose='analysis'):
+                response = self.groq_client.chat.completions.create(
+                    model="llama-3.1-8b-instant",
+                    messages=[
+                        {"role": "system", "content": "You are an expert at analyzing video content to determine appropriate audio and visual styling. ALWAYS return ONLY valid JSON, no other text."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.3,
+                    max_tokens=500
+                )
             
             content = response.choices[0].message.content
             return self._parse_analysis_response(content, topic, script)
@@ -99,25 +101,26 @@ Return ONLY a valid JSON object with this exact structure:
 }}"""
         
         try:
-            response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.openrouter_api_key}",
-                    "Content-Type": "application/json",
-                    "HTTP-Referer": "https://github.com/ViralShortsFactory",
-                    "X-Title": "ViralShortsFactory"
-                },
-                json={
-                    "model": "meta-llama/llama-3.1-8b-instruct:free",
-                    "messages": [
-                        {"role": "system", "content": "You are an expert at analyzing video content to determine appropriate audio and visual styling. ALWAYS return ONLY valid JSON, no other text."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": 0.3,
-                    "max_tokens": 500
-                },
-                timeout=30
-            )
+            with span('llm.openrouter', model="meta-llama/llama-3.1-8b-instruct:free", purpose='analysis'):
+                response = requests.post(
+                    "https://openrouter.ai/api/v1/chat/completions",
+                    headers={
+                        "Authorization": f"Bearer {self.openrouter_api_key}",
+                        "Content-Type": "application/json",
+                        "HTTP-Referer": "https://github.com/ViralShortsFactory",
+                        "X-Title": "ViralShortsFactory"
+                    },
+                    json={
+                        "model": "meta-llama/llama-3.1-8b-instruct:free",
+                        "messages": [
+                            {"role": "system", "content": "You are an expert at analyzing video content to determine appropriate audio and visual styling. ALWAYS return ONLY valid JSON, no other text."},
+                            {"role": "user", "content": prompt}
+                        ],
+                        "temperature": 0.3,
+                        "max_tokens": 500
+                    },
+                    timeout=30
+                )
             
             if response.status_code != 200:
                 raise Exception(f"OpenRouter API returned status {response.status_code}: {response.text}")
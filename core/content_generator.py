@@ -5,6 +5,7 @@ Optimized for YouTube Shorts engagement based on statistical analysis
 from groq import Groq
 from typing import Dict, Optional
 from core.config import Config
+from core.tracing import span, traced
 import json
 import re
 import requests
@@ -14,6 +15,7 @@ class ContentGenerator:
         self.groq_client = Groq(api_key=Config.GROQ_API_KEY) if Config.GROQ_API_KEY else None
         self.openrouter_api_key = Config.OPENROUTER_API_KEY
     
+    @traced('content.generate')
     def generate_video_content(self, topic: str) -> Dict:
         """
         Generate complete video content package:
@@ -111,15 +113,16 @@ Format (raw JSON only):
 {{"script":"Full script text here... use \\n for line breaks","title":"Title here","description":"Description with hashtags","tags":["tag1","tag2"]}}"""
 
         try:
-            response = self.groq_client.chat.completions.create(
-                model="llama-3.1-8b-instant",
-                messages=[
-                    {"role": "system", "content": "You are a YouTube Shorts content expert. ALWAYS return ONLY valid JSON format with NO markdown, NO code blocks, NO explanations. JSON strings must use \\n for newlines, NOT actual newlines."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.8,
-                max_tokens=2000
-            )
+            with span('llm.groq', model="llama-3.1-8b-instant", purpose='script'):
+                response = self.groq_client.chat.completions.create(
+                    model="llama-3.1-8b-instant",
+                    messages=[
+                        {"role": "system", "content": "You are a YouTube Shorts content expert. ALWAYS return ONLY valid JSON format with NO markdown, NO code blocks, NO explanations. JSON strings must use \\n for newlines, NOT actual newlines."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.8,
+                    max_tokens=2000
+                )
             
             return self._parse_response(response.choices[0].message.content, topic)
         except Exception as e:
@@ -199,25 +202,26 @@ Format (raw JSON only):
 {{"script":"Full script text here... use \\n for line breaks","title":"Title here","description":"Description with hashtags","tags":["tag1","tag2"]}}"""
         
         try:
-            response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.openrouter_api_key}",
-                    "Content-Type": "application/json",
-                    "HTTP-Referer": "https://github.com/ViralShortsFactory",
-                    "X-Title": "ViralShortsFactory"
-                },
-                json={
-                    "model": "meta-llama/llama-3.1-8b-instruct:free",
-                    "messages": [
-                        {"role": "system", "content": "You are a YouTube Shorts content expert. ALWAYS return ONLY valid JSON format with NO markdown, NO code blocks, NO explanations. JSON strings must use \\n for newlines, NOT actual newlines."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": 0.8,
-                    "max_tokens": 2000
-                },
-                timeout=30
-            )
+            with span('llm.openrouter', model="meta-llama/llama-3.1-8b-instruct:free", purpose='script'):
+                response = requests.post(
+                    "https://openrouter.ai/api/v1/chat/completions",
+                    headers={
+                        "Authorization": f"Bearer {self.openrouter_api_key}",
+                        "Content-Type": "application/json",
+                        "HTTP-Referer": "https://github.com/ViralShortsFactory",
+                        "X-Title": "ViralShortsFactory"
+                    },
+                    json={
+                        "model": "meta-llama/llama-3.1-8b-instruct:free",
+                        "messages": [
+                            {"role": "system", "content": "You are a YouTube Shorts content expert. ALWAYS return ONLY valid JSON format with NO markdown, NO code blocks, NO explanations. JSON strings must use \\n for newlines, NOT actual newlines."},
+                            {"role": "user", "content": prompt}
+                        ],
+                        "temperature": 0.8,
+                        "max_tokens": 2000
+                    },
+                    timeout=30
+                )
             
             if response.status_code != 200:
                 raise Exception(f"OpenRouter API returned status {response.status_code}: {response.text}")
@@ -506,15 +510,16 @@ Return as a simple list, one suggestion per line."""
             # Try Groq first
             if self.groq_client:
                 try:
-                    response = self.groq_client.chat.completions.create(
-                        model="llama-3.1-8b-instant",
-                        messages=[
-                            {"role": "system", "content": "You are a YouTube Shorts optimization expert. Provide concise, actionable suggestions."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        temperature=0.7,
-                        max_tokens=200
-                    )
+                    with span('llm.groq', model="llama-3.1-8b-instant", purpose='enhancements'):
+                        response = self.groq_client.chat.completions.create(
+                            model="llama-3.1-8b-instant",
+                            messages=[
+                                {"role": "system", "content": "You are a YouTube Shorts optimization expert. Provide concise, actionable suggestions."},
+                                {"role": "user", "content": prompt}
+                            ],
+                            temperature=0.7,
+                            max_tokens=200
+                        )
                     suggestions = response.choices[0].message.content.strip().split('\n')
                     return [s.strip('- •') for s in suggestions if s.strip()][:3]
                 except:
@@ -523,23 +528,24 @@ Return as a simple list, one suggestion per line."""
             # Fallback to OpenRouter
             if self.openrouter_api_key:
                 import requests
-                response = requests.post(
-                    "https://openrouter.ai/api/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.openrouter_api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": "meta-llama/llama-3.1-8b-instruct:free",
-                        "messages": [
-                            {"role": "system", "content": "You are a YouTube Shorts optimization expert. Provide concise, actionable suggestions."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        "temperature": 0.7,
-                        "max_tokens": 200
-                    },
-                    timeout=10
-                )
+                with span('llm.openrouter', model="meta-llama/llama-3.1-8b-instruct:free", purpose='enhancements'):
+                    response = requests.post(
+                        "https://openrouter.ai/api/v1/chat/completions",
+                        headers={
+                            "Authorization": f"Bearer {self.openrouter_api_key}",
+                            "Content-Type": "application/json"
+                        },
+                        json={
+                            "model": "meta-llama/llama-3.1-8b-instruct:free",
+                            "messages": [
+                                {"role": "system", "content": "You are a YouTube Shorts optimization expert. Provide concise, actionable suggestions."},
+                                {"role": "user", "content": prompt}
+                            ],
+                            "temperature": 0.7,
+                            "max_tokens": 200
+                        },
+                        timeout=10
+                    )
                 if response.status_code == 200:
                     suggestions = response.json()['choices'][0]['message']['content'].strip().split('\n')
                     return [s.strip('- •') for s in suggestions if s.strip()][:3]
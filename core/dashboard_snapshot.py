@@ -0,0 +1,78 @@
+"""
+Dashboard snapshot
+Everything the dashboard page shows, assembled in one pass and reused until it is
+DASHBOARD_CACHE_SECONDS old or a write through Database bumps the data version. Each
+snapshot carries an ETag (hash of its contents) so unchanged pages can be answered with 304
+"""
+import json
+import time
+import hashlib
+import threading
+from datetime import date
+from typing import Callable, Dict, Optional, Tuple
+from core.config import Config
+from core.database import Database, data_version
+
+
+class DashboardSnapshot:
+    """TTL + write-invalidated cache of the dashboard data"""
+
+    RECENT_VIDEOS = 20
+
+    def __init__(self, ttl: float = None, quota_info: Optional[Callable[[], Dict]] = None,
+                 inventory_info: Optional[Callable[[], Optional[Dict]]] = None):
+        self.ttl = Config.DASHBOARD_CACHE_SECONDS if ttl is None else ttl
+        self.quota_info = quota_info
+        self.inventory_info = inventory_info
+        self._lock = threading.Lock()
+        self._data = None
+        self._etag = None
+        self._built_at = 0.0
+        self._version = None
+        self._day = None
+
+    def _is_fresh(self) -> bool:
+        return (self._data is not None
+                and self._version == data_version()
+                and self._day == date.today().isoformat()
+                and time.monotonic() - self._built_at < self.ttl)
+
+    def get(self) -> Tuple[Dict, str]:
+        """(data, etag) - rebuilt at most once per TTL; concurrent requests share one rebuild"""
+        if self._is_fresh():
+            return self._data, self._etag
+        with self._lock:
+            if not self._is_fresh():
+                # Read the version first: a write landing mid-build leaves the snapshot stale, not wrong
+                version = data_version()
+                data = self._build()
+                self._etag = '"' + hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest() + '"'
+                self._data, self._version, self._day = data, version, data['today']['date']
+                self._built_at = time.monotonic()
+            return self._data, self._etag
+
+    def invalidate(self):
+        self._data = None
+
+    def _build(self) -> Dict:
+        db = Database()
+        today = date.today().isoformat()
+        today_stats = db.get_daily_stats(today) or {}
+        recent_videos = db.get_recent_videos(limit=self.RECENT_VIDEOS)
+        return {
+            'today': {
+                'date': today,
+                'created': today_stats.get('videos_created', 0),
+                'uploaded': today_stats.get('videos_uploaded', 0),
+                'views': today_stats.get('total_views', 0),
+                'likes': today_stats.get('total_likes', 0)
+            },
+            'overall_stats': db.get_overall_stats(),
+            'most_watched_videos': db.get_most_watched_videos(limit=5),
+            'most_watched_topics': db.get_most_watched_topics(limit=5),
+            'recent_videos': recent_videos,
+            # Cursor for /api/videos?after= (None when the first page is all there is)
+            'next_after': recent_videos[-1]['id'] if len(recent_videos) == self.RECENT_VIDEOS else None,
+            'quota_info': self.quota_info() if self.quota_info else {},
+            'inventory_info': self.inventory_info() if self.inventory_info else None
+        }
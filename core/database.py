@@ -1,96 +1,380 @@
 """
 Database management for tracking videos, stats, and trends
 """
-import sqlite3
+import os
 import json
+import threading
 from datetime import datetime
 from typing import Optional, Dict, List
 from core.config import Config
+from core.db_pool import connect
+from core.events import publish
+
+def _add_column_if_missing(cursor, table: str, column: str, definition: str):
+    columns = [row[1] for row in cursor.execute(f"PRAGMA table_info({table})").fetchall()]
+    if column not in columns:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _migration_initial_schema(cursor):
+    """Base tables (and the columns older databases were missing)"""
+    # Videos table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS videos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            video_id TEXT UNIQUE,
+            title TEXT,
+            description TEXT,
+            topic TEXT,
+            trend_score REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            uploaded_at TIMESTAMP,
+            youtube_url TEXT,
+            views INTEGER DEFAULT 0,
+            likes INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'pending',
+            video_file_path TEXT,
+            upload_error TEXT,
+            retry_count INTEGER DEFAULT 0,
+            last_retry_at TIMESTAMP
+        )
+    """)
+    
+    # Databases created before these columns existed
+    _add_column_if_missing(cursor, 'videos', 'video_file_path', 'TEXT')
+    _add_column_if_missing(cursor, 'videos', 'upload_error', 'TEXT')
+    _add_column_if_missing(cursor, 'videos', 'retry_count', 'INTEGER DEFAULT 0')
+    _add_column_if_missing(cursor, 'videos', 'last_retry_at', 'TIMESTAMP')
+    
+    # Trends table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS trends (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            topic TEXT,
+            source TEXT,
+            score REAL,
+            metadata TEXT,
+            discovered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            used BOOLEAN DEFAULT 0
+        )
+    """)
+    
+    # Daily stats table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS daily_stats (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date DATE UNIQUE,
+            videos_created INTEGER DEFAULT 0,
+            videos_uploaded INTEGER DEFAULT 0,
+            total_views INTEGER DEFAULT 0,
+            total_likes INTEGER DEFAULT 0,
+            report_sent BOOLEAN DEFAULT 0
+        )
+    """)
+
+
+def _migration_query_indexes(cursor):
+    """Indexes for the hot queries (checked by scripts/check_query_plans.py)"""
+    # quota_logs used to be created lazily by QuotaManager - create it here so it can be indexed
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS quota_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            operation TEXT NOT NULL,
+            cost INTEGER NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            remaining_estimate INTEGER
+        )
+    """)
+    # get_failed_uploads: only videos still waiting for an upload, already in retry order
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_videos_pending_upload ON videos (created_at, retry_count)
+        WHERE status != 'uploaded' AND video_file_path IS NOT NULL
+    """)
+    # Date-range filters (quota estimate, notifications) and "recent videos" ordering
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_videos_created_at ON videos (created_at, status)")
+    # Status counts and most-watched lists
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_videos_status_views ON videos (status, views)")
+    # get_unused_trends: best unused trends first
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_trends_unused_score ON trends (score DESC)
+        WHERE used = 0
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_quota_logs_timestamp ON quota_logs (timestamp)")
+
+
+def _stats_trigger_body(row: str, sign: str) -> str:
+    """Statements adding (sign '+') or removing (sign '-') one video row (NEW/OLD) from the aggregates"""
+    uploaded = f"{row}.status = 'uploaded'"
+    has_topic = f"{uploaded} AND {row}.topic IS NOT NULL AND {row}.topic != ''"
+    return f"""
+        UPDATE video_totals SET
+            total_videos = total_videos {sign} 1,
+            uploaded_videos = uploaded_videos {sign} ({uploaded}),
+            total_views = total_views {sign} COALESCE({row}.views, 0),
+            total_likes = total_likes {sign} COALESCE({row}.likes, 0)
+        WHERE id = 1;
+        INSERT OR IGNORE INTO topic_totals (topic) SELECT {row}.topic WHERE {has_topic};
+        UPDATE topic_totals SET
+            video_count = video_count {sign} 1,
+            total_views = total_views {sign} COALESCE({row}.views, 0),
+            total_likes = total_likes {sign} COALESCE({row}.likes, 0)
+        WHERE topic = {row}.topic AND {has_topic};
+        DELETE FROM topic_totals WHERE topic = {row}.topic AND video_count <= 0;
+        INSERT OR IGNORE INTO day_totals (day) VALUES (DATE({row}.created_at));
+        UPDATE day_totals SET
+            videos = videos {sign} 1,
+            uploaded = uploaded {sign} ({uploaded}),
+            views = views {sign} COALESCE({row}.views, 0),
+            likes = likes {sign} COALESCE({row}.likes, 0)
+        WHERE day = DATE({row}.created_at);
+        DELETE FROM day_totals WHERE day = DATE({row}.created_at) AND videos <= 0;
+    """
+
+
+def _migration_stats_aggregates(cursor):
+    """Aggregate tables kept current by triggers, so dashboard stats don't scan videos"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS video_totals (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total_videos INTEGER NOT NULL DEFAULT 0,
+            uploaded_videos INTEGER NOT NULL DEFAULT 0,
+            total_views INTEGER NOT NULL DEFAULT 0,
+            total_likes INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    # Uploaded videos only, like get_most_watched_topics always reported
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS topic_totals (
+            topic TEXT PRIMARY KEY,
+            video_count INTEGER NOT NULL DEFAULT 0,
+            total_views INTEGER NOT NULL DEFAULT 0,
+            total_likes INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_topic_totals_views ON topic_totals (total_views)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS day_totals (
+            day TEXT PRIMARY KEY,
+            videos INTEGER NOT NULL DEFAULT 0,
+            uploaded INTEGER NOT NULL DEFAULT 0,
+            views INTEGER NOT NULL DEFAULT 0,
+            likes INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_videos_totals_insert AFTER INSERT ON videos BEGIN
+            {_stats_trigger_body('NEW', '+')}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_videos_totals_delete AFTER DELETE ON videos BEGIN
+            {_stats_trigger_body('OLD', '-')}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_videos_totals_update
+        AFTER UPDATE OF status, views, likes, topic, created_at ON videos BEGIN
+            {_stats_trigger_body('OLD', '-')}
+            {_stats_trigger_body('NEW', '+')}
+        END
+    """)
+    _rebuild_stats_aggregates(cursor)
+
+
+def _rebuild_stats_aggregates(cursor):
+    """Recompute every aggregate from the videos table"""
+    cursor.execute("DELETE FROM video_totals")
+    cursor.execute("""
+        INSERT INTO video_totals (id, total_videos, uploaded_videos, total_views, total_likes)
+        SELECT 1, COUNT(*),
+               COALESCE(SUM(status = 'uploaded'), 0),
+               COALESCE(SUM(COALESCE(views, 0)), 0),
+               COALESCE(SUM(COALESCE(likes, 0)), 0)
+        FROM videos
+    """)
+    cursor.execute("DELETE FROM topic_totals")
+    cursor.execute("""
+        INSERT INTO topic_totals (topic, video_count, total_views, total_likes)
+        SELECT topic, COUNT(*), SUM(COALESCE(views, 0)), SUM(COALESCE(likes, 0))
+        FROM videos
+        WHERE status = 'uploaded' AND topic IS NOT NULL AND topic != ''
+        GROUP BY topic
+    """)
+    cursor.execute("DELETE FROM day_totals")
+    cursor.execute("""
+        INSERT INTO day_totals (day, videos, uploaded, views, likes)
+        SELECT DATE(created_at), COUNT(*), SUM(status = 'uploaded'),
+               SUM(COALESCE(views, 0)), SUM(COALESCE(likes, 0))
+        FROM videos
+        GROUP BY DATE(created_at)
+    """)
+
+
+def _migration_quota_pacific_day(cursor):
+    """quota_logs rows carry the Pacific-time day they count against (see core/quota_ledger.py)"""
+    _add_column_if_missing(cursor, 'quota_logs', 'pacific_day', 'TEXT')
+    # Existing rows: UTC timestamp shifted to PST (daylight saving time ignored for the backfill)
+    cursor.execute("UPDATE quota_logs SET pacific_day = DATE(timestamp, '-8 hours') WHERE pacific_day IS NULL")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_quota_logs_pacific_day ON quota_logs (pacific_day)")
+
+
+def _migration_video_stats(cursor):
+    """Refresh schedule on videos plus hourly/daily view time series (see core/stats_ingester.py)"""
+    _add_column_if_missing(cursor, 'videos', 'stats_checked_at', 'TEXT')
+    # '' sorts before every timestamp, so newly uploaded videos are due at once
+    _add_column_if_missing(cursor, 'videos', 'stats_next_check_at', "TEXT NOT NULL DEFAULT ''")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_videos_stats_due ON videos (status, stats_next_check_at)
+        WHERE youtube_url IS NOT NULL
+    """)
+    # ETag of the last videos.list response per batch of IDs (key = hash of the sorted IDs)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stats_batches (
+            batch_key TEXT PRIMARY KEY,
+            etag TEXT NOT NULL,
+            checked_at TEXT NOT NULL
+        ) WITHOUT ROWID
+    """)
+    # Counts are cumulative, so one row per video per hour (latest sample wins) is enough;
+    # hourly rows older than STATS_HOURLY_RETENTION_DAYS are rolled up into one row per day
+    for table, bucket in (('video_stats_hourly', 'hour'), ('video_stats_daily', 'day')):
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                video_id TEXT NOT NULL,
+                {bucket} TEXT NOT NULL,
+                views INTEGER NOT NULL DEFAULT 0,
+                likes INTEGER NOT NULL DEFAULT 0,
+                comments INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (video_id, {bucket})
+            ) WITHOUT ROWID
+        """)
+
+
+def _migration_upload_sessions(cursor):
+    """Resumable upload sessions, so an interrupted upload continues from the last confirmed byte"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS upload_sessions (
+            file_key TEXT PRIMARY KEY,
+            file_path TEXT NOT NULL,
+            file_size INTEGER NOT NULL,
+            session_uri TEXT NOT NULL,
+            confirmed_offset INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    """)
+
+
+def _migration_publish_schedule(cursor):
+    """Scheduled publish time (UTC, ISO 8601) for videos rendered ahead into inventory slots"""
+    _add_column_if_missing(cursor, 'videos', 'publish_at', 'TEXT')
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_videos_publish_at ON videos (publish_at)
+        WHERE publish_at IS NOT NULL
+    """)
+
+
+def _migration_traces(cursor):
+    """Stage-level span traces per job / video (core/tracing.py)"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS traces (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            job_id INTEGER,
+            video_id TEXT,
+            started_at REAL NOT NULL,
+            duration_seconds REAL,
+            span_count INTEGER NOT NULL DEFAULT 0,
+            attrs TEXT,
+            spans TEXT NOT NULL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_traces_job ON traces (job_id) WHERE job_id IS NOT NULL")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_traces_video ON traces (video_id) WHERE video_id IS NOT NULL")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_traces_started ON traces (started_at)")
+
+
+def _migration_video_tags(cursor):
+    """Video tags (JSON list) kept with the row, so a queued upload still has them after a restart"""
+    _add_column_if_missing(cursor, 'videos', 'tags', 'TEXT')
+
+
+# Schema versions, applied in order and recorded in PRAGMA user_version. Append new steps - never edit old ones
+MIGRATIONS = [
+    (1, "initial schema", _migration_initial_schema),
+    (2, "indexes for upload retry, trend, date-range and quota history queries", _migration_query_indexes),
+    (3, "trigger-maintained stats aggregates", _migration_stats_aggregates),
+    (4, "Pacific-day column on quota_logs", _migration_quota_pacific_day),
+    (5, "video statistics refresh schedule and time series", _migration_video_stats),
+    (6, "resumable upload sessions", _migration_upload_sessions),
+    (7, "scheduled publish times", _migration_publish_schedule),
+    (8, "span traces", _migration_traces),
+    (9, "video tags", _migration_video_tags),
+]
+
+_migrated_paths = set()
+_migrate_lock = threading.Lock()
+
+# Bumped after every write that changes what the dashboard shows, so cached views of the data
+# (core/dashboard_snapshot.py) can tell they are stale without querying
+_data_version = 0
+
+
+def mark_data_changed():
+    global _data_version
+    _data_version += 1
+    publish('data_changed', version=_data_version)
+
+
+def data_version() -> int:
+    return _data_version
+
+
+def migrate(db_path: str) -> int:
+    """Bring db_path up to the latest schema version (once per process); returns the version"""
+    key = os.path.abspath(db_path)
+    with _migrate_lock:
+        if key in _migrated_paths:
+            return MIGRATIONS[-1][0]
+        
+        conn = connect(db_path)
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for target, description, step in MIGRATIONS:
+                if target <= version:
+                    continue
+                # IMMEDIATE: another process migrating the same file waits, then sees the new version
+                conn.execute("BEGIN IMMEDIATE")
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if target <= version:
+                    conn.commit()
+                    continue
+                step(conn.cursor())
+                conn.execute(f"PRAGMA user_version = {int(target)}")
+                conn.commit()
+                version = target
+                print(f"🗄️ Database migrated to v{target}: {description}")
+        except Exception:
+            conn.rollback()
+            raise
+        
+        _migrated_paths.add(key)
+        return version
+
 
 class Database:
-    def __init__(self, db_path: str = Config.DATABASE_PATH):
-        self.db_path = db_path
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or Config.DATABASE_PATH
         self.init_database()
     
     def get_connection(self):
-        return sqlite3.connect(self.db_path)
+        """This thread's pooled connection (close() is cheap and keeps it open)"""
+        return connect(self.db_path)
     
     def init_database(self):
-        """Initialize database tables"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Videos table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS videos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                video_id TEXT UNIQUE,
-                title TEXT,
-                description TEXT,
-                topic TEXT,
-                trend_score REAL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                uploaded_at TIMESTAMP,
-                youtube_url TEXT,
-                views INTEGER DEFAULT 0,
-                likes INTEGER DEFAULT 0,
-                status TEXT DEFAULT 'pending',
-                video_file_path TEXT,
-                upload_error TEXT,
-                retry_count INTEGER DEFAULT 0,
-                last_retry_at TIMESTAMP
-            )
-        """)
-        
-        # Migration: Add new columns if they don't exist (for existing databases)
-        try:
-            cursor.execute("ALTER TABLE videos ADD COLUMN video_file_path TEXT")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        try:
-            cursor.execute("ALTER TABLE videos ADD COLUMN upload_error TEXT")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        try:
-            cursor.execute("ALTER TABLE videos ADD COLUMN retry_count INTEGER DEFAULT 0")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        try:
-            cursor.execute("ALTER TABLE videos ADD COLUMN last_retry_at TIMESTAMP")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        # Trends table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS trends (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                topic TEXT,
-                source TEXT,
-                score REAL,
-                metadata TEXT,
-                discovered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                used BOOLEAN DEFAULT 0
-            )
-        """)
-        
-        # Daily stats table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS daily_stats (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date DATE UNIQUE,
-                videos_created INTEGER DEFAULT 0,
-                videos_uploaded INTEGER DEFAULT 0,
-                total_views INTEGER DEFAULT 0,
-                total_likes INTEGER DEFAULT 0,
-                report_sent BOOLEAN DEFAULT 0
-            )
-        """)
-        
-        conn.commit()
-        conn.close()
+        """Initialize database tables (migrations run once per process)"""
+        migrate(self.db_path)
     
     def add_video(self, video_data: Dict) -> int:
         """Add a new video record"""
@@ -98,8 +382,8 @@ class Database:
         cursor = conn.cursor()
         
         cursor.execute("""
-            INSERT INTO videos (video_id, title, description, topic, trend_score, status, video_file_path)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO videos (video_id, title, description, topic, trend_score, status, video_file_path, tags)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         """, (
             video_data.get('video_id'),
             video_data.get('title'),
@@ -107,11 +391,13 @@ class Database:
             video_data.get('topic'),
             video_data.get('trend_score', 0),
             video_data.get('status', 'pending'),
-            video_data.get('video_file_path')
+            video_data.get('video_file_path'),
+            json.dumps(video_data['tags']) if video_data.get('tags') else None
         ))
         
         video_db_id = cursor.lastrowid
         conn.commit()
+        mark_data_changed()
         conn.close()
         return video_db_id
     
@@ -129,6 +415,7 @@ class Database:
         """, (youtube_url, video_id))
         
         conn.commit()
+        mark_data_changed()
         conn.close()
     
     def add_trend(self, topic: str, source: str, score: float, metadata: Dict = None):
@@ -212,6 +499,7 @@ class Database:
         ))
         
         conn.commit()
+        mark_data_changed()
         conn.close()
     
     def get_daily_stats(self, date: str) -> Optional[Dict]:
@@ -253,6 +541,7 @@ class Database:
         """, (error_message[:500], video_id))  # Limit error message length
         
         conn.commit()
+        mark_data_changed()
         conn.close()
     
     def get_failed_uploads(self, max_retries: int = 3) -> List[Dict]:
@@ -261,12 +550,14 @@ class Database:
         cursor = conn.cursor()
         
         # Get videos that failed or haven't been uploaded yet (have file but no URL)
+        # status != 'uploaded' is implied by the OR below, but spelled out so idx_videos_pending_upload applies
         cursor.execute("""
-            SELECT video_id, title, description, topic, video_file_path, retry_count, upload_error
+            SELECT video_id, title, description, topic, video_file_path, retry_count, upload_error, tags
             FROM videos
-            WHERE (status = 'upload_failed' OR (status != 'uploaded' AND youtube_url IS NULL))
-                AND retry_count < ?
+            WHERE status != 'uploaded'
                 AND video_file_path IS NOT NULL
+                AND (status = 'upload_failed' OR youtube_url IS NULL)
+                AND retry_count < ?
             ORDER BY created_at ASC
         """, (max_retries,))
         
@@ -282,11 +573,118 @@ class Database:
                 'topic': row[3],
                 'video_file_path': row[4],
                 'retry_count': row[5],
-                'upload_error': row[6]
+                'upload_error': row[6],
+                'tags': json.loads(row[7]) if row[7] else []
             })
         
         return videos
     
+    def get_upload_queue(self, max_retries: int = 3, limit: int = 50) -> List[Dict]:
+        """Rendered videos waiting for an upload, oldest first (same rows as get_failed_uploads)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT video_id, title, description, topic, video_file_path, retry_count, upload_error, last_retry_at,
+                   publish_at, tags
+            FROM videos
+            WHERE status != 'uploaded'
+                AND video_file_path IS NOT NULL
+                AND (status = 'upload_failed' OR youtube_url IS NULL)
+                AND retry_count < ?
+            ORDER BY created_at ASC
+            LIMIT ?
+        """, (max_retries, limit))
+        rows = cursor.fetchall()
+        conn.close()
+
+        return [{
+            'video_id': row[0],
+            'title': row[1],
+            'description': row[2],
+            'topic': row[3],
+            'video_file_path': row[4],
+            'retry_count': row[5],
+            'upload_error': row[6],
+            'last_retry_at': row[7],
+            'publish_at': row[8],
+            'tags': json.loads(row[9]) if row[9] else []
+        } for row in rows]
+
+    def set_publish_at(self, video_id: str, publish_at: Optional[str]):
+        """Schedule a video for publish_at (UTC ISO 8601, e.g. 2025-01-31T19:30:00Z); None publishes on upload"""
+        conn = self.get_connection()
+        conn.execute("UPDATE videos SET publish_at = ? WHERE video_id = ?", (publish_at, video_id))
+        conn.commit()
+        mark_data_changed()
+        conn.close()
+
+    def get_scheduled_videos(self, after: str, limit: int = 50) -> List[Dict]:
+        """Videos scheduled to publish at or after `after` (UTC ISO 8601), soonest first"""
+        conn = self.get_connection()
+        rows = conn.execute("""
+            SELECT video_id, title, status, youtube_url, created_at, publish_at
+            FROM videos
+            WHERE publish_at IS NOT NULL AND publish_at >= ?
+            ORDER BY publish_at
+            LIMIT ?
+        """, (after, limit)).fetchall()
+        conn.close()
+        return [{
+            'video_id': row[0],
+            'title': row[1],
+            'status': row[2],
+            'url': row[3],
+            'created': row[4],
+            'publish_at': row[5]
+        } for row in rows]
+
+    def save_trace(self, trace: Dict) -> int:
+        """Store a finished trace (Trace.to_dict()) and drop those past TRACE_RETENTION_DAYS"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO traces (name, job_id, video_id, started_at, duration_seconds, span_count, attrs, spans)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (trace['name'], trace.get('job_id'), trace.get('video_id'), trace['started_at'],
+              trace.get('duration_seconds'), len(trace['spans']),
+              json.dumps(trace.get('attrs') or {}, default=str), json.dumps(trace['spans'], default=str)))
+        trace_id = cursor.lastrowid
+        cursor.execute("DELETE FROM traces WHERE started_at < ?",
+                       (datetime.now().timestamp() - Config.TRACE_RETENTION_DAYS * 86400,))
+        conn.commit()
+        conn.close()
+        return trace_id
+
+    def get_traces(self, job_id: Optional[int] = None, video_id: Optional[str] = None,
+                   limit: int = 20) -> List[Dict]:
+        """Stored traces of a job and/or video (latest `limit` of all when neither is given), oldest first"""
+        conn = self.get_connection()
+        conditions, params = [], []
+        if job_id is not None:
+            conditions.append("job_id = ?")
+            params.append(job_id)
+        if video_id is not None:
+            conditions.append("video_id = ?")
+            params.append(video_id)
+        where = f"WHERE {' OR '.join(conditions)}" if conditions else ""
+        rows = conn.execute(f"""
+            SELECT id, name, job_id, video_id, started_at, duration_seconds, attrs, spans
+            FROM traces {where}
+            ORDER BY started_at DESC
+            LIMIT ?
+        """, params + [limit]).fetchall()
+        conn.close()
+        return [{
+            'id': row[0],
+            'name': row[1],
+            'job_id': row[2],
+            'video_id': row[3],
+            'started_at': row[4],
+            'duration_seconds': row[5],
+            'attrs': json.loads(row[6]) if row[6] else {},
+            'spans': json.loads(row[7])
+        } for row in reversed(rows)]
+
     def update_video_file_path(self, video_id: str, file_path: str):
         """Update video file path (for existing videos)"""
         conn = self.get_connection()
@@ -299,6 +697,7 @@ class Database:
         """, (file_path, video_id))
         
         conn.commit()
+        mark_data_changed()
         conn.close()
     
     def get_videos_without_file_path(self) -> List[Dict]:
@@ -327,6 +726,37 @@ class Database:
         
         return videos
     
+    def get_recent_videos(self, limit: int = 20, after: Optional[int] = None) -> List[Dict]:
+        """Newest videos first, keyset-paginated: pass the last row's 'id' as `after` for the next page"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        # Walks the primary key from a given id, so every page costs the same however deep it is
+        # (ids grow with created_at - add_video always takes the default timestamp)
+        cursor.execute("""
+            SELECT id, video_id, title, topic, youtube_url, created_at, status, video_file_path, views, likes
+            FROM videos
+            WHERE id < ?
+            ORDER BY id DESC
+            LIMIT ?
+        """, (after if after is not None else 2 ** 63 - 1, limit))
+
+        rows = cursor.fetchall()
+        conn.close()
+
+        return [{
+            'id': row[0],
+            'video_id': row[1] or '',
+            'title': row[2] or 'Untitled',
+            'topic': row[3] or '',
+            'url': row[4] or '',
+            'created': str(row[5]) if row[5] else '',
+            'status': row[6] or 'pending',
+            'video_file_path': row[7],
+            'views': row[8] or 0,
+            'likes': row[9] or 0
+        } for row in rows]
+
     def get_most_watched_videos(self, limit: int = 10) -> List[Dict]:
         """Get most watched videos"""
         conn = self.get_connection()
@@ -358,20 +788,13 @@ class Database:
         return videos
     
     def get_most_watched_topics(self, limit: int = 10) -> List[Dict]:
-        """Get most watched topics (aggregated by topic)"""
+        """Get most watched topics (aggregated by topic, read from topic_totals)"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
         cursor.execute("""
-            SELECT 
-                topic,
-                COUNT(*) as video_count,
-                SUM(COALESCE(views, 0)) as total_views,
-                SUM(COALESCE(likes, 0)) as total_likes,
-                AVG(COALESCE(views, 0)) as avg_views
-            FROM videos
-            WHERE status = 'uploaded' AND topic IS NOT NULL AND topic != ''
-            GROUP BY topic
+            SELECT topic, video_count, total_views, total_likes
+            FROM topic_totals
             ORDER BY total_views DESC
             LIMIT ?
         """, (limit,))
@@ -386,40 +809,36 @@ class Database:
                 'video_count': row[1],
                 'total_views': row[2] or 0,
                 'total_likes': row[3] or 0,
-                'avg_views': int(row[4] or 0)
+                'avg_views': int((row[2] or 0) / max(row[1], 1))
             })
         
         return topics
     
     def get_overall_stats(self) -> Dict:
-        """Get overall (all-time) statistics"""
+        """Get overall (all-time) statistics (single-row read from video_totals)"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
         cursor.execute("""
-            SELECT 
-                COUNT(*) as total_videos,
-                SUM(CASE WHEN status='uploaded' THEN 1 ELSE 0 END) as uploaded_videos,
-                SUM(COALESCE(views, 0)) as total_views,
-                SUM(COALESCE(likes, 0)) as total_likes,
-                AVG(COALESCE(views, 0)) as avg_views
-            FROM videos
+            SELECT total_videos, uploaded_videos, total_views, total_likes
+            FROM video_totals
+            WHERE id = 1
         """)
         
         row = cursor.fetchone()
+        conn.close()
         
         if row:
-            total_videos, uploaded, total_views, total_likes, avg_views = row
+            total_videos, uploaded, total_views, total_likes = row
             return {
                 'total_videos': total_videos or 0,
                 'uploaded_videos': uploaded or 0,
                 'total_views': int(total_views or 0),
                 'total_likes': int(total_likes or 0),
-                'avg_views': int(avg_views or 0),
+                'avg_views': int((total_views or 0) / total_videos) if total_videos else 0,
                 'success_rate': round((uploaded or 0) / max(total_videos or 1, 1) * 100, 1)
             }
         
-        conn.close()
         return {
             'total_videos': 0,
             'uploaded_videos': 0,
@@ -428,4 +847,35 @@ class Database:
             'avg_views': 0,
             'success_rate': 0
         }
-
+    
+    def get_daily_totals(self, days: int = 30) -> List[Dict]:
+        """Per-day video totals (by creation date), newest first"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT day, videos, uploaded, views, likes
+            FROM day_totals
+            ORDER BY day DESC
+            LIMIT ?
+        """, (days,))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [
+            {'date': row[0], 'videos': row[1], 'uploaded': row[2], 'views': row[3], 'likes': row[4]}
+            for row in rows
+        ]
+    
+    def rebuild_stats_aggregates(self):
+        """Recompute video_totals/topic_totals/day_totals from scratch (repair after manual edits)"""
+        conn = self.get_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            _rebuild_stats_aggregates(conn.cursor())
+            conn.commit()
+            mark_data_changed()
+        except Exception:
+            conn.rollback()
+            raise
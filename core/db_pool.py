@@ -0,0 +1,121 @@
+"""
+SQLite connection manager - one long-lived connection per thread per database file
+Connections run in WAL mode (readers don't block the writer) with a busy timeout, so
+opening a Database/JobQueue/SearchCache is cheap and sqlite3's per-connection statement
+cache actually gets reused. Callers keep the old open/commit/close pattern: close() on
+the handle they get back only rolls back anything uncommitted, it doesn't close the connection
+"""
+import os
+import sqlite3
+import threading
+from typing import Dict
+from core.config import Config
+
+
+class PooledConnection:
+    """Per-call handle on the thread's connection (close() is a no-op, row_factory stays local)"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+        # Set per handle rather than on the shared connection, so callers can't leak it to each other
+        self.row_factory = None
+        # Opened while the caller has a transaction open: the caller owns it, so this handle's
+        # commit/rollback/close (and its with-block) leave it alone - the outer commit or rollback decides
+        self._outer_transaction = conn.in_transaction
+
+    def cursor(self) -> sqlite3.Cursor:
+        cursor = self._conn.cursor()
+        cursor.row_factory = self.row_factory
+        return cursor
+
+    def execute(self, sql: str, parameters=()) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters) -> sqlite3.Cursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, script: str) -> sqlite3.Cursor:
+        return self.cursor().executescript(script)
+
+    def commit(self):
+        if not self._outer_transaction:
+            self._conn.commit()
+
+    def rollback(self):
+        if not self._outer_transaction:
+            self._conn.rollback()
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._conn.in_transaction
+
+    @property
+    def total_changes(self) -> int:
+        return self._conn.total_changes
+
+    def close(self):
+        # Same effect as closing a private connection: uncommitted work started through this handle is discarded
+        if self._conn.in_transaction and not self._outer_transaction:
+            self._conn.rollback()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()  # The exception still propagates, so the outer owner sees it and can roll back
+        return False
+
+
+class ConnectionManager:
+    """Hands out the calling thread's connection to one database file"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+
+    def connection(self) -> PooledConnection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+        return PooledConnection(conn)
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=Config.DB_BUSY_TIMEOUT_MS / 1000,
+                               cached_statements=256)
+        if Config.DB_WAL_ENABLED:
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Safe with WAL: a crash can lose the last commits but never corrupts the file
+            conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(Config.DB_BUSY_TIMEOUT_MS)}")
+        return conn
+
+    def close_thread_connection(self):
+        """Close this thread's connection (e.g. before a worker thread exits)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+_managers: Dict[str, ConnectionManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_connection_manager(db_path: str = None) -> ConnectionManager:
+    """Shared manager for a database file (keyed by absolute path)"""
+    key = os.path.abspath(db_path or Config.DATABASE_PATH)
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = ConnectionManager(db_path or Config.DATABASE_PATH)
+            _managers[key] = manager
+        return manager
+
+
+def connect(db_path: str = None) -> PooledConnection:
+    """This thread's pooled connection to db_path"""
+    return get_connection_manager(db_path).connection()
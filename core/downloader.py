@@ -0,0 +1,193 @@
+"""
+Streaming downloader shared by b-roll, music and font fetching
+Streams in fixed-size chunks to a .part file (constant memory), resumes with HTTP Range
+after dropped connections, enforces size/content-type limits, verifies length and renames atomically
+"""
+import os
+import hashlib
+import threading
+import requests
+from typing import Dict, Optional, Tuple
+from core.config import Config
+
+
+class DownloadError(Exception):
+    """Raised when a download is rejected or can't be completed"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+MEDIA_TYPES = ('video/', 'image/', 'application/octet-stream', 'binary/octet-stream')
+AUDIO_TYPES = ('audio/', 'application/octet-stream', 'binary/octet-stream')
+FONT_TYPES = ('font/', 'application/', 'binary/octet-stream')
+
+
+class Downloader:
+    """Chunked, resumable HTTP downloads with size and type checks"""
+
+    CHUNK_SIZE = 256 * 1024
+    USER_AGENT = 'Mozilla/5.0'
+
+    def __init__(self, max_bytes: int = None, connect_timeout: float = 10, read_timeout: float = None,
+                 retries: int = None):
+        self.max_bytes = max_bytes if max_bytes is not None else Config.DOWNLOAD_MAX_MB * 1024 * 1024
+        self.timeout = (connect_timeout, read_timeout or Config.DOWNLOAD_READ_TIMEOUT_SECONDS)
+        self.retries = retries if retries is not None else Config.DOWNLOAD_RETRIES
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        # requests.Session isn't thread-safe - one per thread, reused for keep-alive
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers['User-Agent'] = self.USER_AGENT
+            self._local.session = session
+        return session
+
+    def download(self, url: str, dest_path: str, allowed_types: Optional[Tuple[str, ...]] = None,
+                 max_bytes: Optional[int] = None, min_bytes: int = 0, headers: Optional[Dict] = None,
+                 expected_sha256: Optional[str] = None, byte_range: Optional[Tuple[int, int]] = None) -> Dict:
+        """
+        Download url to dest_path and return {'path', 'bytes', 'content_type', 'sha256', 'resumed'}
+        byte_range=(first, last) fetches only those bytes (inclusive) and needs a server that honors Range
+        Raises DownloadError; dest_path only ever appears once the file is complete and verified
+        """
+        max_bytes = max_bytes if max_bytes is not None else self.max_bytes
+        range_start = byte_range[0] if byte_range else 0
+        part_path = f"{dest_path}.part"
+        os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+
+        resumed = False
+        content_type = ''
+        last_error = None
+        for attempt in range(self.retries + 1):
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            request_headers = dict(headers or {})
+            if byte_range:
+                request_headers['Range'] = f"bytes={range_start + offset}-{byte_range[1]}"
+            elif offset:
+                request_headers['Range'] = f"bytes={offset}-"
+
+            try:
+                with self._session().get(url, headers=request_headers, stream=True,
+                                         timeout=self.timeout, allow_redirects=True) as response:
+                    if response.status_code == 416 and offset:
+                        # Server can't satisfy our resume point - start over
+                        os.remove(part_path)
+                        continue
+                    if response.status_code >= 400:
+                        raise DownloadError(f"HTTP {response.status_code} for {url}", response.status_code)
+
+                    content_type = response.headers.get('content-type', '').split(';')[0].strip().lower()
+                    if allowed_types and content_type and not content_type.startswith(allowed_types):
+                        raise DownloadError(f"unexpected content-type '{content_type}' for {url}")
+
+                    if response.status_code == 206:
+                        resumed = resumed or offset > 0
+                        mode = 'ab' if offset else 'wb'
+                    elif byte_range:
+                        raise DownloadError(f"server ignored Range request for {url}")
+                    else:
+                        offset = 0  # Server ignored Range - rewrite from scratch
+                        mode = 'wb'
+
+                    if byte_range:
+                        expected = byte_range[1] - range_start + 1
+                    else:
+                        expected = self._expected_length(response, offset)
+                    if expected is not None and expected > max_bytes:
+                        raise DownloadError(f"{url} is {expected} bytes, limit is {max_bytes}")
+
+                    written = offset
+                    with open(part_path, mode) as f:
+                        for chunk in response.iter_content(chunk_size=self.CHUNK_SIZE):
+                            if not chunk:
+                                continue
+                            written += len(chunk)
+                            if written > max_bytes:
+                                raise DownloadError(f"{url} exceeded the {max_bytes} byte limit")
+                            f.write(chunk)
+
+                    if expected is not None and written != expected:
+                        # Connection closed early - loop around and resume from what we have
+                        raise requests.exceptions.ChunkedEncodingError(
+                            f"got {written} of {expected} bytes")
+                    break
+
+            except DownloadError:
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+                raise
+            except requests.exceptions.RequestException as e:
+                last_error = e
+                if attempt < self.retries:
+                    print(f"⚠️ Download interrupted ({e}), resuming ({attempt + 1}/{self.retries})...")
+        else:
+            raise DownloadError(f"download failed after {self.retries + 1} attempts: {last_error}")
+
+        size = os.path.getsize(part_path)
+        if size < min_bytes:
+            os.remove(part_path)
+            raise DownloadError(f"{url} too small ({size} bytes)")
+
+        sha256 = self._file_sha256(part_path)
+        if expected_sha256 and sha256 != expected_sha256.lower():
+            os.remove(part_path)
+            raise DownloadError(f"checksum mismatch for {url}")
+
+        os.replace(part_path, dest_path)
+        return {
+            'path': dest_path,
+            'bytes': size,
+            'content_type': content_type,
+            'sha256': sha256,
+            'resumed': resumed
+        }
+
+    def fetch_range(self, url: str, first: int, last: int) -> Tuple[bytes, Optional[int]]:
+        """
+        Read a small byte range into memory (for parsing file headers)
+        Returns (data, total_file_size); raises DownloadError if the server doesn't support Range
+        """
+        headers = {'Range': f"bytes={first}-{last}"}
+        with self._session().get(url, headers=headers, stream=True, timeout=self.timeout,
+                                 allow_redirects=True) as response:
+            if response.status_code != 206:
+                raise DownloadError(f"HTTP {response.status_code} for range request to {url}", response.status_code)
+            data = b''.join(response.iter_content(chunk_size=self.CHUNK_SIZE))
+            content_range = response.headers.get('content-range', '')
+        total = content_range.rsplit('/', 1)[1] if '/' in content_range else ''
+        return data[:last - first + 1], int(total) if total.isdigit() else None
+
+    @staticmethod
+    def _expected_length(response, offset: int) -> Optional[int]:
+        """Total file length the server promised (None if it didn't say)"""
+        content_range = response.headers.get('content-range', '')
+        if response.status_code == 206 and '/' in content_range:
+            total = content_range.rsplit('/', 1)[1]
+            if total.isdigit():
+                return int(total)
+        length = response.headers.get('content-length')
+        if length and length.isdigit() and 'gzip' not in response.headers.get('content-encoding', ''):
+            return offset + int(length)
+        return None
+
+    def _file_sha256(self, path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+
+_downloader = None
+
+
+def get_downloader() -> Downloader:
+    """Shared downloader instance (keeps per-thread HTTP sessions alive)"""
+    global _downloader
+    if _downloader is None:
+        _downloader = Downloader()
+    return _downloader
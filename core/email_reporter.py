@@ -29,7 +29,12 @@ class EmailReporter:
                 'total_views': 0,
                 'total_likes': 0
             }
-        
+
+        # Views/likes of today's videos as last refreshed by the stats ingester
+        for day in self.db.get_daily_totals(days=2):
+            if day['date'] == today:
+                stats = dict(stats, total_views=day['views'], total_likes=day['likes'])
+
         # Create email content
         subject = f"YouTube Shorts Daily Report - {date.today().strftime('%B %d, %Y')}"
         body = self._create_report_body(stats, today)
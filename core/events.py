@@ -0,0 +1,69 @@
+"""
+In-process event bus
+Background work (job queue, pipeline stages, renders, uploads, database writes) publishes small
+structured events here; the dashboard's server-sent events stream (/dashboard/api/events)
+relays them to browsers. Publishing never blocks or raises, and the last EVENT_BACKLOG events
+are kept so a reconnecting client can resume from its Last-Event-ID
+"""
+import time
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional
+from core.config import Config
+
+
+class EventBus:
+    """Fan-out of {id, type, data, time} events to subscriber callbacks"""
+
+    def __init__(self, backlog: int = None):
+        self._lock = threading.Lock()
+        self._subscribers: List[Callable[[Dict], None]] = []
+        self._backlog = deque(maxlen=backlog or Config.EVENT_BACKLOG)
+        self._next_id = 1
+
+    def publish(self, event_type: str, **data) -> Dict:
+        with self._lock:
+            event = {'id': self._next_id, 'type': event_type, 'data': data, 'time': time.time()}
+            self._next_id += 1
+            self._backlog.append(event)
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"⚠️ Event subscriber failed: {e}")
+        return event
+
+    def subscribe(self, callback: Callable[[Dict], None]):
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Dict], None]):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def since(self, last_id: int) -> List[Dict]:
+        """Backlogged events after last_id (for clients resuming with Last-Event-ID)"""
+        with self._lock:
+            return [event for event in self._backlog if event['id'] > last_id]
+
+
+_bus: Optional[EventBus] = None
+_bus_lock = threading.Lock()
+
+
+def get_event_bus() -> EventBus:
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            _bus = EventBus()
+        return _bus
+
+
+def publish(event_type: str, **data):
+    """Publish on the process-wide bus (never raises - events are best-effort)"""
+    try:
+        get_event_bus().publish(event_type, **data)
+    except Exception as e:
+        print(f"⚠️ Could not publish {event_type} event: {e}")
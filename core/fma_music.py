@@ -7,6 +7,7 @@ import requests
 import random
 from typing import Optional, List
 import os
+from core.downloader import get_downloader, AUDIO_TYPES
 
 
 class FreeMusicArchiveAPI:
@@ -70,18 +71,12 @@ class FreeMusicArchiveAPI:
     def _download_music(self, url: str, track_id: str) -> Optional[str]:
         """Download music file from URL"""
         try:
-            response = requests.get(url, timeout=30, stream=True)
-            response.raise_for_status()
-            
             # Save to temp directory
             temp_dir = os.path.join(os.getcwd(), 'temp')
             os.makedirs(temp_dir, exist_ok=True)
             
             music_path = os.path.join(temp_dir, f"fma_{track_id}_{random.randint(10000, 99999)}.mp3")
-            
-            with open(music_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            get_downloader().download(url, music_path, allowed_types=AUDIO_TYPES, min_bytes=1024)
             
             return music_path if os.path.exists(music_path) else None
             
@@ -6,6 +6,7 @@ import os
 import requests
 from typing import Optional, List
 from pathlib import Path
+from core.downloader import get_downloader, DownloadError, FONT_TYPES
 
 
 class FontManager:
@@ -97,21 +98,14 @@ class FontManager:
                 
                 if url:
                     try:
-                        headers = {'User-Agent': 'Mozilla/5.0'}
-                        response = requests.get(url, timeout=30, headers=headers, allow_redirects=True)
-                        
-                        if response.status_code == 200:
-                            content = response.content
-                            if len(content) > 1000:
-                                output_path.write_bytes(content)
-                                print(f"✅ Downloaded font: {font_name} (weight: {weight}) from GitHub (TTF, {len(content)} bytes)")
-                                return True
-                            else:
-                                print(f"⚠️ GitHub font too small: {len(content)} bytes")
-                        elif response.status_code == 404:
+                        result = get_downloader().download(url, str(output_path), allowed_types=FONT_TYPES, min_bytes=1000)
+                        print(f"✅ Downloaded font: {font_name} (weight: {weight}) from GitHub (TTF, {result['bytes']} bytes)")
+                        return True
+                    except DownloadError as gh_error:
+                        if gh_error.status_code == 404:
                             print(f"⚠️ Font URL 404: {url}, trying fallbacks...")
-                    except Exception as gh_error:
-                        print(f"⚠️ GitHub download failed: {gh_error}")
+                        else:
+                            print(f"⚠️ GitHub download failed: {gh_error}")
             
             # Method 2: Google Fonts API v1
             try:
@@ -145,13 +139,9 @@ class FontManager:
                             ttf_url = list(files.values())[0]
                         
                         if ttf_url:
-                            headers = {'User-Agent': 'Mozilla/5.0'}
-                            font_response = requests.get(ttf_url, timeout=30, headers=headers)
-                            
-                            if font_response.status_code == 200 and len(font_response.content) > 1000:
-                                output_path.write_bytes(font_response.content)
-                                print(f"✅ Downloaded font: {font_name} from Google Fonts API (TTF)")
-                                return True
+                            get_downloader().download(ttf_url, str(output_path), allowed_types=FONT_TYPES, min_bytes=1000)
+                            print(f"✅ Downloaded font: {font_name} from Google Fonts API (TTF)")
+                            return True
             except Exception as api_error:
                 print(f"⚠️ API method failed: {api_error}")
             
@@ -165,12 +155,9 @@ class FontManager:
             
             for url in github_urls:
                 try:
-                    headers = {'User-Agent': 'Mozilla/5.0'}
-                    response = requests.get(url, timeout=15, headers=headers, allow_redirects=True)
-                    if response.status_code == 200 and len(response.content) > 1000:
-                        output_path.write_bytes(response.content)
-                        print(f"✅ Downloaded font: {font_name} from GitHub (generic, {len(response.content)} bytes)")
-                        return True
+                    result = get_downloader().download(url, str(output_path), allowed_types=FONT_TYPES, min_bytes=1000)
+                    print(f"✅ Downloaded font: {font_name} from GitHub (generic, {result['bytes']} bytes)")
+                    return True
                 except:
                     continue
             
@@ -0,0 +1,178 @@
+"""
+Render-ahead inventory
+In inventory mode nothing renders at the randomized publish slots themselves. Instead this keeps
+INVENTORY_TARGET_DEPTH upcoming slots filled with finished videos: during the idle hours
+(INVENTORY_RENDER_HOURS, e.g. overnight) it queues renders until the buffer is full, the rest
+of the day only for slots that would otherwise come up empty before the idle hours return.
+Each finished video gets the next free slot as its publish time, and the upload scheduler
+uploads it as private with status.publishAt - YouTube makes it public on time, so a slow
+render or provider never makes us miss a slot
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from core.config import Config
+from core.database import Database
+from core.job_queue import JobQueue
+
+PUBLISH_AT_FORMAT = '%Y-%m-%dT%H:%M:%SZ'  # videos.publish_at / YouTube status.publishAt (UTC)
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'  # SQLite CURRENT_TIMESTAMP (UTC)
+
+_active = None
+
+
+def get_active_inventory() -> Optional['InventoryManager']:
+    """The running inventory (None unless autonomous mode started one) - used by the dashboard"""
+    return _active
+
+
+def _parse_utc(value: Optional[str], fmt: str) -> Optional[datetime]:
+    try:
+        return datetime.strptime(str(value)[:19] if fmt == TIMESTAMP_FORMAT else value,
+                                 fmt).replace(tzinfo=timezone.utc)
+    except (TypeError, ValueError):
+        return None
+
+
+class InventoryManager:
+    """Keeps the upcoming publish slots filled with rendered videos"""
+
+    def __init__(self, slot_scheduler, enqueue_render: Callable[[], None], db: Database = None,
+                 job_queue: JobQueue = None):
+        """
+        slot_scheduler: a VideoScheduler started in inventory mode (owns the randomized slot times)
+        enqueue_render: queues one 'generate' job whose payload source is 'inventory'
+        """
+        self.slot_scheduler = slot_scheduler
+        self.enqueue_render = enqueue_render
+        self.db = db or Database()
+        self.job_queue = job_queue or JobQueue()
+        self.target_depth = Config.INVENTORY_TARGET_DEPTH
+        self.render_hours = self._parse_hours(Config.INVENTORY_RENDER_HOURS)
+        self.min_lead = timedelta(minutes=Config.INVENTORY_MIN_LEAD_MINUTES)
+        self._lock = threading.Lock()  # top_up and slot assignment see a consistent buffer
+        self.last_check: Dict = {}
+
+    def start(self):
+        global _active
+        _active = self
+        print(f"📦 Inventory mode: keeping {self.target_depth} slot(s) rendered ahead "
+              f"(fills during {Config.INVENTORY_RENDER_HOURS}h local)")
+        return self
+
+    # --- render window -------------------------------------------------------
+
+    @staticmethod
+    def _parse_hours(spec: str) -> Tuple[int, int]:
+        """'0-6' -> (0, 6); wraps past midnight when start > end ('22-6')"""
+        try:
+            start, end = (int(part) for part in spec.split('-', 1))
+            return start % 24, (end if end == 24 else end % 24)
+        except (AttributeError, ValueError):
+            print(f"⚠️ Invalid INVENTORY_RENDER_HOURS '{spec}' - using 0-6")
+            return 0, 6
+
+    def in_render_window(self, now: Optional[datetime] = None) -> bool:
+        hour = (now or datetime.now().astimezone()).hour
+        start, end = self.render_hours
+        if start == end:
+            return True
+        if start < end:
+            return start <= hour < end
+        return hour >= start or hour < end
+
+    def _next_window_start(self, now: datetime) -> datetime:
+        candidate = now.replace(minute=0, second=0, microsecond=0)
+        for _ in range(48):
+            candidate += timedelta(hours=1)
+            if self.in_render_window(candidate):
+                return candidate
+        return candidate
+
+    # --- buffer --------------------------------------------------------------
+
+    def scheduled(self) -> List[Dict]:
+        """Rendered videos waiting for their slot, soonest first"""
+        now = datetime.now(timezone.utc).strftime(PUBLISH_AT_FORMAT)
+        return self.db.get_scheduled_videos(after=now, limit=max(50, self.target_depth * 2))
+
+    def in_flight(self) -> int:
+        """Inventory renders queued or running"""
+        return self.job_queue.count_active('generate', source='inventory')
+
+    def _wanted(self, now: datetime) -> int:
+        """How many slots should be covered right now"""
+        if self.in_render_window(now):
+            return self.target_depth
+        # Outside the idle hours only render for slots due before the window opens again
+        window = self._next_window_start(now)
+        due = [slot for slot in self.slot_scheduler.upcoming_slots(self.target_depth, after=now + self.min_lead)
+               if slot < window]
+        return len(due)
+
+    def top_up(self) -> int:
+        """Queue renders for missing inventory; returns how many were queued"""
+        with self._lock:
+            now = datetime.now().astimezone()
+            depth = len(self.scheduled())
+            in_flight = self.in_flight()
+            wanted = self._wanted(now)
+            missing = max(0, wanted - depth - in_flight)
+            for _ in range(missing):
+                self.enqueue_render()
+            self.last_check = {'at': now.isoformat(timespec='seconds'), 'depth': depth,
+                               'in_flight': in_flight, 'wanted': wanted, 'queued': missing}
+        if missing:
+            print(f"📦 Inventory {depth}/{self.target_depth} ({in_flight} rendering) - queued {missing} render(s)")
+        return missing
+
+    def assign_slot(self, video_id: str) -> Optional[str]:
+        """Give a freshly rendered video the first free slot; returns its publish_at (UTC)"""
+        with self._lock:
+            earliest = datetime.now().astimezone() + self.min_lead
+            scheduled = self.scheduled()
+            if scheduled:
+                latest = _parse_utc(scheduled[-1]['publish_at'], PUBLISH_AT_FORMAT)
+                if latest and latest > earliest:
+                    earliest = latest
+            slots = self.slot_scheduler.upcoming_slots(1, after=earliest)
+            if not slots:
+                return None
+            publish_at = slots[0].astimezone(timezone.utc).strftime(PUBLISH_AT_FORMAT)
+            self.db.set_publish_at(video_id, publish_at)
+        print(f"📦 {video_id} fills the {slots[0].strftime('%a %H:%M')} slot")
+        return publish_at
+
+    def status(self) -> Dict:
+        """Depth and the upcoming slots, filled ones with their lead time (publish time - render time)"""
+        scheduled = self.scheduled()
+        slots = []
+        for video in scheduled:
+            publish_at = _parse_utc(video['publish_at'], PUBLISH_AT_FORMAT)
+            created = _parse_utc(video['created'], TIMESTAMP_FORMAT)
+            lead = (publish_at - created).total_seconds() / 3600 if publish_at and created else None
+            slots.append({
+                'slot': publish_at.astimezone().strftime('%a %H:%M') if publish_at else video['publish_at'],
+                'publish_at': video['publish_at'],
+                'title': video['title'],
+                'status': video['status'],
+                'url': video['url'],
+                'lead_hours': round(lead, 1) if lead is not None else None
+            })
+        # Free slots up to the target depth
+        after = datetime.now().astimezone() + self.min_lead
+        if scheduled:
+            latest = _parse_utc(scheduled[-1]['publish_at'], PUBLISH_AT_FORMAT)
+            after = max(after, latest) if latest else after
+        for slot in self.slot_scheduler.upcoming_slots(max(0, self.target_depth - len(scheduled)), after=after):
+            slots.append({'slot': slot.strftime('%a %H:%M'), 'publish_at': None, 'title': None,
+                          'status': 'empty', 'url': None, 'lead_hours': None})
+        return {
+            'depth': len(scheduled),
+            'target': self.target_depth,
+            'in_flight': self.in_flight(),
+            'render_hours': Config.INVENTORY_RENDER_HOURS,
+            'rendering_window': self.in_render_window(),
+            'slots': slots,
+            'last_check': self.last_check
+        }
@@ -7,6 +7,7 @@ import requests
 import random
 from typing import Optional, Dict, List
 from core.config import Config
+from core.downloader import get_downloader, AUDIO_TYPES
 
 class JamendoMusicAPI:
     """Jamendo API for free royalty-free music"""
@@ -128,12 +129,7 @@ class JamendoMusicAPI:
             
             # Download if not already cached
             if not music_path.exists():
-                response = requests.get(url, timeout=30, stream=True)
-                response.raise_for_status()
-                
-                with open(music_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        f.write(chunk)
+                get_downloader().download(url, str(music_path), allowed_types=AUDIO_TYPES, min_bytes=1024)
             
             return str(music_path) if music_path.exists() else None
             
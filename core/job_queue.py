@@ -0,0 +1,411 @@
+"""
+Durable job queue backed by SQLite
+Manual triggers and scheduled runs become rows in a `jobs` table; workers claim them
+with time-limited leases and heartbeat while running, so concurrency is bounded,
+jobs survive restarts, and jobs from a crashed worker are reclaimed once the lease expires
+"""
+import json
+import time
+import socket
+import sqlite3
+import threading
+import traceback
+from typing import Callable, Dict, List, Optional
+from core.config import Config
+from core.db_pool import connect
+from core.events import publish
+from core import tracing
+
+
+class JobQueue:
+    """SQLite-backed priority queue with leases"""
+
+    # Higher runs first
+    PRIORITY_SCHEDULED = 0
+    PRIORITY_MANUAL = 10
+
+    STATES = ('queued', 'running', 'succeeded', 'failed')
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or Config.DATABASE_PATH
+        self.init_table()
+
+    def _connect(self):
+        conn = connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def init_table(self):
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                payload TEXT,
+                state TEXT NOT NULL DEFAULT 'queued',
+                priority INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires_at REAL,
+                heartbeat_at REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL DEFAULT 3,
+                available_at REAL NOT NULL,
+                stage TEXT,
+                timings TEXT,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_jobs_claim
+            ON jobs (state, priority DESC, id)
+        ''')
+        conn.commit()
+        conn.close()
+
+    def enqueue(self, kind: str, payload: Optional[Dict] = None, priority: int = PRIORITY_SCHEDULED,
+                max_attempts: int = None) -> int:
+        """Add a job and return its id"""
+        now = time.time()
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO jobs (kind, payload, priority, max_attempts, available_at, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (kind, json.dumps(payload or {}), priority,
+              max_attempts if max_attempts is not None else Config.JOB_MAX_ATTEMPTS, now, now))
+        job_id = cursor.lastrowid
+        conn.commit()
+        conn.close()
+        publish('job', id=job_id, kind=kind, state='queued', priority=priority)
+        return job_id
+
+    def claim(self, worker_id: str, kinds: Optional[List[str]] = None,
+              lease_seconds: float = None) -> Optional[Dict]:
+        """Atomically lease the highest-priority runnable job (None if nothing is ready)"""
+        lease_seconds = lease_seconds or Config.JOB_LEASE_SECONDS
+        now = time.time()
+        conn = self._connect()
+        try:
+            # IMMEDIATE takes the write lock up front, so two workers can't claim the same row
+            conn.execute('BEGIN IMMEDIATE')
+            self._reclaim_expired(conn, now)
+
+            query = "SELECT id FROM jobs WHERE state = 'queued' AND available_at <= ?"
+            params: list = [now]
+            if kinds:
+                query += f" AND kind IN ({','.join('?' * len(kinds))})"
+                params += list(kinds)
+            query += " ORDER BY priority DESC, id LIMIT 1"
+            row = conn.execute(query, params).fetchone()
+            if not row:
+                conn.commit()
+                return None
+
+            conn.execute('''
+                UPDATE jobs
+                SET state = 'running', lease_owner = ?, lease_expires_at = ?, heartbeat_at = ?,
+                    attempts = attempts + 1, started_at = COALESCE(started_at, ?), error = NULL
+                WHERE id = ?
+            ''', (worker_id, now + lease_seconds, now, now, row['id']))
+            conn.commit()
+            job = conn.execute('SELECT * FROM jobs WHERE id = ?', (row['id'],)).fetchone()
+            publish('job', id=job['id'], kind=job['kind'], state='running', attempt=job['attempts'],
+                    worker=worker_id)
+            return self._row_to_dict(job)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _reclaim_expired(self, conn, now: float):
+        """Jobs whose worker stopped heartbeating go back to the queue (or fail when out of attempts)"""
+        conn.execute('''
+            UPDATE jobs
+            SET state = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+                error = 'lease expired (worker ' || COALESCE(lease_owner, '?') || ' stopped heartbeating)',
+                finished_at = CASE WHEN attempts >= max_attempts THEN ? ELSE NULL END,
+                lease_owner = NULL, lease_expires_at = NULL
+            WHERE state = 'running' AND lease_expires_at < ?
+        ''', (now, now))
+
+    def heartbeat(self, job_id: int, worker_id: str, stage: Optional[str] = None,
+                  timings: Optional[Dict] = None, lease_seconds: float = None) -> bool:
+        """Extend the lease; returns False if the lease was lost (job reclaimed by someone else)"""
+        lease_seconds = lease_seconds or Config.JOB_LEASE_SECONDS
+        now = time.time()
+        sets = ['lease_expires_at = ?', 'heartbeat_at = ?']
+        params: list = [now + lease_seconds, now]
+        if stage is not None:
+            sets.append('stage = ?')
+            params.append(stage)
+        if timings is not None:
+            sets.append('timings = ?')
+            params.append(json.dumps(timings))
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            UPDATE jobs SET {', '.join(sets)}
+            WHERE id = ? AND lease_owner = ? AND state = 'running'
+        ''', params + [job_id, worker_id])
+        renewed = cursor.rowcount == 1
+        conn.commit()
+        conn.close()
+        if renewed and stage is not None:
+            publish('job', id=job_id, state='running', stage=stage)
+        return renewed
+
+    def complete(self, job_id: int, worker_id: str, result: Optional[Dict] = None,
+                 timings: Optional[Dict] = None) -> bool:
+        """Mark a job succeeded (only by the worker holding its lease)"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE jobs
+            SET state = 'succeeded', result = ?, timings = COALESCE(?, timings), finished_at = ?,
+                lease_owner = NULL, lease_expires_at = NULL, stage = 'done'
+            WHERE id = ? AND lease_owner = ?
+        ''', (json.dumps(result) if result is not None else None,
+              json.dumps(timings) if timings is not None else None, time.time(), job_id, worker_id))
+        done = cursor.rowcount == 1
+        conn.commit()
+        conn.close()
+        if done:
+            publish('job', id=job_id, state='succeeded', stage='done', result=result)
+        return done
+
+    def fail(self, job_id: int, worker_id: str, error: str, retry: bool = True,
+             timings: Optional[Dict] = None) -> str:
+        """Record a failure; requeues with backoff while attempts remain. Returns the new state"""
+        now = time.time()
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('SELECT attempts, max_attempts FROM jobs WHERE id = ? AND lease_owner = ?',
+                       (job_id, worker_id))
+        row = cursor.fetchone()
+        if not row:
+            conn.close()
+            return 'lost'
+
+        if retry and row['attempts'] < row['max_attempts']:
+            state = 'queued'
+            # 30s, 60s, 120s... between attempts
+            available_at = now + Config.JOB_RETRY_BACKOFF_SECONDS * (2 ** (row['attempts'] - 1))
+            finished_at = None
+        else:
+            state = 'failed'
+            available_at = now
+            finished_at = now
+
+        cursor.execute('''
+            UPDATE jobs
+            SET state = ?, error = ?, available_at = ?, finished_at = ?, timings = COALESCE(?, timings),
+                lease_owner = NULL, lease_expires_at = NULL
+            WHERE id = ? AND lease_owner = ? AND attempts = ?
+        ''', (state, error[:2000], available_at, finished_at,
+              json.dumps(timings) if timings is not None else None, job_id, worker_id, row['attempts']))
+        # The lease can expire and the job be re-claimed between the SELECT and here - then it isn't ours
+        updated = cursor.rowcount == 1
+        conn.commit()
+        conn.close()
+        if not updated:
+            return 'lost'
+        publish('job', id=job_id, state=state, error=error[:300], retry_at=available_at if state == 'queued' else None)
+        return state
+
+    def cancel(self, job_id: int, reason: str = "cancelled") -> bool:
+        """Fail a job that hasn't been claimed yet; False if a worker already has it"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE jobs SET state = 'failed', error = ?, finished_at = ?
+            WHERE id = ? AND state = 'queued'
+        ''', (reason, time.time(), job_id))
+        cancelled = cursor.rowcount == 1
+        conn.commit()
+        conn.close()
+        if cancelled:
+            publish('job', id=job_id, state='failed', error=reason)
+        return cancelled
+
+    def get(self, job_id: int) -> Optional[Dict]:
+        conn = self._connect()
+        row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        conn.close()
+        return self._row_to_dict(row) if row else None
+
+    def list_jobs(self, state: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """Most recent jobs first, optionally filtered by state"""
+        conn = self._connect()
+        if state:
+            rows = conn.execute('SELECT * FROM jobs WHERE state = ? ORDER BY id DESC LIMIT ?',
+                                (state, limit)).fetchall()
+        else:
+            rows = conn.execute('SELECT * FROM jobs ORDER BY id DESC LIMIT ?', (limit,)).fetchall()
+        conn.close()
+        return [self._row_to_dict(row) for row in rows]
+
+    def get_stats(self) -> Dict[str, int]:
+        """Job counts per state"""
+        conn = self._connect()
+        rows = conn.execute('SELECT state, COUNT(*) AS n FROM jobs GROUP BY state').fetchall()
+        conn.close()
+        stats = {state: 0 for state in self.STATES}
+        stats.update({row['state']: row['n'] for row in rows})
+        return stats
+
+    def count_active(self, kind: str, source: Optional[str] = None) -> int:
+        """Queued or running jobs of `kind` (only those whose payload 'source' matches, if given)"""
+        query = "SELECT COUNT(*) AS n FROM jobs WHERE state IN ('queued', 'running') AND kind = ?"
+        params: list = [kind]
+        if source is not None:
+            query += " AND json_extract(payload, '$.source') = ?"
+            params.append(source)
+        conn = self._connect()
+        row = conn.execute(query, params).fetchone()
+        conn.close()
+        return row['n']
+
+    def cleanup_finished(self, days: int = 30) -> int:
+        """Delete finished jobs older than `days`"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            DELETE FROM jobs WHERE state IN ('succeeded', 'failed') AND finished_at < ?
+        ''', (time.time() - days * 86400,))
+        removed = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return removed
+
+    @staticmethod
+    def _row_to_dict(row) -> Dict:
+        job = dict(row)
+        for field in ('payload', 'timings', 'result'):
+            if job.get(field):
+                try:
+                    job[field] = json.loads(job[field])
+                except ValueError:
+                    pass
+        return job
+
+
+class JobContext:
+    """Handed to job handlers: report the current stage (recorded with per-stage timings)"""
+
+    def __init__(self, queue: JobQueue, job: Dict, worker_id: str):
+        self.queue = queue
+        self.job = job
+        self.worker_id = worker_id
+        self.payload = job.get('payload') or {}
+        self.trace = tracing.start_trace(job['kind'], job_id=job['id'])  # None when tracing is off
+        self.timings: Dict[str, float] = {}
+        self.lease_lost = False
+        self._stage = None
+        self._stage_started = time.time()
+        self._lock = threading.Lock()
+
+    def set_stage(self, stage: str):
+        """Close the current stage's timer and start a new one (also renews the lease)"""
+        with self._lock:
+            self._close_stage()
+            self._stage = stage
+            self._stage_started = time.time()
+            timings = dict(self.timings)
+        self.heartbeat(stage=stage, timings=timings)
+
+    def _close_stage(self):
+        if self._stage:
+            elapsed = time.time() - self._stage_started
+            self.timings[self._stage] = round(self.timings.get(self._stage, 0) + elapsed, 3)
+
+    def finish_timings(self) -> Dict[str, float]:
+        with self._lock:
+            self._close_stage()
+            self._stage = None
+            return dict(self.timings)
+
+    def heartbeat(self, stage: Optional[str] = None, timings: Optional[Dict] = None) -> bool:
+        renewed = self.queue.heartbeat(self.job['id'], self.worker_id, stage=stage, timings=timings)
+        if not renewed:
+            self.lease_lost = True
+        return renewed
+
+
+class JobWorker:
+    """Claims jobs and runs them with a bounded number of threads, heartbeating each lease"""
+
+    def __init__(self, queue: JobQueue, handlers: Dict[str, Callable[[JobContext], Optional[Dict]]],
+                 concurrency: int = None, worker_name: str = None, poll_interval: float = 2.0):
+        self.queue = queue
+        self.handlers = handlers
+        self.concurrency = max(1, concurrency or Config.JOB_WORKERS)
+        self.worker_name = worker_name or f"{socket.gethostname()}-{threading.get_ident()}"
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._loop, args=(f"{self.worker_name}/{i}",),
+                                      name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"🧵 Job worker started: {self.concurrency} slot(s) for {', '.join(self.handlers)}")
+        return self
+
+    def stop(self, wait: bool = False):
+        self._stop.set()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def _loop(self, worker_id: str):
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim(worker_id, kinds=list(self.handlers))
+            except sqlite3.Error as e:
+                print(f"⚠️ Job claim failed: {e}")
+                job = None
+            if not job:
+                self._stop.wait(self.poll_interval)
+                continue
+            self.run_job(job, worker_id)
+
+    def run_job(self, job: Dict, worker_id: str):
+        """Run one claimed job to completion (heartbeats in the background)"""
+        ctx = JobContext(self.queue, job, worker_id)
+        stop_heartbeat = threading.Event()
+
+        def beat():
+            interval = max(1.0, Config.JOB_LEASE_SECONDS / 3)
+            while not stop_heartbeat.wait(interval):
+                if not ctx.heartbeat():
+                    print(f"⚠️ Job {job['id']} lease lost - another worker may take it over")
+                    return
+
+        heartbeat_thread = threading.Thread(target=beat, daemon=True)
+        heartbeat_thread.start()
+        print(f"▶️ Job {job['id']} ({job['kind']}) started on {worker_id} (attempt {job['attempts']}/{job['max_attempts']})")
+        error = None
+        try:
+            ctx.set_stage('start')
+            with tracing.activate(ctx.trace), tracing.span(f"job.{job['kind']}", attempt=job['attempts']):
+                result = self.handlers[job['kind']](ctx)
+            stop_heartbeat.set()
+            self.queue.complete(job['id'], worker_id, result, timings=ctx.finish_timings())
+            print(f"✅ Job {job['id']} ({job['kind']}) succeeded")
+        except Exception as e:
+            error = e
+            stop_heartbeat.set()
+            traceback.print_exc()
+            state = self.queue.fail(job['id'], worker_id, f"{type(e).__name__}: {e}", timings=ctx.finish_timings())
+            print(f"❌ Job {job['id']} ({job['kind']}) failed: {e} → {state}")
+        finally:
+            stop_heartbeat.set()
+            tracing.save(ctx.trace, error)
@@ -0,0 +1,270 @@
+"""
+Mezzanine cache for b-roll - every downloaded clip is transcoded once to
+1080x1920 @ 30 fps with a fixed GOP, so rendering only ever reads pre-sized frames
+Content-addressed by source URL, bounded by a disk budget with LRU eviction
+One instance per process (get_mezzanine_cache); processes sharing the directory (remote render
+workers on the same host) merge their index updates under a file lock
+"""
+import os
+import json
+import time
+import hashlib
+import random
+import threading
+import subprocess
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+from core.config import Config
+from core.ffmpeg_renderer import find_ffmpeg_binary
+
+try:
+    import fcntl
+except ImportError:  # Windows - the index is then only merged within one process
+    fcntl = None
+
+STAT_FIELDS = ('hits', 'misses', 'transcodes', 'evictions', 'bytes_saved', 'transcode_seconds')
+
+
+class MezzanineCache:
+    """Content-addressed cache of normalized b-roll clips"""
+
+    INDEX_FILE = "index.json"
+    LOCK_FILE = "index.lock"
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = None,
+                 video_size: Tuple[int, int] = (1080, 1920), fps: int = 30):
+        self.cache_dir = cache_dir or Config.MEZZANINE_CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else Config.MEZZANINE_CACHE_MAX_MB * 1024 * 1024
+        self.video_size = video_size
+        self.fps = fps
+        self.ffmpeg = find_ffmpeg_binary()
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.index = self._load_index()
+        self._pending = dict.fromkeys(STAT_FIELDS, 0)  # Counter increments not yet merged to disk
+        self._evicted = set()  # Keys removed since the last save (don't resurrect them from disk)
+
+    def _count(self, field: str, amount=1):
+        self.index['stats'][field] += amount
+        self._pending[field] += amount
+
+    @staticmethod
+    def key_for(source_url: Optional[str] = None, source_path: Optional[str] = None) -> str:
+        """Cache key: hash of the source URL, or of the file contents when there is no URL"""
+        digest = hashlib.sha256()
+        if source_url:
+            digest.update(source_url.encode('utf-8'))
+        else:
+            with open(source_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+        return digest.hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.mp4")
+
+    @staticmethod
+    def _covers(entry: Dict, min_seconds: Optional[float]) -> bool:
+        """Entries built from a partial fetch only hold the first covered_seconds of the clip"""
+        covered = entry.get('covered_seconds')
+        return not covered or not min_seconds or covered >= min_seconds
+
+    def lookup(self, source_url: str, min_seconds: Optional[float] = None) -> Optional[str]:
+        """Return the mezzanine path for a URL if cached (counts as a hit, refreshes LRU)"""
+        key = self.key_for(source_url)
+        path = self.path_for(key)
+        with self._lock:
+            entry = self.index['entries'].get(key)
+            if not entry or not os.path.exists(path) or not self._covers(entry, min_seconds):
+                return None
+            entry['last_used'] = time.time()
+            entry['hits'] = entry.get('hits', 0) + 1
+            self._count('hits')
+            # Hit means we skipped both the download and the transcode
+            self._count('bytes_saved', entry.get('source_bytes', 0))
+            self._save_index()
+        return path
+
+    def ingest(self, source_path: str, source_url: Optional[str] = None, max_seconds: float = None,
+               covered_seconds: Optional[float] = None) -> str:
+        """
+        Transcode a downloaded clip into the cache and return the mezzanine path
+        covered_seconds marks a source that is only the first N seconds of the clip (partial fetch)
+        Returns source_path unchanged if transcoding isn't possible
+        """
+        if not self.ffmpeg:
+            return source_path
+
+        key = self.key_for(source_url, source_path)
+        path = self.path_for(key)
+        with self._lock:
+            entry = self.index['entries'].get(key)
+        if entry and os.path.exists(path):
+            if covered_seconds is None and max_seconds is None:
+                # A full download only reuses a full mezzanine - a partial one gets replaced
+                reusable = entry.get('covered_seconds') is None
+            else:
+                reusable = self._covers(entry, covered_seconds or max_seconds)
+            if reusable:
+                return path
+
+        max_seconds = max_seconds or Config.VIDEO_DURATION_SECONDS
+        width, height = self.video_size
+        temp_path = f"{path}.{random.randint(10000, 99999)}.tmp.mp4"
+        cmd = [
+            self.ffmpeg, '-y', '-hide_banner', '-loglevel', 'error',
+            '-i', source_path, '-t', f"{max_seconds:.3f}",
+            '-vf', (f"scale={width}:{height}:force_original_aspect_ratio=increase:flags=lanczos,"
+                    f"crop={width}:{height},fps={self.fps},setsar=1"),
+            '-an', '-c:v', 'libx264', '-preset', 'fast', '-crf', '16', '-pix_fmt', 'yuv420p',
+            '-g', str(self.fps), '-keyint_min', str(self.fps), '-sc_threshold', '0',
+            '-movflags', '+faststart', temp_path
+        ]
+
+        start = time.time()
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        elapsed = time.time() - start
+        if result.returncode != 0 or not os.path.exists(temp_path):
+            print(f"⚠️ Mezzanine transcode failed, using original clip: {result.stderr.strip()[-300:]}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return source_path
+
+        os.replace(temp_path, path)
+        with self._lock:
+            self.index['entries'][key] = {
+                'source_url': source_url,
+                'source_bytes': os.path.getsize(source_path),
+                'covered_seconds': covered_seconds,
+                'bytes': os.path.getsize(path),
+                'transcode_seconds': round(elapsed, 3),
+                'created': time.time(),
+                'last_used': time.time(),
+                'hits': 0
+            }
+            self._count('misses')
+            self._count('transcodes')
+            self._count('transcode_seconds', round(elapsed, 3))
+            self._evict_locked(keep=key)
+            self._save_index()
+
+        print(f"🎞️ Mezzanine ready ({elapsed:.1f}s transcode): {os.path.basename(path)}")
+        return path
+
+    def _disk_usage(self) -> Dict[str, Tuple[int, float]]:
+        """{key: (bytes, mtime)} of every mezzanine file in the directory, indexed or not"""
+        usage = {}
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.mp4') or '.tmp' in name:
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            usage[name[:-4]] = (stat.st_size, stat.st_mtime)
+        return usage
+
+    def _evict_locked(self, keep: Optional[str] = None):
+        """
+        Drop least-recently-used clips until the directory fits the disk budget
+        Sized from the files themselves, so clips another process wrote (or an index lost) still count
+        """
+        entries = self.index['entries']
+        usage = self._disk_usage()
+        total = sum(size for size, _ in usage.values())
+        last_used = lambda key: entries.get(key, {}).get('last_used', usage[key][1])
+        for key in sorted(usage, key=last_used):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            try:
+                os.remove(self.path_for(key))
+            except FileNotFoundError:
+                pass
+            total -= usage[key][0]
+            entries.pop(key, None)
+            self._evicted.add(key)
+            self._count('evictions')
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counters, bytes saved, transcode time and current disk usage"""
+        with self._lock:
+            stats = dict(self.index['stats'])
+            lookups = stats['hits'] + stats['misses']
+            stats['hit_rate'] = round(stats['hits'] / lookups * 100, 1) if lookups else 0.0
+            stats['entries'] = len(self.index['entries'])
+            stats['disk_bytes'] = sum(size for size, _ in self._disk_usage().values())
+            stats['budget_bytes'] = self.max_bytes
+        return stats
+
+    def _read_index_file(self) -> Dict:
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        index = {'entries': {}, 'stats': {}}
+        if os.path.exists(index_path):
+            try:
+                with open(index_path) as f:
+                    index = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Mezzanine index unreadable, starting fresh: {e}")
+        for field in STAT_FIELDS:
+            index.setdefault('stats', {}).setdefault(field, 0)
+        index.setdefault('entries', {})
+        return index
+
+    def _load_index(self) -> Dict:
+        index = self._read_index_file()
+        # Forget entries whose files were removed out from under us
+        index['entries'] = {k: v for k, v in index['entries'].items() if os.path.exists(self.path_for(k))}
+        return index
+
+    @contextmanager
+    def _file_lock(self):
+        """Serializes index read-merge-write between processes sharing the cache directory"""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.cache_dir, self.LOCK_FILE), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _save_index(self):
+        """Merge with what other processes wrote since our last save, then write atomically (call under _lock)"""
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        with self._file_lock():
+            on_disk = self._read_index_file()
+            entries = self.index['entries']
+            for key, entry in on_disk['entries'].items():
+                mine = entries.get(key)
+                if mine is None:
+                    if key not in self._evicted:
+                        entries[key] = entry
+                elif entry.get('created', 0) > mine.get('created', 0):
+                    entries[key] = dict(entry, last_used=max(entry.get('last_used', 0), mine.get('last_used', 0)))
+            self.index['entries'] = {k: v for k, v in entries.items() if os.path.exists(self.path_for(k))}
+            self.index['stats'] = {field: on_disk['stats'][field] + self._pending[field] for field in STAT_FIELDS}
+            self.index['stats']['transcode_seconds'] = round(self.index['stats']['transcode_seconds'], 3)
+            temp_path = f"{index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(self.index, f)
+            os.replace(temp_path, index_path)
+        self._pending = dict.fromkeys(STAT_FIELDS, 0)
+        self._evicted.clear()
+
+
+_mezzanine_cache = None
+_mezzanine_cache_lock = threading.Lock()
+
+
+def get_mezzanine_cache() -> Optional[MezzanineCache]:
+    """Shared cache for every VideoCreator in the process (None when disabled)"""
+    global _mezzanine_cache
+    if not Config.MEZZANINE_CACHE_ENABLED:
+        return None
+    with _mezzanine_cache_lock:
+        if _mezzanine_cache is None:
+            _mezzanine_cache = MezzanineCache()
+        return _mezzanine_cache
@@ -3,14 +3,24 @@ Media providers for fetching images/videos from free APIs
 Supports Pixabay and Pexels for CC0 stock media
 """
 import os
+import time
+import threading
 import requests
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from typing import Callable, Dict, List, Optional
 from core.config import Config
+from core.search_cache import get_search_cache
+from core import tracing
 import random
 
 class MediaProvider:
     """Base class for media providers"""
     
+    # Provider name used in search cache keys
+    name = 'base'
+    # Max in-flight searches against this provider during a fan-out
+    max_concurrency = 2
+    
     def search_images(self, query: str, per_page: int = 10) -> List[Dict]:
         """Search for images"""
         raise NotImplementedError
@@ -18,10 +28,30 @@ class MediaProvider:
     def search_videos(self, query: str, per_page: int = 10) -> List[Dict]:
         """Search for videos"""
         raise NotImplementedError
+    
+    def _cached_get(self, endpoint: str, query: str, orientation: Optional[str], per_page: int,
+                    url: str, params: Dict, headers: Optional[Dict] = None) -> Dict:
+        """GET a search endpoint, serving repeat (endpoint, query, orientation, per_page) from the cache"""
+        cache = get_search_cache()
+        if cache:
+            data = cache.get(self.name, endpoint, query, orientation, per_page)
+            if data is not None:
+                return data
+        
+        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response.raise_for_status()
+        data = response.json()
+        
+        # Only successful responses are cached - errors raise above and are retried next time
+        if cache:
+            cache.put(self.name, endpoint, query, orientation, per_page, data)
+        return data
 
 class PixabayProvider(MediaProvider):
     """Pixabay API provider - free images and videos"""
     
+    name = 'pixabay'
+    
     def __init__(self):
         self.api_key = os.getenv('PIXABAY_API_KEY', Config.PIXABAY_API_KEY if hasattr(Config, 'PIXABAY_API_KEY') else None)
         self.base_url = "https://pixabay.com/api/"
@@ -41,9 +71,7 @@ class PixabayProvider(MediaProvider):
                 'safesearch': 'true',
                 'per_page': per_page
             }
-            response = requests.get(f"{self.base_url}", params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = self._cached_get('images', query, 'vertical', per_page, f"{self.base_url}", params)
             
             results = []
             for hit in data.get('hits', []):
@@ -79,9 +107,7 @@ class PixabayProvider(MediaProvider):
                 'safesearch': 'true',
                 'per_page': per_page
             }
-            response = requests.get(f"{self.base_url}videos/", params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = self._cached_get('videos', query, None, per_page, f"{self.base_url}videos/", params)
             
             results = []
             for hit in data.get('hits', []):
@@ -110,6 +136,9 @@ class PixabayProvider(MediaProvider):
 class PexelsProvider(MediaProvider):
     """Pexels API provider - free images and videos"""
     
+    name = 'pexels'
+    max_concurrency = 3
+    
     def __init__(self):
         self.api_key = os.getenv('PEXELS_API_KEY', Config.PEXELS_API_KEY if hasattr(Config, 'PEXELS_API_KEY') else None)
         self.base_url = "https://api.pexels.com/v1"
@@ -127,14 +156,12 @@ class PexelsProvider(MediaProvider):
                 'orientation': 'portrait',  # For YouTube Shorts
                 'per_page': per_page
             }
-            response = requests.get(
+            data = self._cached_get(
+                'images', query, 'portrait', per_page,
                 f"{self.base_url}/search",
                 params=params,
-                headers=self.headers,
-                timeout=10
+                headers=self.headers
             )
-            response.raise_for_status()
-            data = response.json()
             
             results = []
             for photo in data.get('photos', []):
@@ -168,14 +195,12 @@ class PexelsProvider(MediaProvider):
                 'orientation': 'portrait',
                 'per_page': per_page
             }
-            response = requests.get(
+            data = self._cached_get(
+                'videos', query, 'portrait', per_page,
                 f"{self.base_url}/videos/search",
                 params=params,
-                headers=self.headers,
-                timeout=10
+                headers=self.headers
             )
-            response.raise_for_status()
-            data = response.json()
             
             results = []
             for video in data.get('videos', []):
@@ -286,3 +311,85 @@ class MediaFetcher:
                     break
         
         return unique_images
+    
+    def get_search_cache_stats(self) -> Dict:
+        """Search cache hit/miss counters (empty when the cache is disabled)"""
+        cache = get_search_cache()
+        return cache.get_stats() if cache else {}
+    
+    def search_videos_fanout(self, queries: List[str], per_page: int = 10, target_count: int = 8,
+                             is_usable: Optional[Callable[[Dict], bool]] = None,
+                             deadline: Optional[float] = None) -> List[Dict]:
+        """
+        Search videos for every (query, provider) pair concurrently
+        
+        Results keep the sequential priority order (query order, then provider order).
+        Stops early once target_count unique usable URLs are settled, or when the deadline
+        (absolute time.time() value) passes - whatever finished by then is used.
+        """
+        if not self.providers or not queries:
+            return []
+        
+        # Priority order = the order the old sequential loop visited them
+        tasks = [(qi, pi) for qi in range(len(queries)) for pi in range(len(self.providers))]
+        semaphores = [threading.BoundedSemaphore(p.max_concurrency) for p in self.providers]
+        stop = threading.Event()
+        results: Dict = {}
+        
+        def run(qi: int, pi: int) -> List[Dict]:
+            with semaphores[pi]:
+                if stop.is_set():
+                    return []
+                with tracing.span('broll.search', query=queries[qi], provider=self.providers[pi].name) as search:
+                    found = self.providers[pi].search_videos(queries[qi], per_page=per_page)
+                    search.set(results=len(found or []))
+                return found
+        
+        pool = ThreadPoolExecutor(max_workers=min(Config.BROLL_SEARCH_WORKERS, len(tasks)))
+        run = tracing.bind(run)
+        futures = {pool.submit(run, qi, pi): (qi, pi) for qi, pi in tasks}
+        try:
+            timeout = max(0.0, deadline - time.time()) if deadline else None
+            for future in as_completed(futures, timeout=timeout):
+                try:
+                    results[futures[future]] = future.result() or []
+                except Exception as e:
+                    print(f"⚠️ Search failed for '{queries[futures[future][0]]}': {e}")
+                    results[futures[future]] = []
+                
+                _, settled = self._select_in_priority_order(tasks, results, target_count, is_usable)
+                if settled:
+                    break
+        except FuturesTimeoutError:
+            print(f"⏱️ B-roll search deadline reached ({len(results)}/{len(tasks)} searches finished)")
+        finally:
+            stop.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+        
+        selected, _ = self._select_in_priority_order(tasks, results, target_count, is_usable)
+        return selected
+    
+    @staticmethod
+    def _select_in_priority_order(tasks: List, results: Dict, target_count: int,
+                                  is_usable: Optional[Callable[[Dict], bool]]):
+        """
+        Pick unique usable results in priority order
+        Returns (selected, settled) - settled means every higher-priority search has finished,
+        so waiting for more results can't change the selection
+        """
+        selected = []
+        seen_urls = set()
+        prefix_done = True
+        for task in tasks:
+            if task not in results:
+                prefix_done = False
+                continue
+            for media in results[task]:
+                url = media.get('url') if media else None
+                if not url or url in seen_urls or (is_usable and not is_usable(media)):
+                    continue
+                selected.append(media)
+                seen_urls.add(url)
+                if len(selected) >= target_count:
+                    return selected, prefix_done
+        return selected, False
@@ -0,0 +1,224 @@
+"""
+Partial-range MP4 fetch - download only the first N seconds of a stock clip
+Reads the moov atom with a small Range request, works out which byte prefix holds
+the first N seconds of video samples, downloads just that prefix and remuxes it
+(stream copy) into a playable trimmed MP4
+"""
+import os
+import struct
+import subprocess
+from typing import Dict, List, Optional, Tuple
+from core.downloader import get_downloader, Downloader, MEDIA_TYPES
+from core.ffmpeg_renderer import find_ffmpeg_binary
+
+
+class MP4LayoutError(Exception):
+    """Raised when a file's layout doesn't allow a prefix fetch (caller downloads the whole file)"""
+
+
+def iter_boxes(data: bytes, start: int = 0, end: Optional[int] = None):
+    """Yield (type, offset, size, header_size) for the boxes in data[start:end]"""
+    end = len(data) if end is None else end
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack('>I4s', data[offset:offset + 8])
+        header_size = 8
+        if size == 1:
+            if offset + 16 > end:
+                return
+            size = struct.unpack('>Q', data[offset + 8:offset + 16])[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset  # Box runs to end of file
+        if size < header_size:
+            raise MP4LayoutError(f"corrupt box size {size} at {offset}")
+        yield box_type.decode('latin-1'), offset, size, header_size
+        offset += size
+
+
+def _child(data: bytes, offset: int, size: int, header_size: int, path: List[str]) -> Optional[Tuple[int, int, int]]:
+    """Find a nested box by type path; returns (offset, size, header_size)"""
+    for box_type, child_offset, child_size, child_header in iter_boxes(data, offset + header_size, offset + size):
+        if box_type == path[0]:
+            if len(path) == 1:
+                return child_offset, child_size, child_header
+            return _child(data, child_offset, child_size, child_header, path[1:])
+    return None
+
+
+class MP4RangeFetcher:
+    """Fetches a playable MP4 covering only the first N seconds of a remote faststart file"""
+
+    HEADER_PROBE_BYTES = 64 * 1024
+    MAX_MOOV_BYTES = 8 * 1024 * 1024
+    # Don't bother if the prefix is most of the file anyway
+    MIN_SAVINGS_RATIO = 0.8
+    # Extra samples past the cut to cover B-frame reordering
+    EXTRA_SAMPLES = 15
+
+    def __init__(self, downloader: Optional[Downloader] = None):
+        self.downloader = downloader or get_downloader()
+        self.ffmpeg = find_ffmpeg_binary()
+
+    def fetch_prefix(self, url: str, dest_path: str, seconds: float) -> Dict:
+        """
+        Download the first `seconds` of url into dest_path
+        Returns {'path', 'bytes', 'total_bytes'}; raises MP4LayoutError / DownloadError to signal fallback
+        """
+        if not self.ffmpeg:
+            raise MP4LayoutError("ffmpeg binary not found (needed to remux the prefix)")
+
+        moov, total_bytes = self._read_moov(url)
+        end_offset = self.byte_end_for_seconds(moov, seconds)
+        if total_bytes and end_offset >= total_bytes * self.MIN_SAVINGS_RATIO:
+            raise MP4LayoutError(f"first {seconds:.1f}s is most of the file")
+
+        prefix_path = f"{dest_path}.prefix.mp4"
+        self.downloader.download(url, prefix_path, allowed_types=MEDIA_TYPES, byte_range=(0, end_offset - 1))
+        try:
+            # The moov still lists samples past the cut - ffmpeg only reads up to -t, then rewrites the index
+            cmd = [
+                self.ffmpeg, '-y', '-hide_banner', '-loglevel', 'error',
+                '-i', prefix_path, '-t', f"{seconds:.3f}",
+                '-map', '0:v:0', '-an', '-c', 'copy', '-movflags', '+faststart', dest_path
+            ]
+            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            if result.returncode != 0 or not os.path.exists(dest_path) or os.path.getsize(dest_path) == 0:
+                if os.path.exists(dest_path):
+                    os.remove(dest_path)
+                raise MP4LayoutError(f"remux of prefix failed: {result.stderr.strip()[-300:]}")
+        finally:
+            if os.path.exists(prefix_path):
+                os.remove(prefix_path)
+
+        return {'path': dest_path, 'bytes': end_offset, 'total_bytes': total_bytes}
+
+    def _read_moov(self, url: str) -> Tuple[bytes, Optional[int]]:
+        """Locate and read the moov box; requires moov before mdat (faststart)"""
+        head, total_bytes = self.downloader.fetch_range(url, 0, self.HEADER_PROBE_BYTES - 1)
+        offset = 0
+        while True:
+            if offset + 16 <= len(head):
+                header = head[offset:offset + 16]
+            else:
+                header, _ = self.downloader.fetch_range(url, offset, offset + 15)
+            if len(header) < 8:
+                raise MP4LayoutError("no moov box found")
+
+            size, box_type = struct.unpack('>I4s', header[:8])
+            if size == 1 and len(header) >= 16:
+                size = struct.unpack('>Q', header[8:16])[0]
+            if box_type == b'mdat':
+                raise MP4LayoutError("moov is after mdat (not a faststart file)")
+            if size < 8:
+                raise MP4LayoutError(f"unexpected top-level box size {size}")
+            if box_type == b'moov':
+                if size > self.MAX_MOOV_BYTES:
+                    raise MP4LayoutError(f"moov too large ({size} bytes)")
+                if offset + size <= len(head):
+                    return head[offset:offset + size], total_bytes
+                moov, _ = self.downloader.fetch_range(url, offset, offset + size - 1)
+                if len(moov) != size:
+                    raise MP4LayoutError("short read on moov")
+                return moov, total_bytes
+            offset += size
+            if total_bytes and offset >= total_bytes:
+                raise MP4LayoutError("no moov box found")
+
+    def byte_end_for_seconds(self, moov: bytes, seconds: float) -> int:
+        """Byte offset just past the last video sample needed for the first `seconds`"""
+        end_offset = 0
+        for box_type, offset, size, header_size in iter_boxes(moov, 8, len(moov)):
+            if box_type != 'trak':
+                continue
+            track = self._parse_track(moov, offset, size, header_size)
+            if not track or track['handler'] != 'vide':
+                continue
+            end_offset = max(end_offset, self._sample_end_offset(track, seconds))
+        if not end_offset:
+            raise MP4LayoutError("no video track")
+        return end_offset
+
+    def _parse_track(self, data: bytes, offset: int, size: int, header_size: int) -> Optional[Dict]:
+        mdia = _child(data, offset, size, header_size, ['mdia'])
+        if not mdia:
+            return None
+        hdlr = _child(data, *mdia, ['hdlr'])
+        mdhd = _child(data, *mdia, ['mdhd'])
+        stbl = _child(data, *mdia, ['minf', 'stbl'])
+        if not (hdlr and mdhd and stbl):
+            return None
+
+        handler = data[hdlr[0] + hdlr[2] + 8:hdlr[0] + hdlr[2] + 12].decode('latin-1')
+        body = mdhd[0] + mdhd[2]
+        version = data[body]
+        timescale_at = body + (20 if version == 1 else 12)
+        timescale = struct.unpack('>I', data[timescale_at:timescale_at + 4])[0]
+
+        def table(box_type: str) -> Optional[int]:
+            found = _child(data, *stbl, [box_type])
+            return found[0] + found[2] if found else None  # Start of the full-box body
+
+        stts, stsc, stsz = table('stts'), table('stsc'), table('stsz')
+        stco, co64 = table('stco'), table('co64')
+        if stts is None or stsc is None or stsz is None or (stco is None and co64 is None):
+            raise MP4LayoutError("incomplete sample tables")
+
+        count = struct.unpack('>I', data[stts + 4:stts + 8])[0]
+        time_to_sample = [struct.unpack('>II', data[stts + 8 + i * 8:stts + 16 + i * 8]) for i in range(count)]
+
+        count = struct.unpack('>I', data[stsc + 4:stsc + 8])[0]
+        sample_to_chunk = [struct.unpack('>III', data[stsc + 8 + i * 12:stsc + 20 + i * 12]) for i in range(count)]
+
+        uniform_size, sample_count = struct.unpack('>II', data[stsz + 4:stsz + 12])
+        if uniform_size:
+            sizes = [uniform_size] * sample_count
+        else:
+            sizes = list(struct.unpack(f'>{sample_count}I', data[stsz + 12:stsz + 12 + sample_count * 4]))
+
+        if stco is not None:
+            count = struct.unpack('>I', data[stco + 4:stco + 8])[0]
+            chunk_offsets = list(struct.unpack(f'>{count}I', data[stco + 8:stco + 8 + count * 4]))
+        else:
+            count = struct.unpack('>I', data[co64 + 4:co64 + 8])[0]
+            chunk_offsets = list(struct.unpack(f'>{count}Q', data[co64 + 8:co64 + 8 + count * 8]))
+
+        return {
+            'handler': handler,
+            'timescale': timescale,
+            'time_to_sample': time_to_sample,
+            'sample_to_chunk': sample_to_chunk,
+            'sizes': sizes,
+            'chunk_offsets': chunk_offsets
+        }
+
+    def _sample_end_offset(self, track: Dict, seconds: float) -> int:
+        """End byte of the last sample whose decode time is before `seconds` (plus reorder slack)"""
+        cutoff = seconds * track['timescale']
+        needed = 0
+        dts = 0
+        for count, delta in track['time_to_sample']:
+            if delta and dts + count * delta >= cutoff:
+                needed += int((cutoff - dts) // delta) + 1
+                break
+            needed += count
+            dts += count * delta
+        sizes = track['sizes']
+        last_sample = min(needed + self.EXTRA_SAMPLES, len(sizes)) - 1
+
+        # Walk chunks until we reach the chunk holding last_sample, track the furthest byte seen
+        chunk_offsets = track['chunk_offsets']
+        runs = track['sample_to_chunk']
+        sample = 0
+        end_offset = 0
+        for i, (first_chunk, per_chunk, _) in enumerate(runs):
+            last_chunk = runs[i + 1][0] - 1 if i + 1 < len(runs) else len(chunk_offsets)
+            for chunk in range(first_chunk, last_chunk + 1):
+                position = chunk_offsets[chunk - 1]
+                for s in range(sample, min(sample + per_chunk, last_sample + 1)):
+                    position += sizes[s]
+                end_offset = max(end_offset, position)
+                sample += per_chunk
+                if sample > last_sample:
+                    return end_offset
+        return end_offset
@@ -48,12 +48,14 @@ class NotificationManager:
             cursor = conn.cursor()
             
             # Get videos with high view counts from last 7 days
+            # Unary + keeps SQLite off idx_videos_status_views (most uploads pass the views filter);
+            # the 7-day range on idx_videos_created_at is the selective one
             cursor.execute("""
                 SELECT video_id, title, topic, youtube_url, views, created_at
                 FROM videos 
-                WHERE status = 'uploaded' 
+                WHERE +status = 'uploaded' 
                 AND youtube_url IS NOT NULL
-                AND views >= ?
+                AND +views >= ?
                 AND created_at > datetime('now', '-7 days')
                 ORDER BY views DESC
             """, (threshold_views,))
@@ -79,34 +81,14 @@ class NotificationManager:
     def check_quota_status(self) -> Dict:
         """Check quota status and return warning level"""
         try:
-            # Estimate quota usage
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT COUNT(*) FROM videos 
-                WHERE status IN ('uploaded', 'upload_failed', 'processing')
-            """)
-            
-            upload_attempts = cursor.fetchone()[0] or 0
-            conn.close()
-            
-            # Each upload costs ~1600 units
-            estimated_used = upload_attempts * 1600
-            quota_limit = 10000
-            percentage = (estimated_used / quota_limit) * 100
-            
-            status = "healthy"
-            if percentage > 90:
-                status = "critical"
-            elif percentage > 70:
-                status = "warning"
+            from core.quota_ledger import get_quota_ledger
             
+            usage = get_quota_ledger().get_usage()
             return {
-                'status': status,
-                'percentage': percentage,
-                'estimated_used': estimated_used,
-                'quota_limit': quota_limit
+                'status': usage['status'],
+                'percentage': usage['percentage'],
+                'estimated_used': usage['used'],
+                'quota_limit': usage['limit']
             }
             
         except Exception as e:
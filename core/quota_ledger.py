@@ -0,0 +1,186 @@
+"""
+YouTube Data API quota ledger
+Every API call is appended to quota_logs with its unit cost and the Pacific-time day it
+counts against (YouTube resets quotas at midnight Pacific). The current day's total is
+kept in memory, so remaining/can_upload are O(1); the table is only read at startup and
+when the day rolls over
+"""
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from core.config import Config
+from core.db_pool import connect
+from core.events import publish
+
+try:
+    from zoneinfo import ZoneInfo
+    PACIFIC = ZoneInfo("America/Los_Angeles")
+except Exception:
+    # No tz database - fixed PST is off by an hour during daylight saving time
+    PACIFIC = timezone(timedelta(hours=-8))
+
+
+def pacific_day(ts: Optional[float] = None) -> str:
+    """Quota day (YYYY-MM-DD in Pacific time) for a Unix timestamp"""
+    return datetime.fromtimestamp(ts if ts is not None else time.time(), PACIFIC).date().isoformat()
+
+
+def next_pacific_midnight(ts: Optional[float] = None) -> datetime:
+    """When the current quota day ends (timezone-aware)"""
+    now = datetime.fromtimestamp(ts if ts is not None else time.time(), PACIFIC)
+    tomorrow = (now + timedelta(days=1)).date()
+    return datetime(tomorrow.year, tomorrow.month, tomorrow.day, tzinfo=PACIFIC)
+
+
+class QuotaLedger:
+    """Append-only log of API calls plus an in-memory counter for the current Pacific day"""
+
+    # Unit costs from the YouTube Data API v3 quota table (upload cost is configurable)
+    COSTS = {
+        'videos.insert': None,  # Config.YOUTUBE_UPLOAD_COST
+        'videos.list': 1,
+        'videos.update': 50,
+        'channels.list': 1,
+        'search.list': 100,
+        'thumbnails.set': 50,
+    }
+
+    def __init__(self, db_path: str = None, daily_limit: int = None):
+        self.db_path = db_path or Config.DATABASE_PATH
+        self.daily_limit = daily_limit or Config.YOUTUBE_DAILY_QUOTA
+        self.upload_cost = Config.YOUTUBE_UPLOAD_COST
+        self._lock = threading.Lock()
+        self._day = None
+        self._used = 0
+        self._uploads = 0
+        self._reserved = 0  # Units held for uploads in flight that haven't been charged yet
+        self._load_day(pacific_day())
+
+    def cost_of(self, operation: str) -> int:
+        cost = self.COSTS.get(operation, 1)
+        return self.upload_cost if cost is None else cost
+
+    def _load_day(self, day: str):
+        """Rebuild the in-memory counter for `day` from the table (startup / day rollover)"""
+        conn = connect(self.db_path)
+        row = conn.execute("""
+            SELECT COALESCE(SUM(cost), 0), COALESCE(SUM(operation IN ('videos.insert', 'upload_attempt')), 0)
+            FROM quota_logs WHERE pacific_day = ?
+        """, (day,)).fetchone()
+        conn.close()
+        self._day = day
+        self._used, self._uploads = int(row[0]), int(row[1])
+
+    def _roll_over(self):
+        # Caller holds self._lock
+        today = pacific_day()
+        if today != self._day:
+            self._load_day(today)
+
+    def record(self, operation: str, cost: Optional[int] = None) -> int:
+        """Log one API call (cost defaults to the operation's unit cost); returns units used today"""
+        cost = self.cost_of(operation) if cost is None else cost
+        with self._lock:
+            self._roll_over()
+            conn = connect(self.db_path)
+            conn.execute("""
+                INSERT INTO quota_logs (operation, cost, remaining_estimate, pacific_day)
+                VALUES (?, ?, ?, ?)
+            """, (operation, cost, max(0, self.daily_limit - self._used - cost), self._day))
+            conn.commit()
+            self._used += cost
+            if operation == 'videos.insert':
+                self._uploads += 1
+            used = self._used
+        publish('quota', operation=operation, cost=cost, used=used, remaining=max(0, self.daily_limit - used),
+                limit=self.daily_limit, percentage=round(used / self.daily_limit * 100, 1) if self.daily_limit else 0)
+        return used
+
+    def used(self) -> int:
+        with self._lock:
+            self._roll_over()
+            return self._used
+
+    def remaining(self) -> int:
+        """Units still free today (reservations of in-flight uploads count as spent)"""
+        with self._lock:
+            self._roll_over()
+            return max(0, self.daily_limit - self._used - self._reserved)
+
+    def reserve(self, units: int) -> bool:
+        """Hold units for an operation about to start; False if they aren't there"""
+        with self._lock:
+            self._roll_over()
+            if self.daily_limit - self._used - self._reserved < units:
+                return False
+            self._reserved += units
+            return True
+
+    def release(self, units: int):
+        """Give back a reservation (after the operation was recorded, or didn't happen)"""
+        with self._lock:
+            self._reserved = max(0, self._reserved - units)
+
+    def can_afford(self, cost: int) -> bool:
+        return self.remaining() >= cost
+
+    def can_upload(self) -> bool:
+        return self.can_afford(self.upload_cost)
+
+    def get_usage(self) -> Dict:
+        """Snapshot of today's usage (no database access)"""
+        with self._lock:
+            self._roll_over()
+            used, uploads, day, reserved = self._used, self._uploads, self._day, self._reserved
+        percentage = used / self.daily_limit * 100 if self.daily_limit else 0
+        return {
+            'used': used,
+            'remaining': max(0, self.daily_limit - used),
+            'limit': self.daily_limit,
+            'percentage': round(percentage, 1),
+            'uploads_today': uploads,
+            'reserved': reserved,
+            'safe_uploads': max(0, self.daily_limit - used - reserved) // self.upload_cost if self.upload_cost else 0,
+            'status': self.status_for(percentage),
+            'pacific_day': day,
+            'resets_at': next_pacific_midnight().isoformat()
+        }
+
+    @staticmethod
+    def status_for(percentage: float) -> str:
+        if percentage >= 95:
+            return 'critical'
+        elif percentage >= 80:
+            return 'warning'
+        elif percentage >= 60:
+            return 'moderate'
+        return 'healthy'
+
+    def history(self, days: int = 7) -> List[Dict]:
+        """Units and calls per Pacific day, newest first"""
+        conn = connect(self.db_path)
+        rows = conn.execute("""
+            SELECT pacific_day, SUM(cost), COUNT(*)
+            FROM quota_logs
+            WHERE pacific_day >= ?
+            GROUP BY pacific_day
+            ORDER BY pacific_day DESC
+        """, (pacific_day(time.time() - days * 86400),)).fetchall()
+        conn.close()
+        return [{'date': row[0], 'total_cost': row[1], 'operations': row[2]} for row in rows]
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def get_quota_ledger() -> QuotaLedger:
+    """Process-wide ledger (the in-memory counter must not be split across instances)"""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            from core.database import Database
+            Database()  # Make sure quota_logs has the pacific_day column
+            _ledger = QuotaLedger()
+        return _ledger
@@ -0,0 +1,93 @@
+"""
+Remote render dispatch (server side)
+Turns prepared assets into a 'render' job that remote render workers claim over HTTP
+(see web/worker_api.py and core/render_worker.py), then waits for the finished MP4
+"""
+import os
+import copy
+import time
+from typing import Dict, Optional, Tuple
+from core.config import Config
+from core.job_queue import JobQueue, JobContext
+
+
+def pack_render_job(assets: Dict, render_backend: Optional[str] = None) -> Dict:
+    """
+    Job payload for prepared assets: local file paths become file keys the worker downloads
+    Returns {'assets', 'files': {key: local path}, 'render_backend'}
+    """
+    assets = copy.deepcopy(assets)
+    files = {}
+    if assets.get('audio_path'):
+        files['audio'] = assets['audio_path']
+        assets['audio_path'] = 'audio'
+    if assets.get('music_path'):
+        files['music'] = assets['music_path']
+        assets['music_path'] = 'music'
+    for segment in assets.get('plan', []):
+        if segment.get('media_path'):
+            key = f"media_{segment['index']}"
+            files[key] = segment['media_path']
+            segment['media_path'] = key
+    return {'assets': assets, 'files': files, 'render_backend': render_backend}
+
+
+def unpack_render_job(payload: Dict, local_files: Dict[str, str]) -> Dict:
+    """Inverse of pack_render_job on the worker: file keys become the downloaded local paths"""
+    assets = copy.deepcopy(payload['assets'])
+    for field in ('audio_path', 'music_path'):
+        if assets.get(field):
+            assets[field] = local_files[assets[field]]
+    for segment in assets.get('plan', []):
+        if segment.get('media_path'):
+            segment['media_path'] = local_files[segment['media_path']]
+    return assets
+
+
+class RemoteRenderDispatcher:
+    """Queues render jobs for remote workers and blocks until one of them returns the video"""
+
+    def __init__(self, queue: Optional[JobQueue] = None, poll_interval: float = 2.0):
+        self.queue = queue or JobQueue()
+        self.poll_interval = poll_interval
+
+    def render(self, assets: Dict, render_backend: Optional[str] = None,
+               ctx: Optional[JobContext] = None) -> Optional[str]:
+        """
+        Render on a remote worker and return the local path of the pushed MP4
+        Returns None if no worker claimed the job within REMOTE_RENDER_CLAIM_TIMEOUT_SECONDS
+        (caller renders locally); raises RuntimeError if the job failed on every attempt
+        """
+        job_id = self.queue.enqueue('render', pack_render_job(assets, render_backend),
+                                    priority=ctx.job['priority'] if ctx else JobQueue.PRIORITY_SCHEDULED)
+        print(f"📡 Queued remote render job {job_id} for: {assets['topic']}")
+
+        claim_deadline = None
+        if Config.REMOTE_RENDER_CLAIM_TIMEOUT_SECONDS > 0:
+            claim_deadline = time.time() + Config.REMOTE_RENDER_CLAIM_TIMEOUT_SECONDS
+
+        last_stage = None
+        while True:
+            job = self.queue.get(job_id)
+            state = job['state']
+            if state == 'succeeded':
+                print(f"✅ Remote render job {job_id} done by {job['result'].get('worker')}")
+                return job['result']['video_path']
+            if state == 'failed':
+                raise RuntimeError(f"remote render job {job_id} failed: {job['error']}")
+
+            if state == 'queued' and job['attempts'] == 0 and claim_deadline and time.time() > claim_deadline:
+                if self.queue.cancel(job_id, "no render worker claimed the job"):
+                    print(f"⚠️ No render worker picked up job {job_id}, rendering locally")
+                    return None
+            if ctx and job['stage'] and job['stage'] != last_stage:
+                # Mirror the worker's progress onto the parent job
+                last_stage = job['stage']
+                ctx.set_stage(f"render:{last_stage}")
+            time.sleep(self.poll_interval)
+
+    @staticmethod
+    def result_path(video_id: str) -> Tuple[str, str]:
+        """Where a pushed video is stored: (final path, temporary .part path)"""
+        path = os.path.join(Config.OUTPUT_DIR, f"{video_id}.mp4")
+        return path, f"{path}.part"
@@ -0,0 +1,214 @@
+"""
+Remote render worker (client side of web/worker_api.py)
+Run on any machine with `python main.py worker --server http://host:8080`: pulls render jobs,
+downloads their inputs, renders locally, pushes the MP4 back and renews its lease while working
+"""
+import os
+import time
+import shutil
+import socket
+import hashlib
+import threading
+import traceback
+import requests
+from typing import Callable, Dict, Optional
+from core.config import Config
+from core.downloader import Downloader, DownloadError
+from core.render_dispatch import unpack_render_job
+
+
+class LeaseLost(Exception):
+    """The server reclaimed the job (heartbeat or push returned 409)"""
+
+
+class RenderWorker:
+    """Polls the server for render jobs and runs them one at a time"""
+
+    def __init__(self, server_url: str = None, token: str = None, name: str = None,
+                 render_func: Optional[Callable[[Dict, Optional[str]], str]] = None,
+                 poll_interval: float = None, work_dir: str = None):
+        self.server_url = (server_url or Config.RENDER_SERVER_URL).rstrip('/')
+        self.base_url = f"{self.server_url}/worker"
+        self.token = token or Config.WORKER_TOKEN
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.poll_interval = poll_interval or Config.WORKER_POLL_SECONDS
+        # Separate scratch space per worker so several processes can share one machine
+        self.work_dir = work_dir or os.path.join(Config.TEMP_DIR, f"worker_{self.name}")
+        self.render_func = render_func or self._render_with_video_creator
+        self.session = requests.Session()
+        self.session.headers['X-Worker-Token'] = self.token
+        self.downloader = Downloader(max_bytes=Config.DOWNLOAD_MAX_MB * 1024 * 1024)
+        self._video_creator = None
+        self._stop = threading.Event()
+
+    def run_forever(self):
+        """Claim and render jobs until stopped (Ctrl+C)"""
+        if not self.token:
+            raise ValueError("WORKER_TOKEN is not set (must match the server's)")
+        print(f"🛠️ Render worker {self.name} polling {self.server_url}")
+        backoff = self.poll_interval
+        while not self._stop.is_set():
+            try:
+                worked = self.run_once()
+                backoff = self.poll_interval
+                if not worked:
+                    self._stop.wait(self.poll_interval)
+            except requests.exceptions.RequestException as e:
+                # Server restarting or unreachable - back off, jobs stay leased/queued server-side
+                print(f"⚠️ Server unreachable ({e}), retrying in {backoff:.0f}s")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 60)
+
+    def stop(self):
+        self._stop.set()
+
+    def run_once(self) -> bool:
+        """Claim one job and process it; False if there was nothing to do"""
+        response = self.session.post(f"{self.base_url}/claim", json={'worker': self.name}, timeout=30)
+        if response.status_code == 204:
+            return False
+        response.raise_for_status()
+        job = response.json()
+        self.process(job)
+        return True
+
+    def process(self, job: Dict):
+        """Fetch inputs, render, push the result - with the lease renewed in the background"""
+        job_id = job['job_id']
+        job_dir = os.path.join(self.work_dir, f"job_{job_id}")
+        os.makedirs(job_dir, exist_ok=True)
+        print(f"🎬 Job {job_id}: {job['assets'].get('topic')} (attempt {job['attempt']})")
+
+        heartbeat = _Heartbeat(self, job_id, job.get('lease_seconds') or Config.JOB_LEASE_SECONDS)
+        heartbeat.start()
+        try:
+            heartbeat.stage = 'fetch_inputs'
+            local_files = self._fetch_inputs(job_id, job['files'], job_dir)
+            assets = unpack_render_job(job, local_files)
+
+            heartbeat.stage = 'render'
+            started = time.time()
+            video_path = self.render_func(assets, job.get('render_backend'))
+            print(f"✅ Job {job_id} rendered in {time.time() - started:.1f}s")
+            if heartbeat.lost:
+                raise LeaseLost("lease lost during render")
+
+            heartbeat.stage = 'push_result'
+            self._push_result(job_id, video_path)
+            print(f"📤 Job {job_id} delivered")
+            if os.path.exists(video_path):
+                os.remove(video_path)
+        except LeaseLost as e:
+            print(f"⚠️ Job {job_id}: {e} - dropping it (another worker will redo it)")
+        except Exception as e:
+            traceback.print_exc()
+            self._report_failure(job_id, f"{type(e).__name__}: {e}")
+        finally:
+            heartbeat.stop()
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+    def _fetch_inputs(self, job_id: int, files: Dict[str, Dict], job_dir: str) -> Dict[str, str]:
+        local_files = {}
+        for key, info in files.items():
+            dest = os.path.join(job_dir, key)
+            url = f"{self.base_url}/jobs/{job_id}/files/{key}?worker={self.name}"
+            try:
+                self.downloader.download(url, dest, headers={'X-Worker-Token': self.token})
+            except DownloadError as e:
+                if e.status_code == 409:
+                    raise LeaseLost("lease lost while fetching inputs")
+                raise
+            if info.get('bytes') is not None and os.path.getsize(dest) != info['bytes']:
+                raise DownloadError(f"input '{key}' is {os.path.getsize(dest)} bytes, expected {info['bytes']}")
+            local_files[key] = dest
+        return local_files
+
+    def _push_result(self, job_id: int, video_path: str):
+        """Stream the MP4 back; retried on connection errors, 409 means the lease is gone"""
+        sha256 = self._file_sha256(video_path)
+        video_id = os.path.splitext(os.path.basename(video_path))[0]
+        params = {'worker': self.name, 'video_id': video_id, 'sha256': sha256}
+        for attempt in range(Config.DOWNLOAD_RETRIES + 1):
+            try:
+                with open(video_path, 'rb') as f:
+                    response = self.session.put(f"{self.base_url}/jobs/{job_id}/result", params=params,
+                                                data=f, timeout=(10, 300),
+                                                headers={'Content-Type': 'video/mp4'})
+                if response.status_code == 409:
+                    raise LeaseLost("lease lost before the result was accepted")
+                response.raise_for_status()
+                return
+            except requests.exceptions.ConnectionError as e:
+                if attempt == Config.DOWNLOAD_RETRIES:
+                    raise
+                print(f"⚠️ Push interrupted ({e}), retrying ({attempt + 1}/{Config.DOWNLOAD_RETRIES})...")
+                time.sleep(2 ** attempt)
+
+    def _report_failure(self, job_id: int, error: str):
+        try:
+            self.session.post(f"{self.base_url}/jobs/{job_id}/fail",
+                              json={'worker': self.name, 'error': error[:2000]}, timeout=30)
+        except requests.exceptions.RequestException as e:
+            # The lease will expire and the job gets retried anyway
+            print(f"⚠️ Could not report failure of job {job_id}: {e}")
+
+    def heartbeat(self, job_id: int, stage: Optional[str]) -> bool:
+        response = self.session.post(f"{self.base_url}/jobs/{job_id}/heartbeat",
+                                     json={'worker': self.name, 'stage': stage}, timeout=30)
+        if response.status_code == 409:
+            return False
+        response.raise_for_status()
+        return True
+
+    def _render_with_video_creator(self, assets: Dict, render_backend: Optional[str]) -> str:
+        if self._video_creator is None:
+            from core.video_creator import VideoCreator
+            self._video_creator = VideoCreator()
+            # Own output/temp dirs so worker processes on one machine don't collide
+            self._video_creator.temp_dir = os.path.join(self.work_dir, 'temp')
+            self._video_creator.output_dir = os.path.join(self.work_dir, 'output')
+            os.makedirs(self._video_creator.temp_dir, exist_ok=True)
+            os.makedirs(self._video_creator.output_dir, exist_ok=True)
+        return self._video_creator.render_prepared(assets, render_backend=render_backend)
+
+    @staticmethod
+    def _file_sha256(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+
+class _Heartbeat:
+    """Background lease renewal for one job (every third of the lease)"""
+
+    def __init__(self, worker: RenderWorker, job_id: int, lease_seconds: float):
+        self.worker = worker
+        self.job_id = job_id
+        self.interval = max(1.0, lease_seconds / 3)
+        self.stage = None
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        last_stage = None
+        while not self._stop.is_set():
+            try:
+                if not self.worker.heartbeat(self.job_id, self.stage):
+                    self.lost = True
+                    return
+                last_stage = self.stage
+            except requests.exceptions.RequestException as e:
+                print(f"⚠️ Heartbeat for job {self.job_id} failed: {e}")
+            # Stage changes are reported right away, otherwise every interval
+            deadline = time.time() + self.interval
+            while not self._stop.is_set() and time.time() < deadline and self.stage == last_stage:
+                self._stop.wait(0.5)
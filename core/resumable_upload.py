@@ -0,0 +1,271 @@
+"""
+Chunked resumable uploads (YouTube Data API resumable upload protocol)
+The session URI and the byte offset the server has confirmed are stored in the
+upload_sessions table after every chunk, so a network drop, a token refresh or a process
+restart continues from the last confirmed byte instead of starting over. Transient
+failures are retried with exponential backoff and full jitter
+"""
+import os
+import json
+import time
+import random
+import threading
+import requests
+from typing import Callable, Dict, Optional
+from core.config import Config
+from core.database import Database
+from core.db_pool import connect
+from core.tracing import span, traced
+
+CHUNK_GRANULARITY = 256 * 1024  # Every chunk but the last must be a multiple of 256 KiB
+RETRIABLE_STATUS = (500, 502, 503, 504, 429)
+# Google keeps a session for about a week; don't bother resuming older ones
+SESSION_MAX_AGE_SECONDS = 6 * 24 * 3600
+
+_local = threading.local()
+
+
+def _thread_session() -> requests.Session:
+    """One keep-alive HTTP session per thread (requests.Session isn't safe to share across threads)"""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
+
+
+class UploadError(Exception):
+    """Upload failed for good (non-retriable response or out of retries)"""
+
+
+class SessionExpired(UploadError):
+    """The server no longer knows the session (404/410) - a new one has to be started"""
+
+
+class TransientUploadError(UploadError):
+    """5xx/429 - worth retrying after a backoff"""
+
+
+class AuthExpired(UploadError):
+    """401 - the access token needs refreshing"""
+
+
+class ResumableUpload:
+    """Uploads one file per call to upload(), resuming a stored session when there is one"""
+
+    def __init__(self, credentials=None, base_url: str = None, chunk_size: int = None,
+                 max_retries: int = None, db_path: str = None, auth=None):
+        # auth: a CredentialManager - its shared credentials are used and refreshed under its lock
+        self.credentials = credentials
+        self.auth = auth
+        self.base_url = (base_url or Config.YOUTUBE_UPLOAD_BASE_URL).rstrip('/')
+        chunk_size = chunk_size or int(Config.UPLOAD_CHUNK_MB * 1024 * 1024)
+        self.chunk_size = max(CHUNK_GRANULARITY, chunk_size // CHUNK_GRANULARITY * CHUNK_GRANULARITY)
+        self.max_retries = Config.UPLOAD_MAX_RETRIES if max_retries is None else max_retries
+        self.db_path = db_path or Config.DATABASE_PATH
+        Database(self.db_path)  # Make sure upload_sessions exists
+        self.http = _thread_session()
+
+    # --- session bookkeeping -------------------------------------------------
+
+    @staticmethod
+    def file_key(path: str) -> str:
+        """Same file (path, size, mtime) -> same key; a re-rendered file gets a new session"""
+        stat = os.stat(path)
+        return f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def find_session(self, path: str) -> Optional[Dict]:
+        conn = connect(self.db_path)
+        conn.row_factory = lambda cursor, row: {col[0]: row[i] for i, col in enumerate(cursor.description)}
+        row = conn.execute("SELECT * FROM upload_sessions WHERE file_key = ?", (self.file_key(path),)).fetchone()
+        conn.close()
+        if row and time.time() - row['created_at'] > SESSION_MAX_AGE_SECONDS:
+            self._forget(row['file_key'])
+            return None
+        return row
+
+    def _save(self, key: str, path: str, size: int, session_uri: str, offset: int):
+        now = time.time()
+        conn = connect(self.db_path)
+        conn.execute("""
+            INSERT INTO upload_sessions (file_key, file_path, file_size, session_uri, confirmed_offset, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(file_key) DO UPDATE SET
+                session_uri = excluded.session_uri, confirmed_offset = excluded.confirmed_offset,
+                updated_at = excluded.updated_at
+        """, (key, path, size, session_uri, offset, now, now))
+        conn.commit()
+        conn.close()
+
+    def _forget(self, key: str):
+        conn = connect(self.db_path)
+        conn.execute("DELETE FROM upload_sessions WHERE file_key = ?", (key,))
+        conn.commit()
+        conn.close()
+
+    # --- HTTP ----------------------------------------------------------------
+
+    def _headers(self, extra: Optional[Dict] = None) -> Dict:
+        headers = dict(extra or {})
+        if self.auth is not None:
+            headers['Authorization'] = f"Bearer {self.auth.get_credentials().token}"
+        elif self.credentials is not None:
+            if not self.credentials.valid:
+                self._refresh_credentials()
+            headers['Authorization'] = f"Bearer {self.credentials.token}"
+        return headers
+
+    def _refresh_credentials(self):
+        # invalid_grant here means the refresh token itself is dead - let the caller's recovery handle it
+        if self.auth is not None:
+            self.auth.refresh_now()
+            return
+        from google.auth.transport.requests import Request
+        self.credentials.refresh(Request())
+
+    @traced('upload.start_session')
+    def _start_session(self, path: str, size: int, metadata: Dict, part: str) -> str:
+        response = self.http.post(
+            f"{self.base_url}/videos",
+            params={'uploadType': 'resumable', 'part': part},
+            headers=self._headers({
+                'Content-Type': 'application/json; charset=UTF-8',
+                'X-Upload-Content-Length': str(size),
+                'X-Upload-Content-Type': 'video/mp4'
+            }),
+            data=json.dumps(metadata), timeout=60)
+        if response.status_code not in (200, 201) or not response.headers.get('Location'):
+            raise self._error(response, "starting upload session")
+        return response.headers['Location']
+
+    @staticmethod
+    def _confirmed_offset(response: requests.Response) -> int:
+        """Bytes the server has (from a 308's Range: bytes=0-N header; no header = nothing yet)"""
+        byte_range = response.headers.get('Range', '')
+        if byte_range.startswith('bytes=') and '-' in byte_range:
+            return int(byte_range.split('-', 1)[1]) + 1
+        return 0
+
+    def _query_offset(self, session_uri: str, size: int):
+        """Ask where the server is: returns the confirmed offset, or the finished video resource"""
+        response = self.http.put(session_uri, headers=self._headers({
+            'Content-Length': '0', 'Content-Range': f"bytes */{size}"
+        }), timeout=60)
+        if response.status_code in (200, 201):
+            return response.json()
+        if response.status_code == 308:
+            return self._confirmed_offset(response)
+        raise self._error(response, "querying upload status")
+
+    def _send_chunk(self, session_uri: str, path: str, offset: int, size: int) -> requests.Response:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            chunk = f.read(self.chunk_size)
+        end = offset + len(chunk) - 1
+        with span('upload.chunk', offset=offset, bytes=len(chunk)) as chunk_span:
+            response = self.http.put(session_uri, data=chunk, headers=self._headers({
+                'Content-Length': str(len(chunk)),
+                'Content-Range': f"bytes {offset}-{end}/{size}"
+            }), timeout=max(60, len(chunk) // (256 * 1024)))
+            chunk_span.set(status=response.status_code)
+        return response
+
+    @staticmethod
+    def _error(response: requests.Response, action: str) -> UploadError:
+        message = f"HTTP {response.status_code} {action}: {response.text[:500]}"
+        if response.status_code in (404, 410):
+            return SessionExpired(message)
+        if response.status_code == 401:
+            return AuthExpired(message)
+        if response.status_code in RETRIABLE_STATUS:
+            return TransientUploadError(message)
+        # Anything else (403 quotaExceeded, 400 bad metadata...) won't get better by retrying
+        return UploadError(message)
+
+    def _backoff(self, attempt: int):
+        """Full jitter: a random wait up to 2^attempt seconds, capped"""
+        delay = random.uniform(0, min(Config.UPLOAD_BACKOFF_MAX_SECONDS, 2 ** attempt))
+        print(f"⏳ Upload retry {attempt}/{self.max_retries} in {delay:.1f}s")
+        with span('upload.backoff', attempt=attempt):
+            time.sleep(delay)
+
+    # --- upload --------------------------------------------------------------
+
+    def upload(self, path: str, metadata: Dict, part: str = 'snippet,status',
+               progress: Optional[Callable[[float], None]] = None,
+               on_new_session: Optional[Callable[[], None]] = None) -> Dict:
+        """
+        Upload `path` and return the created video resource
+        on_new_session is called when a new session is started (that's when videos.insert is charged)
+        """
+        size = os.path.getsize(path)
+        key = self.file_key(path)
+        stored = self.find_session(path)
+        session_uri = stored['session_uri'] if stored else None
+        offset = None  # Unknown until the server confirms it
+        if session_uri:
+            print(f"♻️ Resuming upload of {os.path.basename(path)} from byte {stored['confirmed_offset']:,}/{size:,}")
+
+        attempt = 0
+        refreshed = False
+        while True:
+            try:
+                if not session_uri:
+                    session_uri = self._start_session(path, size, metadata, part)
+                    offset = 0
+                    self._save(key, path, size, session_uri, 0)
+                    if on_new_session:
+                        on_new_session()
+                if offset is None:
+                    status = self._query_offset(session_uri, size)
+                    if isinstance(status, dict):
+                        # Finished before we heard back (e.g. the process died on the last chunk)
+                        self._forget(key)
+                        if progress:
+                            progress(1.0)
+                        return status
+                    offset = status
+                    self._save(key, path, size, session_uri, offset)
+
+                response = self._send_chunk(session_uri, path, offset, size)
+                if response.status_code in (200, 201):
+                    self._forget(key)
+                    if progress:
+                        progress(1.0)
+                    return response.json()
+                if response.status_code == 308:
+                    offset = self._confirmed_offset(response)
+                    self._save(key, path, size, session_uri, offset)
+                    attempt = 0  # Progress was made - the retry budget is per stall
+                    refreshed = False
+                    if progress:
+                        progress(offset / size if size else 1.0)
+                    continue
+                raise self._error(response, "uploading chunk")
+            except AuthExpired:
+                if (self.credentials is None and self.auth is None) or refreshed:
+                    raise
+                # Access token expired mid-upload: refresh and carry on with the same session
+                self._refresh_credentials()
+                refreshed = True
+                offset = None
+                continue
+            except SessionExpired as e:
+                print(f"⚠️ {e} - starting a new session")
+                self._forget(key)
+                session_uri, offset = None, None
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                continue
+            except TransientUploadError as e:
+                print(f"⚠️ {e}")
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                print(f"⚠️ Upload connection problem: {e}")
+
+            # Transient failure: wait, then ask the server how far it got before sending more
+            attempt += 1
+            if attempt > self.max_retries:
+                raise UploadError(f"upload of {os.path.basename(path)} failed after {self.max_retries} retries "
+                                  f"(session kept at byte {offset or 0:,} - the next attempt resumes)")
+            self._backoff(attempt)
+            offset = None
@@ -4,29 +4,35 @@ Manages daily video creation tasks
 """
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 import time
-from typing import Callable
+from typing import Callable, List, Optional, Tuple
 from core.config import Config
 from core.notifications import NotificationManager
 
 class VideoScheduler:
-    def __init__(self, generation_callback: Callable):
+    def __init__(self, generation_callback: Callable, inventory_mode: bool = False):
         """
         Initialize scheduler
         
         Args:
             generation_callback: Function to call for each video generation
+            inventory_mode: Only pick the daily publish slots - videos are rendered ahead
+                            by core.inventory and uploaded with publishAt, nothing runs at the slot itself
         """
         self.scheduler = BackgroundScheduler()
         self.generation_callback = generation_callback
+        self.inventory_mode = inventory_mode
         self.videos_per_day = Config.VIDEOS_PER_DAY
         self.notifications = NotificationManager()
+        self.slot_times: List[Tuple[int, int]] = []  # (hour, minute) local time, picked in start()
     
     def start(self):
         """Start the scheduler with randomized posting times (prevents YouTube spam detection)"""
         import random
         
+        self.slot_times = []
+        
         # Optimal hour ranges for engagement - randomized within these windows
         # This prevents YouTube from detecting patterns
         optimal_hour_ranges = [
@@ -45,6 +51,11 @@ class VideoScheduler:
             
             # Randomize minute (0-59) for more variation - prevents pattern detection
             minute = random.randint(0, 59)
+            self.slot_times.append((hour, minute))
+            
+            if self.inventory_mode:
+                print(f"Publish slot #{i+1} at {hour:02d}:{minute:02d} daily (filled from the render-ahead inventory)")
+                continue
             
             # Schedule daily at this randomized time
             self.scheduler.add_job(
@@ -74,6 +85,21 @@ class VideoScheduler:
         self.scheduler.start()
         print("Scheduler started - videos will be generated automatically at randomized times")
     
+    def upcoming_slots(self, count: int, after: Optional[datetime] = None) -> List[datetime]:
+        """The next `count` publish slots after `after` (default now), as timezone-aware local times"""
+        if not self.slot_times:
+            return []
+        after = after or datetime.now().astimezone()
+        slots = []
+        day = after.date()
+        while len(slots) < count:
+            for hour, minute in sorted(self.slot_times):
+                slot = datetime(day.year, day.month, day.day, hour, minute).astimezone()
+                if slot > after:
+                    slots.append(slot)
+            day += timedelta(days=1)
+        return slots[:count]
+    
     def _generate_video(self):
         """Wrapper to call generation callback"""
         try:
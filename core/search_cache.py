@@ -0,0 +1,150 @@
+"""
+Persistent search-result cache for stock media providers (Pexels, Pixabay)
+Responses are stored in SQLite keyed by (provider, endpoint, query, orientation, per_page),
+so repeat keywords skip the network and survive restarts
+"""
+import json
+import time
+import sqlite3
+import threading
+from typing import Dict, Optional
+from core.config import Config
+from core.db_pool import connect
+
+PURGE_INTERVAL_SECONDS = 3600  # Expired rows are deleted from put() at most this often
+
+
+class SearchCache:
+    """SQLite-backed TTL cache of raw provider search responses"""
+
+    def __init__(self, db_path: str = None, ttl_seconds: float = None):
+        self.db_path = db_path or Config.DATABASE_PATH
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else Config.SEARCH_CACHE_TTL_HOURS * 3600
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'writes': 0, 'purged': 0}
+        self._last_purge = 0.0  # First write of the process purges
+        self._init_table()
+
+    def _connect(self):
+        return connect(self.db_path)
+
+    def _init_table(self):
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS search_cache (
+                provider TEXT NOT NULL,
+                endpoint TEXT NOT NULL,
+                query TEXT NOT NULL,
+                orientation TEXT NOT NULL,
+                per_page INTEGER NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                hits INTEGER DEFAULT 0,
+                PRIMARY KEY (provider, endpoint, query, orientation, per_page)
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def _key(provider: str, endpoint: str, query: str, orientation: Optional[str], per_page: int):
+        # "City Skyline " and "city skyline" are the same search for both providers
+        return (provider, endpoint, ' '.join(query.lower().split()), orientation or '', int(per_page))
+
+    def get(self, provider: str, endpoint: str, query: str, orientation: Optional[str],
+            per_page: int) -> Optional[Dict]:
+        """Return the cached response, or None on a miss or an expired entry"""
+        key = self._key(provider, endpoint, query, orientation, per_page)
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT response, created_at FROM search_cache
+            WHERE provider = ? AND endpoint = ? AND query = ? AND orientation = ? AND per_page = ?
+        ''', key)
+        row = cursor.fetchone()
+
+        if row and time.time() - row[1] <= self.ttl_seconds:
+            cursor.execute('''
+                UPDATE search_cache SET hits = hits + 1
+                WHERE provider = ? AND endpoint = ? AND query = ? AND orientation = ? AND per_page = ?
+            ''', key)
+            conn.commit()
+            conn.close()
+            with self._lock:
+                self.stats['hits'] += 1
+            return json.loads(row[0])
+
+        conn.close()
+        with self._lock:
+            self.stats['misses'] += 1
+            if row:
+                self.stats['expired'] += 1
+        return None
+
+    def put(self, provider: str, endpoint: str, query: str, orientation: Optional[str],
+            per_page: int, response: Dict):
+        """Store a successful provider response"""
+        key = self._key(provider, endpoint, query, orientation, per_page)
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT OR REPLACE INTO search_cache
+            (provider, endpoint, query, orientation, per_page, response, created_at, hits)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+        ''', key + (json.dumps(response), time.time()))
+        conn.commit()
+        conn.close()
+        with self._lock:
+            self.stats['writes'] += 1
+            purge_due = time.time() - self._last_purge >= PURGE_INTERVAL_SECONDS
+            if purge_due:
+                self._last_purge = time.time()
+        if purge_due:
+            self.purge_expired()
+
+    def purge_expired(self) -> int:
+        """Delete entries older than the TTL, returns how many were removed"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM search_cache WHERE created_at < ?', (time.time() - self.ttl_seconds,))
+        removed = cursor.rowcount
+        conn.commit()
+        conn.close()
+        with self._lock:
+            self.stats['purged'] += removed
+        return removed
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counters for this process plus what's persisted on disk"""
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups * 100, 1) if lookups else 0.0
+
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM search_cache')
+        stats['entries'], stats['lifetime_hits'] = cursor.fetchone()
+        conn.close()
+        stats['ttl_hours'] = round(self.ttl_seconds / 3600, 2)
+        return stats
+
+
+_search_cache = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> Optional[SearchCache]:
+    """Shared cache instance for all providers (None when disabled or unavailable)"""
+    global _search_cache
+    if not Config.SEARCH_CACHE_ENABLED:
+        return None
+    with _search_cache_lock:
+        if _search_cache is None:
+            try:
+                _search_cache = SearchCache()
+            except sqlite3.Error as e:
+                print(f"⚠️ Search cache unavailable, searching live: {e}")
+                return None
+        return _search_cache
@@ -0,0 +1,180 @@
+"""
+Segment-parallel rendering - encodes each script segment in its own process,
+then joins them with the ffmpeg concat demuxer (stream copy) and muxes in the audio mix
+"""
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from core.ffmpeg_renderer import FFmpegRenderer, UnsupportedRenderFeature
+
+
+def resize_to_fill(clip, video_size: Tuple[int, int]):
+    """Scale a MoviePy clip to fill video_size, then center-crop the overflow"""
+    w, h = clip.size
+    target_w, target_h = video_size
+    if (w, h) == (target_w, target_h):
+        return clip  # Already normalized (mezzanine cache) - no per-frame resize
+
+    # Use larger scale to fill frame
+    scale = max(target_w / w, target_h / h)
+    new_w = int(w * scale)
+    new_h = int(h * scale)
+    clip = clip.resize((new_w, new_h))
+
+    # Crop to exact size if needed
+    if new_w > target_w or new_h > target_h:
+        clip = clip.crop(
+            x_center=new_w // 2,
+            y_center=new_h // 2,
+            width=target_w,
+            height=target_h
+        )
+
+    return clip
+
+
+def _encode_segment(job: Dict) -> str:
+    """Process-pool worker: encode one planned segment to its own MP4"""
+    if job['backend'] == 'ffmpeg':
+        renderer = FFmpegRenderer(job['video_size'], threads=job['threads'])
+        return renderer.render_segment(job['segment'], job['output_path'], pad=job['pad'])
+    return _encode_segment_moviepy(job)
+
+
+def _encode_segment_moviepy(job: Dict) -> str:
+    """Build and encode one segment with MoviePy inside the worker process"""
+    from moviepy.editor import VideoFileClip, ImageClip, ColorClip, CompositeVideoClip
+
+    segment = job['segment']
+    video_size = job['video_size']
+    duration = segment['duration']
+    total = duration + job['pad']
+    media_path = segment.get('media_path')
+
+    if media_path and media_path.lower().endswith(('.mp4', '.mov', '.avi', '.webm', '.mkv')):
+        base_clip = VideoFileClip(media_path, audio=False)
+    elif media_path:
+        base_clip = ImageClip(media_path)
+    else:
+        base_clip = ColorClip(size=video_size, color=segment.get('background_color', (0, 0, 0)), duration=duration)
+
+    base_clip = resize_to_fill(base_clip, video_size)
+    if base_clip.duration is None:
+        base_clip = base_clip.set_duration(duration)
+    elif base_clip.duration > duration:
+        base_clip = base_clip.subclip(0, duration)
+    elif base_clip.duration < duration:
+        base_clip = base_clip.loop(duration=duration)
+
+    layers = [base_clip.set_duration(duration)]
+    caption_path = segment.get('caption_path')
+    if caption_path and os.path.exists(caption_path):
+        caption = (ImageClip(caption_path)
+                   .set_position(('center', segment.get('caption_y', video_size[1] * 0.78)))
+                   .set_duration(duration)
+                   .crossfadein(0.25)
+                   .crossfadeout(0.25)
+                   .set_start(0.05))
+        layers.append(caption)
+
+    clip = CompositeVideoClip(layers, size=video_size).set_duration(duration)
+    if job['pad'] > 0.01:
+        # Freeze the last frame so visuals cover the full voiceover
+        from moviepy.editor import concatenate_videoclips
+        freeze = ImageClip(clip.get_frame(max(duration - 0.05, 0))).set_duration(job['pad'])
+        clip = concatenate_videoclips([clip, freeze])
+
+    ffmpeg_params = ['-crf', '18', '-pix_fmt', 'yuv420p'] + FFmpegRenderer.SEGMENT_GOP_ARGS
+    if job['threads']:
+        ffmpeg_params += ['-threads', str(job['threads'])]
+    clip.set_duration(total).write_videofile(
+        job['output_path'],
+        fps=FFmpegRenderer.FPS,
+        codec='libx264',
+        audio=False,
+        preset='medium',
+        bitrate='16000k',
+        ffmpeg_params=ffmpeg_params,
+        verbose=False,
+        logger=None
+    )
+    clip.close()
+    return job['output_path']
+
+
+class SegmentParallelRenderer:
+    """Encodes plan segments concurrently and assembles them without re-encoding"""
+
+    def __init__(self, video_size: Tuple[int, int] = (1080, 1920), workers: Optional[int] = None,
+                 temp_dir: str = "./temp"):
+        self.video_size = video_size
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.temp_dir = temp_dir
+        self.ffmpeg_renderer = FFmpegRenderer(video_size)
+
+    def render(self, plan: List[Dict], audio_path: str, output_path: str, final_duration: float,
+               music_path: Optional[str] = None, backend: str = 'ffmpeg',
+               progress: Optional[Callable[[float], None]] = None) -> str:
+        """Encode every segment in a process pool, then concat + mux audio"""
+        if not self.ffmpeg_renderer.ffmpeg:
+            raise UnsupportedRenderFeature("ffmpeg binary not found (needed for concat)")
+        if not plan:
+            raise UnsupportedRenderFeature("empty segment plan")
+        if backend == 'ffmpeg':
+            self.ffmpeg_renderer.check_supported(plan)
+
+        jobs = self._build_jobs(plan, final_duration, backend)
+        workers = min(self.workers, len(jobs))
+        print(f"⚡ Encoding {len(jobs)} segments in parallel ({workers} workers, {backend} segment encoder)")
+
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                segment_paths = []
+                # map() yields in plan order as segments finish - good enough for a progress bar
+                for path in pool.map(_encode_segment, jobs):
+                    segment_paths.append(path)
+                    if progress:
+                        progress(len(segment_paths) / (len(jobs) + 1))
+
+            print(f"🔗 Concatenating {len(segment_paths)} segments (stream copy) and muxing audio")
+            self.ffmpeg_renderer.concat_segments(segment_paths, audio_path, output_path, final_duration, music_path)
+            if progress:
+                progress(1.0)
+        finally:
+            for job in jobs:
+                if os.path.exists(job['output_path']):
+                    os.remove(job['output_path'])
+
+        return output_path
+
+    def _build_jobs(self, plan: List[Dict], final_duration: float, backend: str) -> List[Dict]:
+        """Snap segment boundaries to whole frames so concatenated timestamps don't drift"""
+        fps = FFmpegRenderer.FPS
+        threads = max(1, (os.cpu_count() or 1) // min(self.workers, len(plan)))
+        run_id = random.randint(10000, 99999)
+
+        jobs = []
+        elapsed = 0.0
+        boundary_frame = 0
+        for i, segment in enumerate(plan):
+            elapsed += segment['duration']
+            next_frame = max(boundary_frame + 1, round(elapsed * fps))
+            framed = dict(segment, duration=(next_frame - boundary_frame) / fps)
+            boundary_frame = next_frame
+
+            # Last segment absorbs any gap to the voiceover length (freeze frame, like MoviePy path)
+            pad = 0.0
+            if i == len(plan) - 1:
+                pad = max(0.0, round(final_duration * fps) / fps - boundary_frame / fps)
+
+            jobs.append({
+                'segment': framed,
+                'pad': pad,
+                'backend': backend,
+                'video_size': self.video_size,
+                'threads': threads,
+                'output_path': os.path.join(self.temp_dir, f"segment_{run_id}_{i:02d}.mp4")
+            })
+
+        return jobs
@@ -0,0 +1,116 @@
+"""
+Stage graph - runs the independent, network-bound stages of a job concurrently
+Each stage declares the stages it depends on; a stage starts as soon as its inputs are ready.
+Timings are recorded per stage so the critical path (and the saving vs running in order) can be logged
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Optional
+from core import tracing
+
+
+class StageFailed(Exception):
+    """Raised when a required stage fails (dependents are skipped)"""
+
+
+class StageGraph:
+    """Small dependency graph of stages executed on a thread pool"""
+
+    def __init__(self, name: str = "job", max_workers: Optional[int] = None):
+        self.name = name
+        self.max_workers = max_workers
+        self.stages: Dict[str, Dict] = {}
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, Exception] = {}
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self.wall_seconds = 0.0
+
+    def add(self, name: str, func: Callable, deps: Optional[List[str]] = None, optional: bool = False):
+        """
+        Register a stage. func receives the results of `deps` as positional arguments, in order
+        optional=True: a failure is logged and the stage's result becomes None instead of aborting
+        """
+        self.stages[name] = {'func': func, 'deps': list(deps or []), 'optional': optional}
+        return self
+
+    def run(self) -> Dict[str, Any]:
+        """Run every stage, respecting dependencies; returns {stage name: result}"""
+        for name, stage in self.stages.items():
+            unknown = [d for d in stage['deps'] if d not in self.stages]
+            if unknown:
+                raise ValueError(f"stage '{name}' depends on unknown stage(s): {unknown}")
+
+        self._start = time.time()
+        pending = dict(self.stages)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers or max(1, len(self.stages))) as pool:
+            while pending or running:
+                for name in list(pending):
+                    deps = pending[name]['deps']
+                    if any(d in self.errors for d in deps):
+                        self.errors[name] = StageFailed("skipped, dependency failed")
+                        del pending[name]
+                    elif all(d in self.results for d in deps):
+                        args = [self.results[d] for d in deps]
+                        running[pool.submit(tracing.bind(self._run_stage), name, args)] = name
+                        del pending[name]
+
+                if not running:
+                    break  # Only possible with a dependency cycle
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        self.results[name] = future.result()
+                    except Exception as e:
+                        if self.stages[name]['optional']:
+                            print(f"⚠️ Optional stage '{name}' failed: {e}")
+                            self.results[name] = None
+                        else:
+                            self.errors[name] = e
+
+        self.wall_seconds = time.time() - self._start
+        if pending:
+            raise ValueError(f"dependency cycle between stages: {sorted(pending)}")
+        for name, error in self.errors.items():
+            if not isinstance(error, StageFailed):
+                raise StageFailed(f"stage '{name}' failed: {error}") from error
+        return self.results
+
+    def _run_stage(self, name: str, args: List[Any]) -> Any:
+        started = time.time()
+        try:
+            with tracing.span(f"stage.{name}", graph=self.name):
+                return self.stages[name]['func'](*args)
+        finally:
+            ended = time.time()
+            self.timings[name] = {
+                'start': started - self._start,
+                'end': ended - self._start,
+                'seconds': ended - started
+            }
+
+    def critical_path(self) -> List[str]:
+        """Chain of stages that determined the total wall-clock time"""
+        if not self.timings:
+            return []
+        name = max(self.timings, key=lambda n: self.timings[n]['end'])
+        path = [name]
+        while True:
+            deps = [d for d in self.stages[name]['deps'] if d in self.timings]
+            if not deps:
+                break
+            name = max(deps, key=lambda n: self.timings[n]['end'])
+            path.append(name)
+        return list(reversed(path))
+
+    def log_summary(self):
+        """Print per-stage timings, the critical path and the saving vs a sequential run"""
+        sequential = sum(t['seconds'] for t in self.timings.values())
+        stages = ', '.join(f"{n} {t['seconds']:.1f}s"
+                           for n, t in sorted(self.timings.items(), key=lambda item: item[1]['start']))
+        print(f"⏱️ {self.name} stages: {stages}")
+        print(f"⏱️ Critical path: {' → '.join(self.critical_path())} "
+              f"({self.wall_seconds:.1f}s wall vs {sequential:.1f}s sequential, "
+              f"saved {max(0.0, sequential - self.wall_seconds):.1f}s)")
@@ -0,0 +1,253 @@
+"""
+YouTube statistics ingester
+Refreshes views/likes for uploaded videos with videos.list(part=statistics), 50 IDs per call
+(1 quota unit each). Every batch remembers the ETag of its last response and sends it as
+If-None-Match, so a batch whose numbers haven't moved comes back as an empty 304. Videos are
+refreshed on an age-based schedule (hourly while they're new, weekly once they're old) and
+every sample lands in a compact hourly series that is rolled up into one row per day
+"""
+import time
+import hashlib
+import requests
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from core.config import Config
+from core.database import Database, mark_data_changed
+from core.db_pool import connect
+from core.quota_ledger import get_quota_ledger
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'  # Same as SQLite CURRENT_TIMESTAMP (UTC)
+
+
+def youtube_id_from_url(url: str) -> Optional[str]:
+    """Video ID from a youtube.com/shorts/<id> or watch?v=<id> URL"""
+    if not url:
+        return None
+    if 'v=' in url:
+        return url.split('v=', 1)[1].split('&', 1)[0] or None
+    return url.rstrip('/').rsplit('/', 1)[-1].split('?', 1)[0] or None
+
+
+class StatsIngester:
+    """Pulls statistics for due videos in ETag-conditional batches and records a time series"""
+
+    BATCH_SIZE = 50  # videos.list maximum per call
+    # (max age since upload, refresh interval) - the first matching tier applies
+    TIERS = [
+        (timedelta(days=2), timedelta(hours=1)),
+        (timedelta(days=14), timedelta(hours=6)),
+        (timedelta(days=90), timedelta(days=1)),
+        (None, timedelta(days=7)),
+    ]
+
+    def __init__(self, credentials=None, base_url: str = None, db_path: str = None, auth=None):
+        # auth: a CredentialManager - its shared credentials are used and refreshed under its lock
+        self.db_path = db_path or Config.DATABASE_PATH
+        Database(self.db_path)  # Make sure the stats tables exist
+        self.credentials = credentials
+        self.auth = auth
+        self.base_url = (base_url or Config.YOUTUBE_API_BASE_URL).rstrip('/')
+        self.ledger = get_quota_ledger()
+        self.session = requests.Session()
+        self._last_rollup = 0
+
+    def tier_interval(self, created_at: str, now: datetime) -> timedelta:
+        try:
+            age = now - datetime.strptime(created_at[:19], TIMESTAMP_FORMAT)
+        except (TypeError, ValueError):
+            age = timedelta(0)
+        for max_age, interval in self.TIERS:
+            if max_age is None or age < max_age:
+                return interval
+        return self.TIERS[-1][1]
+
+    def _headers(self, etag: Optional[str]) -> Dict:
+        headers = {'Accept': 'application/json'}
+        if etag:
+            headers['If-None-Match'] = etag
+        if self.auth is not None:
+            headers['Authorization'] = f"Bearer {self.auth.get_credentials().token}"
+        elif self.credentials is not None:
+            if not self.credentials.valid:
+                from google.auth.transport.requests import Request
+                self.credentials.refresh(Request())
+            headers['Authorization'] = f"Bearer {self.credentials.token}"
+        return headers
+
+    def _due_batches(self, now: datetime, max_calls: int) -> List[List[Dict]]:
+        """Due videos grouped by refresh tier and sorted by ID, so batches (and their ETags) stay stable"""
+        conn = connect(self.db_path)
+        rows = conn.execute("""
+            SELECT video_id, youtube_url, created_at FROM videos
+            WHERE status = 'uploaded' AND youtube_url IS NOT NULL AND stats_next_check_at <= ?
+            ORDER BY stats_next_check_at
+            LIMIT ?
+        """, (now.strftime(TIMESTAMP_FORMAT), max_calls * self.BATCH_SIZE)).fetchall()
+        conn.close()
+
+        tiers: Dict[timedelta, List[Dict]] = {}
+        for video_id, url, created_at in rows:
+            youtube_id = youtube_id_from_url(url)
+            if youtube_id:
+                interval = self.tier_interval(created_at, now)
+                tiers.setdefault(interval, []).append(
+                    {'video_id': video_id, 'youtube_id': youtube_id, 'interval': interval})
+
+        batches = []
+        for interval in sorted(tiers):
+            videos = sorted(tiers[interval], key=lambda v: v['youtube_id'])
+            batches.extend(videos[i:i + self.BATCH_SIZE] for i in range(0, len(videos), self.BATCH_SIZE))
+        return batches[:max_calls]
+
+    def _fetch(self, ids: List[str], etag: Optional[str]) -> requests.Response:
+        def get():
+            return self.session.get(f"{self.base_url}/videos", params={
+                'part': 'statistics', 'id': ','.join(ids), 'maxResults': self.BATCH_SIZE
+            }, headers=self._headers(etag), timeout=30)
+
+        response = get()
+        if response.status_code == 401 and self.auth is not None:
+            # Token went stale before the background refresh got to it - refresh and ask once more
+            self.auth.refresh_now()
+            response = get()
+        return response
+
+    def _apply(self, batch: List[Dict], batch_key: str, response: Optional[requests.Response],
+               now: datetime) -> Dict:
+        """Store a batch's statistics (response None = 304, numbers unchanged) and reschedule it"""
+        stamp = now.strftime(TIMESTAMP_FORMAT)
+        hour = now.strftime('%Y-%m-%d %H:00')
+        items = {}
+        if response is not None:
+            body = response.json()
+            items = {item['id']: item.get('statistics', {}) for item in body.get('items', [])}
+
+        conn = connect(self.db_path)
+        updated = missing = 0
+        try:
+            for video in batch:
+                next_check = (now + video['interval']).strftime(TIMESTAMP_FORMAT)
+                stats = items.get(video['youtube_id'])
+                if response is not None and stats is None:
+                    # Deleted or made private - check again on the slowest tier
+                    missing += 1
+                    next_check = (now + self.TIERS[-1][1]).strftime(TIMESTAMP_FORMAT)
+                if stats is None:
+                    conn.execute("""
+                        UPDATE videos SET stats_checked_at = ?, stats_next_check_at = ? WHERE video_id = ?
+                    """, (stamp, next_check, video['video_id']))
+                    continue
+
+                views = int(stats.get('viewCount', 0))
+                likes = int(stats.get('likeCount', 0))
+                comments = int(stats.get('commentCount', 0))
+                conn.execute("""
+                    UPDATE videos SET views = ?, likes = ?, stats_checked_at = ?, stats_next_check_at = ?
+                    WHERE video_id = ?
+                """, (views, likes, stamp, next_check, video['video_id']))
+                conn.execute("""
+                    INSERT INTO video_stats_hourly (video_id, hour, views, likes, comments)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(video_id, hour) DO UPDATE SET
+                        views = excluded.views, likes = excluded.likes, comments = excluded.comments
+                """, (video['video_id'], hour, views, likes, comments))
+                updated += 1
+
+            if response is not None and response.headers.get('ETag'):
+                conn.execute("""
+                    INSERT INTO stats_batches (batch_key, etag, checked_at) VALUES (?, ?, ?)
+                    ON CONFLICT(batch_key) DO UPDATE SET etag = excluded.etag, checked_at = excluded.checked_at
+                """, (batch_key, response.headers['ETag'], stamp))
+            else:
+                conn.execute("UPDATE stats_batches SET checked_at = ? WHERE batch_key = ?", (stamp, batch_key))
+            conn.commit()
+        finally:
+            conn.close()
+        if updated:
+            mark_data_changed()
+        return {'updated': updated, 'missing': missing}
+
+    def run_once(self, max_calls: int = None) -> Dict:
+        """One refresh cycle; returns counters for logging"""
+        max_calls = max_calls or Config.STATS_MAX_CALLS_PER_RUN
+        now = datetime.utcnow().replace(microsecond=0)
+        summary = {'calls': 0, 'not_modified': 0, 'updated': 0, 'missing': 0, 'stopped': None}
+
+        for batch in self._due_batches(now, max_calls):
+            # Stats are nice to have - never spend the units the next upload needs
+            if not self.ledger.can_afford(self.ledger.upload_cost + self.ledger.cost_of('videos.list')):
+                summary['stopped'] = 'quota'
+                break
+
+            ids = [video['youtube_id'] for video in batch]
+            batch_key = hashlib.sha1(','.join(ids).encode()).hexdigest()
+            conn = connect(self.db_path)
+            row = conn.execute("SELECT etag FROM stats_batches WHERE batch_key = ?", (batch_key,)).fetchone()
+            conn.close()
+
+            try:
+                response = self._fetch(ids, row[0] if row else None)
+            except Exception as e:
+                print(f"⚠️ Stats refresh failed: {e}")
+                summary['stopped'] = 'error'
+                break
+            self.ledger.record('videos.list')
+            summary['calls'] += 1
+
+            if response.status_code == 304:
+                summary['not_modified'] += 1
+                result = self._apply(batch, batch_key, None, now)
+            elif response.status_code == 200:
+                result = self._apply(batch, batch_key, response, now)
+            else:
+                print(f"⚠️ videos.list returned HTTP {response.status_code}: {response.text[:200]}")
+                summary['stopped'] = f"http {response.status_code}"
+                break
+            summary['updated'] += result['updated']
+            summary['missing'] += result['missing']
+
+        if time.time() - self._last_rollup >= 3600:
+            self.rollup()
+            self._last_rollup = time.time()
+
+        if summary['calls']:
+            print(f"📈 Stats refresh: {summary['updated']} videos updated, {summary['not_modified']}/"
+                  f"{summary['calls']} batches unchanged (304)")
+        return summary
+
+    def rollup(self, retention_days: int = None) -> int:
+        """Fold hourly samples older than the retention window into daily rows; returns hourly rows removed"""
+        retention_days = Config.STATS_HOURLY_RETENTION_DAYS if retention_days is None else retention_days
+        # Whole days only, so a day is never split between the two tables
+        cutoff = (datetime.utcnow() - timedelta(days=retention_days)).strftime('%Y-%m-%d 00:00')
+        conn = connect(self.db_path)
+        try:
+            conn.execute("""
+                INSERT INTO video_stats_daily (video_id, day, views, likes, comments)
+                SELECT video_id, substr(hour, 1, 10), MAX(views), MAX(likes), MAX(comments)
+                FROM video_stats_hourly WHERE hour < ?
+                GROUP BY video_id, substr(hour, 1, 10)
+                ON CONFLICT(video_id, day) DO UPDATE SET
+                    views = MAX(views, excluded.views),
+                    likes = MAX(likes, excluded.likes),
+                    comments = MAX(comments, excluded.comments)
+            """, (cutoff,))
+            removed = conn.execute("DELETE FROM video_stats_hourly WHERE hour < ?", (cutoff,)).rowcount
+            # ETags of batches that no longer come up (videos moved to another tier)
+            conn.execute("DELETE FROM stats_batches WHERE checked_at < datetime('now', '-30 days')")
+            conn.commit()
+            return removed
+        finally:
+            conn.close()
+
+    def history(self, video_id: str) -> List[Dict]:
+        """Daily points followed by the hourly points of the retention window, oldest first"""
+        conn = connect(self.db_path)
+        rows = conn.execute("""
+            SELECT day, views, likes, comments FROM video_stats_daily WHERE video_id = ?
+            UNION ALL
+            SELECT hour, views, likes, comments FROM video_stats_hourly WHERE video_id = ?
+            ORDER BY 1
+        """, (video_id, video_id)).fetchall()
+        conn.close()
+        return [{'time': row[0], 'views': row[1], 'likes': row[2], 'comments': row[3]} for row in rows]
@@ -10,6 +10,7 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from groq import Groq
 from core.config import Config
+from core.tracing import span, traced
 
 class TopicDiscoveryAgent:
     def __init__(self):
@@ -50,6 +51,7 @@ class TopicDiscoveryAgent:
             print("⚠️ Reddit credentials not configured")
             self.reddit = None
     
+    @traced('topics.discover')
     def discover_trending_topics(self) -> List[Dict]:
         """
         Discover trending topics from multiple sources
@@ -58,19 +60,27 @@ class TopicDiscoveryAgent:
         all_topics = []
         
         # 1. Reddit Trending
-        reddit_topics = self._get_reddit_trending()
+        with span('topics.reddit') as s:
+            reddit_topics = self._get_reddit_trending()
+            s.set(topics=len(reddit_topics))
         all_topics.extend(reddit_topics)
         
         # 2. Google Trends (using API)
-        trends_topics = self._get_google_trends()
+        with span('topics.google_trends') as s:
+            trends_topics = self._get_google_trends()
+            s.set(topics=len(trends_topics))
         all_topics.extend(trends_topics)
         
         # 3. YouTube Trending
-        youtube_topics = self._get_youtube_trending()
+        with span('topics.youtube') as s:
+            youtube_topics = self._get_youtube_trending()
+            s.set(topics=len(youtube_topics))
         all_topics.extend(youtube_topics)
         
         # 4. AI-generated viral topics
-        ai_topics = self._get_ai_generated_topics()
+        with span('topics.ai') as s:
+            ai_topics = self._get_ai_generated_topics()
+            s.set(topics=len(ai_topics))
         all_topics.extend(ai_topics)
         
         # Score and rank all topics
@@ -176,15 +186,16 @@ class TopicDiscoveryAgent:
             
             Format as JSON array: [{"topic": "...", "reason": "why it's viral", "score": 1-10}]"""
             
-            response = self.groq_client.chat.completions.create(
-                model="llama-3.1-8b-instant",  # Updated: using current Groq model
-                messages=[
-                    {"role": "system", "content": "You are an expert at identifying viral content trends."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.9,
-                max_tokens=1000
-            )
+            with span('llm.groq', model="llama-3.1-8b-instant", purpose='topics'):
+                response = self.groq_client.chat.completions.create(
+                    model="llama-3.1-8b-instant",  # Updated: using current Groq model
+                    messages=[
+                        {"role": "system", "content": "You are an expert at identifying viral content trends."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.9,
+                    max_tokens=1000
+                )
             
             content = response.choices[0].message.content
             
@@ -0,0 +1,235 @@
+"""
+Span tracing
+Stages wrap themselves in `with span("tts.edge", voice=...)` (or decorate with @traced); each
+span records start/end, thread and attributes on the trace bound to the current context.
+A job worker binds one trace per job, the pipeline one per video and the upload scheduler one
+per upload; finished traces are stored in the traces table and can be exported as Chrome
+trace JSON (load it in https://ui.perfetto.dev or chrome://tracing).
+With no trace bound (TRACING_ENABLED=false, or code running outside a job) span() is a single
+context-variable lookup returning a shared no-op, so instrumented code costs next to nothing.
+Worker threads don't inherit the context - submit work through bind() to keep it in the trace
+"""
+import time
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+from core.config import Config
+
+MAX_SPANS = 5000  # Per trace - a runaway loop can't eat memory
+
+_trace: contextvars.ContextVar = contextvars.ContextVar('trace', default=None)
+
+
+class Trace:
+    """Spans of one job/video/upload"""
+
+    def __init__(self, name: str, job_id: Optional[int] = None, video_id: Optional[str] = None, **attrs):
+        self.name = name
+        self.job_id = job_id
+        self.video_id = video_id
+        self.attrs = attrs
+        self.started_at = time.time()
+        self.finished_at = None
+        self.spans: List[Dict] = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def add(self, record: Dict):
+        with self._lock:
+            if len(self.spans) < MAX_SPANS:
+                self.spans.append(record)
+            else:
+                self.dropped += 1
+
+    def finish(self, error: Optional[BaseException] = None):
+        self.finished_at = self.finished_at or time.time()
+        if error is not None:
+            self.attrs['error'] = f"{type(error).__name__}: {error}"[:500]
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            spans = list(self.spans)
+        finished = self.finished_at or time.time()
+        return {
+            'name': self.name,
+            'job_id': self.job_id,
+            'video_id': self.video_id,
+            'started_at': self.started_at,
+            'duration_seconds': round(finished - self.started_at, 6),
+            'attrs': dict(self.attrs, dropped_spans=self.dropped) if self.dropped else dict(self.attrs),
+            'spans': spans
+        }
+
+    def summary(self) -> Dict[str, float]:
+        """Total seconds per span name"""
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for record in self.spans:
+                totals[record['name']] = totals.get(record['name'], 0.0) + record['end'] - record['start']
+        return {name: round(seconds, 3) for name, seconds in totals.items()}
+
+
+class _Span:
+    __slots__ = ('trace', 'name', 'attrs', 'start')
+
+    def __init__(self, trace: Trace, name: str, attrs: Dict):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        """Attach attributes learned while the span runs (result sizes, cache hits ...)"""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.time()
+        thread = threading.current_thread()
+        if exc is not None:
+            self.attrs['error'] = f"{exc_type.__name__}: {exc}"[:300]
+        self.trace.add({'name': self.name, 'start': self.start, 'end': end,
+                        'tid': thread.ident, 'thread': thread.name, 'attrs': self.attrs})
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str, **attrs):
+    """Context manager timing a stage in the current trace (a no-op when none is bound)"""
+    trace = _trace.get()
+    if trace is None:
+        return _NOOP
+    return _Span(trace, name, attrs)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator: run the function inside span(name) (default: its qualified name)"""
+    def decorate(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = _trace.get()
+            if trace is None:
+                return func(*args, **kwargs)
+            with _Span(trace, span_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def current_trace() -> Optional[Trace]:
+    return _trace.get()
+
+
+def start_trace(name: str, job_id: Optional[int] = None, video_id: Optional[str] = None,
+                **attrs) -> Optional[Trace]:
+    """A new trace, or None when tracing is disabled (activate(None) and span() then do nothing)"""
+    if not Config.TRACING_ENABLED:
+        return None
+    return Trace(name, job_id=job_id, video_id=video_id, **attrs)
+
+
+@contextmanager
+def activate(trace: Optional[Trace]):
+    """Bind `trace` to the current thread/context for the duration of the block"""
+    if trace is None:
+        yield None
+        return
+    token = _trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _trace.reset(token)
+
+
+def bind(func: Callable) -> Callable:
+    """func wrapped to run in the caller's trace - for work handed to thread pools"""
+    trace = _trace.get()
+    if trace is None:
+        return func
+
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        token = _trace.set(trace)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _trace.reset(token)
+    return run
+
+
+def save(trace: Optional[Trace], error: Optional[BaseException] = None) -> Optional[int]:
+    """Finish and store a trace (never raises - tracing must not fail a job)"""
+    if trace is None:
+        return None
+    trace.finish(error)
+    try:
+        from core.database import Database
+        return Database().save_trace(trace.to_dict())
+    except Exception as e:
+        print(f"⚠️ Could not store trace '{trace.name}': {e}")
+        return None
+
+
+def job_traces(db, job_id: int) -> List[Dict]:
+    """Stored traces of a job plus the upload traces of the video it produced, oldest first"""
+    traces = db.get_traces(job_id=job_id)
+    seen = {trace['id'] for trace in traces}
+    for video_id in {trace['video_id'] for trace in traces if trace['video_id']}:
+        traces += [trace for trace in db.get_traces(video_id=video_id) if trace['id'] not in seen]
+    return sorted(traces, key=lambda trace: trace['started_at'])
+
+
+def chrome_trace(traces: List[Dict]) -> Dict[str, Any]:
+    """
+    Stored traces (Database.get_traces / Trace.to_dict) as Chrome trace event JSON
+    Each trace is shown as its own process, with one track per thread that ran its spans
+    """
+    events = []
+    for pid, trace in enumerate(traces, 1):
+        label = trace['name'] + (f" job {trace['job_id']}" if trace.get('job_id') else '') \
+            + (f" ({trace['video_id']})" if trace.get('video_id') else '')
+        events.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': label}})
+        events.append({'name': trace['name'], 'cat': 'trace', 'ph': 'X', 'pid': pid, 'tid': 0,
+                       'ts': int(trace['started_at'] * 1e6),
+                       'dur': max(1, int(trace['duration_seconds'] * 1e6)),
+                       'args': trace.get('attrs') or {}})
+        events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': 'total'}})
+        threads = {}
+        for record in trace['spans']:
+            tid = record['tid']
+            if tid not in threads:
+                threads[tid] = record['thread']
+                events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                               'args': {'name': record['thread']}})
+            events.append({
+                'name': record['name'],
+                'cat': record['name'].split('.', 1)[0],
+                'ph': 'X',
+                'pid': pid,
+                'tid': tid,
+                'ts': int(record['start'] * 1e6),
+                'dur': max(1, int((record['end'] - record['start']) * 1e6)),
+                'args': record.get('attrs') or {}
+            })
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
@@ -0,0 +1,247 @@
+"""
+Upload scheduler
+Rendering only queues finished videos (status 'created' in the videos table); this scheduler
+uploads them on its own thread. Each cycle packs as many queued videos as today's quota can
+pay for, oldest first and UPLOAD_SPACING_SECONDS apart. When the quota runs out the queue
+simply waits - nothing is marked failed - and the scheduler wakes right after the Pacific
+midnight reset to carry on. Rendering never waits on any of this
+"""
+import os
+import time
+import threading
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from core import tracing
+from core.config import Config
+from core.database import Database
+from core.events import publish
+from core.quota_ledger import get_quota_ledger, next_pacific_midnight
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'  # SQLite CURRENT_TIMESTAMP (UTC)
+PUBLISH_AT_FORMAT = '%Y-%m-%dT%H:%M:%SZ'  # videos.publish_at / YouTube status.publishAt (UTC)
+RESET_GRACE_SECONDS = 60  # Don't race the reset itself
+MIN_PUBLISH_DELAY = timedelta(minutes=5)  # publishAt this close (or past) isn't worth scheduling
+
+
+class UploadScheduler:
+    """Drains the ready-to-publish queue into the available quota"""
+
+    def __init__(self, uploader, on_uploaded: Optional[Callable[[Dict, Dict], None]] = None,
+                 db: Database = None):
+        """
+        uploader: a YouTubeUploader
+        on_uploaded(video, upload_result): called after a video is published (notifications)
+        """
+        self.uploader = uploader
+        self.on_uploaded = on_uploaded
+        self.db = db or Database()
+        self.ledger = get_quota_ledger()
+        self.interval = Config.UPLOAD_SCHEDULER_INTERVAL_MINUTES * 60
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._drain_lock = threading.Lock()  # One drain at a time (loop, /retry-upload, batch mode)
+        self._thread = None
+        self._last_upload = 0.0
+        self.blocked_until: Optional[datetime] = None
+        self.last_cycle: Dict = {}
+
+    # --- queue ---------------------------------------------------------------
+
+    def submit(self, video_id: str):
+        """A rendered video was saved as 'created' (with its tags) - upload it as soon as quota and spacing allow"""
+        publish('upload_queue', video_id=video_id, pending=self.pending_count())
+        self._wake.set()
+
+    def pending(self) -> List[Dict]:
+        """Queued videos that are due (failed ones back off: 15 min, 30 min, 1 h ... after each failure)"""
+        now = datetime.utcnow()
+        due = []
+        for video in self.db.get_upload_queue(max_retries=Config.UPLOAD_MAX_ATTEMPTS,
+                                              limit=max(50, Config.VIDEOS_PER_DAY * 4)):
+            if video['retry_count'] and video['last_retry_at']:
+                try:
+                    last = datetime.strptime(str(video['last_retry_at'])[:19], TIMESTAMP_FORMAT)
+                    backoff = timedelta(minutes=Config.UPLOAD_RETRY_BACKOFF_MINUTES * 2 ** (video['retry_count'] - 1))
+                    if now < last + backoff:
+                        continue
+                except ValueError:
+                    pass
+            due.append(video)
+        return due
+
+    def pending_count(self) -> int:
+        try:
+            return len(self.db.get_upload_queue(max_retries=Config.UPLOAD_MAX_ATTEMPTS, limit=1000))
+        except Exception:
+            return 0
+
+    # --- draining ------------------------------------------------------------
+
+    def drain(self, max_uploads: Optional[int] = None) -> Dict:
+        """
+        Upload as many due videos as the quota allows (blocking; spacing is honoured between uploads)
+        Returns counters: uploaded, failed, remaining, stopped ('quota', 'empty', 'limit', 'stopping')
+        """
+        with self._drain_lock:
+            summary = {'uploaded': 0, 'failed': 0, 'results': [], 'stopped': 'empty'}
+            queue = self.pending()
+            for video in queue:
+                if max_uploads is not None and summary['uploaded'] + summary['failed'] >= max_uploads:
+                    summary['stopped'] = 'limit'
+                    break
+                if self._stop.is_set():
+                    summary['stopped'] = 'stopping'
+                    break
+                if not self._affordable(video):
+                    summary['stopped'] = 'quota'
+                    break
+                self._wait_for_spacing()
+                result = self._upload(video)
+                if result == 'quota':
+                    summary['stopped'] = 'quota'
+                    break
+                if result:
+                    summary['uploaded'] += 1
+                    summary['results'].append(result)
+                else:
+                    summary['failed'] += 1
+
+            if summary['stopped'] == 'quota':
+                self.blocked_until = next_pacific_midnight() + timedelta(seconds=RESET_GRACE_SECONDS)
+                print(f"⏸️ Upload quota used up - {len(queue) - summary['uploaded'] - summary['failed']} "
+                      f"video(s) wait for the reset at {self.blocked_until.strftime('%Y-%m-%d %H:%M %Z')}")
+            else:
+                self.blocked_until = None
+            summary['remaining'] = self.pending_count()
+            self.last_cycle = {key: value for key, value in summary.items() if key != 'results'}
+            self.last_cycle['finished_at'] = time.time()
+            if summary['uploaded'] or summary['failed']:
+                publish('upload_queue', pending=summary['remaining'], uploaded=summary['uploaded'],
+                        failed=summary['failed'], stopped=summary['stopped'])
+            return summary
+
+    def _affordable(self, video: Dict) -> bool:
+        # An interrupted upload of this file already paid for its videos.insert
+        if self.ledger.can_upload():
+            return True
+        from core.resumable_upload import ResumableUpload
+        try:
+            return ResumableUpload().find_session(video['video_file_path']) is not None
+        except OSError:
+            return False
+
+    def _wait_for_spacing(self):
+        wait = self._last_upload + Config.UPLOAD_SPACING_SECONDS - time.time()
+        if wait > 0 and self._last_upload:
+            self._stop.wait(wait)
+
+    def _upload(self, video: Dict):
+        """Upload one queued video: the upload result, None if it failed, or 'quota' if refused for quota"""
+        video_id = video['video_id']
+        video_path = video['video_file_path']
+        if not os.path.exists(video_path):
+            print(f"⚠️ Queued video {video_id} has no file at {video_path}")
+            self.db.mark_upload_failed(video_id, f"Video file not found: {video_path}")
+            return None
+
+        print(f"📤 Uploading queued video: {video['title']}")
+        last = {'percent': -1}
+
+        def report(fraction: float):
+            percent = max(0, min(100, int(fraction * 100)))
+            if percent != last['percent']:
+                last['percent'] = percent
+                publish('progress', job_id=None, stage='upload', percent=percent, title=video['title'])
+
+        publish_at = self._publish_at(video)
+        self._last_upload = time.time()
+        # Its own trace, linked to the render job's by video_id (GET /jobs/{id}/trace shows both)
+        trace = tracing.start_trace('upload', video_id=video_id, scheduled=bool(publish_at))
+        try:
+            with tracing.activate(trace), tracing.span('upload.queued', title=video['title'][:80]):
+                result = self.uploader.upload_video(
+                    video_path=video_path,
+                    title=video['title'],
+                    description=video['description'],
+                    tags=video.get('tags') or [],
+                    progress=report,
+                    publish_at=publish_at
+                )
+        except Exception as e:
+            tracing.save(trace, e)
+            error_msg = str(e)
+            if 'quota exceeded' in error_msg.lower() or 'quotaexceeded' in error_msg.lower():
+                # Not the video's fault - it keeps its place and retry count
+                return 'quota'
+            print(f"❌ Upload of {video_id} failed: {error_msg[:200]}")
+            self.db.mark_upload_failed(video_id, error_msg)
+            return None
+        tracing.save(trace)
+
+        if not result:
+            self.db.mark_upload_failed(video_id, "Upload returned no result")
+            return None
+        result['local_video_id'] = video_id  # result['video_id'] is YouTube's
+        self.db.update_video_upload(video_id=video_id, youtube_url=result['url'])
+        self.db.update_daily_stats(date.today().isoformat(), videos_uploaded=1)
+        if publish_at:
+            print(f"✅ Uploaded {video['title']}: {result['url']} (goes public at {publish_at})")
+        else:
+            print(f"✅ Uploaded {video['title']}: {result['url']}")
+        if self.on_uploaded:
+            try:
+                self.on_uploaded(video, result)
+            except Exception as e:
+                print(f"⚠️ Post-upload callback failed: {e}")
+        return result
+
+    @staticmethod
+    def _publish_at(video: Dict) -> Optional[str]:
+        """The video's inventory slot if it is still ahead of us - a slot we missed publishes right away"""
+        if not video.get('publish_at'):
+            return None
+        try:
+            slot = datetime.strptime(video['publish_at'], PUBLISH_AT_FORMAT)
+        except ValueError:
+            return None
+        if slot <= datetime.utcnow() + MIN_PUBLISH_DELAY:
+            print(f"⚠️ {video['video_id']} missed its {video['publish_at']} slot - publishing now")
+            return None
+        return video['publish_at']
+
+    # --- background loop -----------------------------------------------------
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="upload-scheduler", daemon=True)
+        self._thread.start()
+        print(f"📅 Upload scheduler started (every {Config.UPLOAD_SCHEDULER_INTERVAL_MINUTES} min, "
+              f"{Config.UPLOAD_SPACING_SECONDS}s between uploads)")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _next_wait(self) -> float:
+        if self.blocked_until is not None:
+            # Sleep through to the quota reset instead of polling a quota we know is gone
+            return max(1.0, (self.blocked_until - datetime.now(self.blocked_until.tzinfo)).total_seconds())
+        return self.interval
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.drain()
+            except Exception as e:
+                print(f"⚠️ Upload scheduler cycle failed: {e}")
+            # submit() wakes us early; with the quota gone that drain just finds nothing affordable
+            self._wake.wait(self._next_wait())
+            self._wake.clear()
+
+    def get_status(self) -> Dict:
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'pending': self.pending_count(),
+            'blocked_until': self.blocked_until.isoformat() if self.blocked_until else None,
+            'last_cycle': self.last_cycle
+        }
@@ -0,0 +1,94 @@
+"""
+Upload concurrency limit
+Uploads can start from several threads at once (the pipeline, the job worker, the dashboard's
+/generate and /retry-upload). At most UPLOAD_MAX_CONCURRENT run together, and each one holds
+a quota ledger reservation for its videos.insert from the moment it gets a slot, so parallel
+uploads can never be let through on the same remaining units
+"""
+import threading
+from contextlib import contextmanager
+from typing import Dict
+from core.config import Config
+from core.quota_ledger import get_quota_ledger
+from core.tracing import span
+
+
+class UploadSlot:
+    """One running upload; charge() records its videos.insert and turns the reservation into usage"""
+
+    def __init__(self, ledger, reserved: int):
+        self.ledger = ledger
+        self.reserved = reserved
+        self._lock = threading.Lock()
+
+    def charge(self):
+        with self._lock:
+            # Record before releasing, so the units are never free in between
+            try:
+                self.ledger.record('videos.insert')
+            except Exception as e:
+                print(f"Error logging quota usage: {e}")
+            if self.reserved:
+                self.ledger.release(self.reserved)
+                self.reserved = 0
+
+    def release(self):
+        with self._lock:
+            if self.reserved:
+                self.ledger.release(self.reserved)
+                self.reserved = 0
+
+
+class UploadSlots:
+    """Semaphore of upload slots tied to the quota ledger"""
+
+    def __init__(self, limit: int = None, ledger=None):
+        self.limit = max(1, limit or Config.UPLOAD_MAX_CONCURRENT)
+        self.ledger = ledger or get_quota_ledger()
+        self._semaphore = threading.BoundedSemaphore(self.limit)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+
+    @contextmanager
+    def slot(self, reserve: bool = True):
+        """
+        Wait for a free slot, then reserve one upload's worth of quota (reserve=False for an
+        upload resuming a session it already paid for). Raises if the quota isn't there
+        """
+        with span('upload.wait_slot', reserve=reserve):
+            self._semaphore.acquire()
+        upload = None
+        try:
+            if reserve and not self.ledger.reserve(self.ledger.upload_cost):
+                usage = self.ledger.get_usage()
+                raise Exception(f"Quota exceeded: {usage['percentage']:.1f}% used "
+                                f"({usage['reserved']} units held by uploads in progress). Cannot upload safely.")
+            upload = UploadSlot(self.ledger, self.ledger.upload_cost if reserve else 0)
+            with self._lock:
+                self.in_flight += 1
+                self.peak = max(self.peak, self.in_flight)
+            yield upload
+        finally:
+            if upload is not None:
+                upload.release()
+                with self._lock:
+                    self.in_flight -= 1
+            self._semaphore.release()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {'limit': self.limit, 'in_flight': self.in_flight, 'peak': self.peak}
+
+
+_slots = None
+_slots_lock = threading.Lock()
+
+
+def get_upload_slots() -> UploadSlots:
+    """Process-wide slots (the limit only means something if every uploader shares it)"""
+    global _slots
+    with _slots_lock:
+        if _slots is None:
+            _slots = UploadSlots()
+        return _slots
@@ -4,7 +4,10 @@ Uses FFmpeg/MoviePy for video processing with real b-roll from Pexels/Pixabay
 """
 import os
 import random
-import requests
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from moviepy.editor import (
     VideoFileClip, ImageClip, TextClip, CompositeVideoClip,
     AudioFileClip, concatenate_videoclips, ColorClip
@@ -13,7 +16,7 @@ from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageEnhance
 import numpy as np
 from gtts import gTTS
 import tempfile
-from typing import Dict, Optional, List
+from typing import Callable, Dict, Optional, List
 from core.config import Config
 from core.media_providers import MediaFetcher
 from core.content_analyzer import ContentAnalyzer
@@ -21,8 +24,48 @@ from core.dynamic_music import DynamicMusicSelector
 from core.dynamic_voice import DynamicVoiceSelector
 from core.font_manager import FontManager
 from core.video_rhythm_sync import VideoRhythmSync
+from core.segment_renderer import resize_to_fill
+from core.caption_renderer import get_caption_renderer
+from core.media_cache import get_mezzanine_cache
+from core.downloader import get_downloader, DownloadError, MEDIA_TYPES
+from core.mp4_range import MP4RangeFetcher, MP4LayoutError
+from core.stage_graph import StageGraph
+from core import tracing
+from core.tracing import span, traced
+
+
+# Downloads of the same URL (two videos picking the same stock clip) share one resumable partial
+# file, so they take turns; striped so the lock set stays fixed however many URLs we see
+_DOWNLOAD_LOCKS = [threading.Lock() for _ in range(64)]
+
+
+def _moviepy_progress_logger(progress: Callable[[float], None]):
+    """proglog logger forwarding MoviePy's frame-writing bar ('t') to progress(0..1)"""
+    from proglog import ProgressBarLogger
+
+    class ProgressLogger(ProgressBarLogger):
+        def bars_callback(self, bar, attr, value, old_value=None):
+            total = self.bars.get(bar, {}).get('total')
+            if bar == 't' and attr == 'index' and total:
+                progress(min(1.0, value / total))
+
+    return ProgressLogger()
+
 
 class VideoCreator:
+    # Fallback background colors (rotated per segment)
+    BACKGROUND_COLORS = [
+        (41, 128, 185),    # Blue
+        (142, 68, 173),    # Purple
+        (231, 76, 60),     # Red
+        (243, 156, 18),    # Orange
+        (46, 204, 113),    # Green
+        (52, 152, 219),    # Light Blue
+    ]
+    
+    # PRIORITIZE Google Fonts - modern YouTube Shorts style (rotated per segment)
+    CAPTION_FONT_FAMILIES = ["Bebas Neue", "Montserrat", "Poppins", "Roboto", "Inter"]
+    
     def __init__(self):
         self.temp_dir = Config.TEMP_DIR
         self.output_dir = Config.OUTPUT_DIR
@@ -31,6 +74,7 @@ class VideoCreator:
         self.music_selector = DynamicMusicSelector()
         self.voice_selector = DynamicVoiceSelector()
         self.font_manager = FontManager()
+        self.caption_renderer = get_caption_renderer()
         os.makedirs(self.temp_dir, exist_ok=True)
         os.makedirs(self.output_dir, exist_ok=True)
         
@@ -43,28 +87,62 @@ class VideoCreator:
             "C:/Windows/Fonts/verdana.ttf",  # Clean and readable
             "C:/Windows/Fonts/calibrib.ttf",  # Calibri Bold
         ]
+        
+        # Normalized b-roll cache (pre-sized frames, no per-frame resize at render time)
+        self.mezzanine_cache = get_mezzanine_cache()  # Shared: one index and disk budget per process
     
-    def create_video(self, content: Dict, topic: str) -> str:
+    def create_video(self, content: Dict, topic: str, render_backend: Optional[str] = None,
+                     parallel_segments: Optional[bool] = None,
+                     progress: Optional[Callable[[float], None]] = None) -> str:
         """
         Create a high-quality YouTube Shorts video with real b-roll
         
+        render_backend: "moviepy" or "ffmpeg" (defaults to Config.RENDER_BACKEND)
+        parallel_segments: encode segments in a process pool (defaults to Config.RENDER_PARALLEL_SEGMENTS)
+        progress: called with the exported fraction (0..1) while encoding
         Returns: Path to created video file
         """
+        assets = self.prepare_assets(content, topic)
+        return self.render_prepared(assets, render_backend=render_backend, parallel_segments=parallel_segments,
+                                    progress=progress)
+    
+    @traced('video.prepare_assets')
+    def prepare_assets(self, content: Dict, topic: str) -> Dict:
+        """
+        Network-bound half of create_video: analysis, TTS, b-roll, music, fonts and the segment plan
+        Only touches per-call state, so the next video can be prepared while another one renders
+        """
         script = content.get('script', '')
         print(f"🎬 Creating high-quality video for: {topic}")
         
-        # 0. Analyze content to determine mood, style, music, voice
-        content_analysis = self.content_analyzer.analyze_content(topic, script)
-        # Store mood for font styling
-        self.current_content_mood = content_analysis.get('mood', 'informative')
-        print(f"📊 Content analysis: {self.current_content_mood} mood, {content_analysis.get('music_style')} music, {content_analysis.get('voice_style')} voice")
-        
-        # 1. Generate high-quality audio (TTS) with dynamic voice
-        audio_path = self._generate_dynamic_audio(script, content_analysis)
-        
-        # 2. Calculate duration - ensure minimum 30 seconds
+        # Segment count only depends on the script, so b-roll work can start right away
+        segments = self._split_script_into_segments(script)
+        num_segments = len(segments) if segments else 1
+        # Upper bound on any segment's length (rhythm sync adds at most +0.3s) - b-roll is
+        # downloaded before TTS tells us the exact duration
+        max_segment_seconds = Config.VIDEO_DURATION_SECONDS / num_segments + 0.3
+        
+        # Network-bound stages run concurrently; only the final timing needs the TTS output
+        #   analysis → tts, music, fonts    broll_search → broll_download
+        graph = StageGraph(f"create_video({topic[:30]})")
+        graph.add('analysis', lambda: self._analyze_content(topic, script))
+        graph.add('tts', lambda analysis: self._generate_dynamic_audio(script, analysis), deps=['analysis'])
+        graph.add('broll_search', lambda: self._fetch_broll_media(topic, Config.VIDEO_DURATION_SECONDS, num_segments))
+        graph.add('broll_download', lambda broll: self._prefetch_segment_media(broll, num_segments, max_segment_seconds),
+                  deps=['broll_search'])
+        graph.add('music', lambda analysis: self._select_music(analysis, topic), deps=['analysis'], optional=True)
+        graph.add('fonts', lambda: self._prefetch_fonts(num_segments), optional=True)
+        results = graph.run()
+        graph.log_summary()
+        
+        audio_path = results['tts']
+        broll_media = results['broll_search']
+        music_path = results['music']
+        
+        # Calculate duration - ensure minimum 30 seconds
         audio_clip = AudioFileClip(audio_path)
         audio_duration = audio_clip.duration
+        audio_clip.close()
         print(f"🎵 Audio duration: {audio_duration:.1f}s")
         
         # DON'T loop audio - script should be proper length!
@@ -79,53 +157,95 @@ class VideoCreator:
         
         print(f"📏 Final video duration: {duration:.1f}s")
         
-        # 3. Split script to know how many segments we need
-        segments = self._split_script_into_segments(script)
-        num_segments = len(segments) if segments else 1
+        # Plan segments (durations with rhythm sync, b-roll already downloaded)
+        plan = self._plan_segments(script, duration, broll_media, results['broll_download'])
         
-        # 4. Fetch real b-roll images/videos (enough for all segments, no duplicates)
-        broll_media = self._fetch_broll_media(topic, duration, num_segments)
+        return {
+            'topic': topic,
+            'script': script,
+            'analysis': results['analysis'],
+            'audio_path': audio_path,
+            'audio_duration': audio_duration,
+            'duration': duration,
+            'music_path': music_path,
+            'plan': plan
+        }
+    
+    @traced('video.render')
+    def render_prepared(self, assets: Dict, render_backend: Optional[str] = None,
+                        parallel_segments: Optional[bool] = None,
+                        progress: Optional[Callable[[float], None]] = None) -> str:
+        """CPU-bound half of create_video: render and export assets from prepare_assets"""
+        topic = assets['topic']
+        plan = assets['plan']
+        audio_path = assets['audio_path']
+        music_path = assets['music_path']
+        duration = assets['duration']
+        backend = (render_backend or Config.RENDER_BACKEND or 'moviepy').lower()
+        if parallel_segments is None:
+            parallel_segments = Config.RENDER_PARALLEL_SEGMENTS
+        print(f"🎬 Rendering: {topic} (render backend: {backend}{', segment-parallel' if parallel_segments else ''})")
         
-        # 5. Create high-quality visual sequence with rhythm sync
-        video_clips = self._create_high_quality_visuals(script, duration, topic, broll_media)
+        # Store mood for font styling
+        self.current_content_mood = assets['analysis'].get('mood', 'informative')
         
-        # 6. Add background music (dynamic based on content)
-        music_path = self.music_selector.get_music_for_content(content_analysis, duration, topic)
-        if music_path:
-            print(f"🎵 Music selected: {music_path}")
-        else:
-            print("⚠️ No music available - video will have voiceover only")
+        video_id = f"short_{topic.replace(' ', '_')[:20]}_{random.randint(1000, 9999)}"
+        output_path = os.path.join(self.output_dir, f"{video_id}.mp4")
         
-        # 7. Sync music to visuals (viral characteristic: soundtrack syncs to motion)
+        # Audio is the master track (same rule as _combine_audio_video)
+        final_duration = max(assets['audio_duration'], duration)
+        
+        # Segment-parallel mode: one process per segment, stream-copy concat
+        if parallel_segments:
+            try:
+                rendered = self._render_segments_parallel(plan, audio_path, output_path, final_duration, music_path, backend,
+                                                          progress=progress)
+                print(f"✅ High-quality video created: {rendered}")
+                return rendered
+            except Exception as parallel_error:
+                print(f"⚠️ Segment-parallel render failed ({parallel_error}), using single-pass export")
+        
+        # Native ffmpeg backend: one filter-graph pass, frames never touch Python
+        if backend == 'ffmpeg':
+            try:
+                rendered = self._render_with_ffmpeg(plan, audio_path, output_path, final_duration, music_path,
+                                                    progress=progress)
+                print(f"✅ High-quality video created: {rendered}")
+                return rendered
+            except Exception as ffmpeg_error:
+                print(f"⚠️ FFmpeg backend unavailable for this job ({ffmpeg_error}), falling back to MoviePy")
+        
+        # 7. Create high-quality visual sequence with rhythm sync
+        video_clips = self._create_visuals_from_plan(plan, topic)
+        
+        # 8. Sync music to visuals (viral characteristic: soundtrack syncs to motion)
         if music_path and video_clips:
             rhythm_sync = VideoRhythmSync()
             rhythm_sync.sync_music_to_visuals(None, video_clips)
         
-        # 8. Combine audio, visuals, and music
+        # 9. Combine audio, visuals, and music
         final_video = self._combine_audio_video(video_clips, audio_path, duration, music_path)
         
-        # 9. Export high-quality video
-        video_id = f"short_{topic.replace(' ', '_')[:20]}_{random.randint(1000, 9999)}"
-        output_path = os.path.join(self.output_dir, f"{video_id}.mp4")
-        
+        # 10. Export high-quality video
         print(f"🎥 Exporting to: {output_path}")
         try:
             # Add verbose logging and timeout protection
             print(f"📊 Export settings: fps=30, bitrate=20000k, duration={final_video.duration:.1f}s")
-            final_video.write_videofile(
-                output_path,
-                fps=30,
-                codec='libx264',
-                audio_codec='aac',
-                temp_audiofile='temp-audio.m4a',
-                remove_temp=True,
-                preset='medium',  # Changed from 'slow' to 'medium' for faster export
-                bitrate='16000k',  # Reduced from 20000k for faster export (still high quality)
-                audio_bitrate='320k',  # HIGH audio quality
-                ffmpeg_params=['-crf', '18', '-pix_fmt', 'yuv420p', '-vf', 'scale=1080:1920:flags=lanczos', '-threads', '2'],  # Reduced CRF, added threads limit
-                verbose=True,  # Show progress
-                logger=None  # Suppress MoviePy logger spam
-            )
+            with span('export', backend='moviepy', duration=round(final_video.duration, 1)):
+                final_video.write_videofile(
+                    output_path,
+                    fps=30,
+                    codec='libx264',
+                    audio_codec='aac',
+                    temp_audiofile=os.path.join(self.temp_dir, f"{video_id}-audio.m4a"),  # Unique per render (concurrent workers)
+                    remove_temp=True,
+                    preset='medium',  # Changed from 'slow' to 'medium' for faster export
+                    bitrate='16000k',  # Reduced from 20000k for faster export (still high quality)
+                    audio_bitrate='320k',  # HIGH audio quality
+                    ffmpeg_params=['-crf', '18', '-pix_fmt', 'yuv420p', '-vf', 'scale=1080:1920:flags=lanczos', '-threads', '2'],  # Reduced CRF, added threads limit
+                    verbose=True,  # Show progress
+                    logger=_moviepy_progress_logger(progress) if progress else None  # No MoviePy logger spam
+                )
             print(f"✅ Video exported successfully: {output_path}")
         except Exception as export_error:
             print(f"❌ Export error: {export_error}")
@@ -134,28 +254,68 @@ class VideoCreator:
             # Try fallback with lower quality
             print("🔄 Trying fallback export with lower quality...")
             try:
-                final_video.write_videofile(
-                    output_path,
-                    fps=30,
-                    codec='libx264',
-                    audio_codec='aac',
-                    preset='fast',  # Fast preset
-                    bitrate='8000k',  # Lower bitrate
-                    audio_bitrate='192k',
-                    verbose=False
-                )
+                with span('export', backend='moviepy', fallback=True):
+                    final_video.write_videofile(
+                        output_path,
+                        fps=30,
+                        codec='libx264',
+                        audio_codec='aac',
+                        preset='fast',  # Fast preset
+                        bitrate='8000k',  # Lower bitrate
+                        audio_bitrate='192k',
+                        verbose=False
+                    )
                 print(f"✅ Fallback export succeeded: {output_path}")
             except Exception as fallback_error:
                 print(f"❌ Fallback export also failed: {fallback_error}")
                 raise
         
         # Cleanup
-        audio_clip.close()
         final_video.close()
         
         print(f"✅ High-quality video created: {output_path}")
         return output_path
     
+    def _render_with_ffmpeg(self, plan: List[Dict], audio_path: str, output_path: str,
+                            final_duration: float, music_path: Optional[str] = None,
+                            progress: Optional[Callable[[float], None]] = None) -> str:
+        """Render the segment plan with the native ffmpeg filter-graph backend"""
+        from core.ffmpeg_renderer import FFmpegRenderer
+        
+        self._rasterize_captions(plan)
+        renderer = FFmpegRenderer(self.video_size)
+        print(f"🎥 Exporting with ffmpeg filter graph: {output_path} ({len(plan)} segments, {final_duration:.1f}s)")
+        with span('export', backend='ffmpeg', segments=len(plan), duration=round(final_duration, 1)):
+            renderer.render(plan, audio_path, output_path, final_duration, music_path, progress=progress)
+        print(f"✅ Video exported successfully: {output_path}")
+        return output_path
+    
+    def _render_segments_parallel(self, plan: List[Dict], audio_path: str, output_path: str,
+                                  final_duration: float, music_path: Optional[str] = None,
+                                  backend: str = 'moviepy',
+                                  progress: Optional[Callable[[float], None]] = None) -> str:
+        """Encode each segment independently in a process pool, then concat with stream copy"""
+        from core.segment_renderer import SegmentParallelRenderer
+        
+        self._rasterize_captions(plan)
+        renderer = SegmentParallelRenderer(self.video_size, workers=Config.RENDER_WORKERS or None, temp_dir=self.temp_dir)
+        # Segment encodes run in worker processes - they show up as this one span
+        with span('export', backend=f"{backend}/segment-parallel", segments=len(plan),
+                  duration=round(final_duration, 1)):
+            renderer.render(plan, audio_path, output_path, final_duration, music_path, backend=backend,
+                            progress=progress)
+        print(f"✅ Video exported successfully: {output_path}")
+        return output_path
+    
+    @traced('captions.rasterize')
+    def _rasterize_captions(self, plan: List[Dict]):
+        """Rasterize captions to PNG overlays once per segment (composited without per-frame Python)"""
+        for segment in plan:
+            if segment.get('text') and not segment.get('caption_path'):
+                with span('captions.segment', index=segment['index']):
+                    segment['caption_path'] = self._render_caption_image(segment['text'], segment['index'])
+                segment['caption_y'] = int(self.video_size[1] * 0.78)
+    
     def _generate_dynamic_audio(self, script: str, analysis: Dict) -> str:
         """Generate TTS audio with dynamic voice selection based on content"""
         print("🎤 Generating dynamic TTS audio...")
@@ -171,7 +331,8 @@ class VideoCreator:
             from core.edge_tts import EdgeTTS
             edge_tts = EdgeTTS()
             print(f"🎤 Attempting Edge TTS (voice style: {voice_style})")
-            result = edge_tts.generate_speech(script_with_pauses, audio_path, voice_style)
+            with span('tts.edge', voice_style=voice_style, chars=len(script_with_pauses)):
+                result = edge_tts.generate_speech(script_with_pauses, audio_path, voice_style)
             
             if result and os.path.exists(result) and os.path.getsize(result) > 1000:
                 print(f"✅ Edge TTS SUCCESS - American accent with dynamic rhythm")
@@ -196,7 +357,8 @@ class VideoCreator:
             
             # Save to temp file first
             temp_audio = audio_path + '.tmp'
-            tts.save(temp_audio)
+            with span('tts.gtts', chars=len(script_with_pauses)):
+                tts.save(temp_audio)
             
             # Verify file was created
             if os.path.exists(temp_audio) and os.path.getsize(temp_audio) > 1000:
@@ -236,6 +398,42 @@ class VideoCreator:
         
         return script
     
+    def _analyze_content(self, topic: str, script: str) -> Dict:
+        """Analyze content to determine mood, style, music, voice"""
+        content_analysis = self.content_analyzer.analyze_content(topic, script)
+        print(f"📊 Content analysis: {content_analysis.get('mood', 'informative')} mood, {content_analysis.get('music_style')} music, {content_analysis.get('voice_style')} voice")
+        return content_analysis
+    
+    def _select_music(self, content_analysis: Dict, topic: str) -> Optional[str]:
+        """Pick background music (dynamic based on content)"""
+        # Exact duration isn't known yet - the max length works for every source
+        music_path = self.music_selector.get_music_for_content(content_analysis, Config.VIDEO_DURATION_SECONDS, topic)
+        if music_path:
+            print(f"🎵 Music selected: {music_path}")
+        else:
+            print("⚠️ No music available - video will have voiceover only")
+        return music_path
+    
+    def _prefetch_fonts(self, num_segments: int) -> List[str]:
+        """Download the caption fonts the segments will rotate through"""
+        font_families = self.CAPTION_FONT_FAMILIES
+        return [self.font_manager.get_font_path(font_families[i % len(font_families)], weight="900")
+                for i in range(min(num_segments, len(font_families)))]
+    
+    def _prefetch_segment_media(self, broll_media: List[Dict], num_segments: int,
+                                max_segment_seconds: float) -> Dict[int, Optional[str]]:
+        """Download b-roll for every segment concurrently; returns {segment index: local path}"""
+        jobs = {
+            i: media for i, media in enumerate(broll_media[:num_segments])
+            if media and media.get('url') and media.get('provider') != 'fallback'
+        }
+        if not jobs:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(Config.BROLL_DOWNLOAD_WORKERS, len(jobs))) as pool:
+            fetch = tracing.bind(self._fetch_segment_media)
+            futures = {i: pool.submit(fetch, media, i, max_segment_seconds) for i, media in jobs.items()}
+            return {i: future.result() for i, future in futures.items()}
+    
     def _fetch_broll_media(self, topic: str, duration: float, num_segments: int = 0) -> List[Dict]:
         """Fetch real b-roll images and videos from Pexels/Pixabay"""
         print(f"🖼️ Fetching b-roll media for: {topic} (need {num_segments} unique items)")
@@ -246,43 +444,24 @@ class VideoCreator:
         # Fetch MORE media than needed to ensure variety
         target_count = max(num_segments, 8)  # Get at least 8 unique items
         
-        all_media = []
-        used_urls = set()  # Track URLs to avoid duplicates
-        
-        # First, try to get multiple items per keyword
-        for keyword in keywords[:6]:  # Try more keywords
-            print(f"🔍 Searching for: {keyword}")
-            
-            # STRICT: ONLY VIDEOS - NO IMAGES (user requirement)
-            videos = []
-            for provider in self.media_fetcher.providers:
-                try:
-                    # Get more videos per keyword for better selection
-                    provider_videos = provider.search_videos(keyword, per_page=10)
-                    videos.extend(provider_videos)
-                except:
-                    pass
-            
-            # Filter: ONLY videos, no images
-            for media in videos:
-                if (media and media.get('url') and 
-                    media.get('type') == 'video' and  # Ensure it's marked as video
-                    media['url'] not in used_urls):
-                    # Additional check: make sure it's actually a video URL
-                    if any(ext in media['url'].lower() for ext in ['.mp4', '.mov', '.webm', '.avi']):
-                        all_media.append(media)
-                        used_urls.add(media['url'])
-                        if len(all_media) >= target_count:
-                            break
-            
-            if len(all_media) >= target_count:
-                break
-            
-            # STRICT: NO IMAGES - Only videos (user requirement)
-            # Skip image fallback - we only want videos
-            
-            if len(all_media) >= target_count:
-                break
+        # All searches share one deadline so a slow provider can't stall rendering
+        deadline = time.time() + Config.BROLL_SEARCH_DEADLINE_SECONDS
+        
+        # STRICT: ONLY VIDEOS - NO IMAGES (user requirement)
+        def is_video(media: Dict) -> bool:
+            # Additional check: make sure it's actually a video URL
+            return (media.get('type') == 'video' and
+                    any(ext in media['url'].lower() for ext in ['.mp4', '.mov', '.webm', '.avi']))
+        
+        # First, try to get multiple items per keyword - every keyword/provider search runs
+        # concurrently, results are still taken in keyword priority order
+        search_keywords = keywords[:6]
+        print(f"🔍 Searching for: {', '.join(search_keywords)}")
+        all_media = self.media_fetcher.search_videos_fanout(
+            search_keywords, per_page=10, target_count=target_count,
+            is_usable=is_video, deadline=deadline
+        )
+        used_urls = {media['url'] for media in all_media}  # Track URLs to avoid duplicates
         
         # If still not enough, try different search variations (VIDEOS ONLY)
         if len(all_media) < num_segments:
@@ -294,26 +473,12 @@ class VideoCreator:
                 elif 'country' in kw.lower() or 'countries' in kw.lower():
                     related_terms.extend(['city skyline', 'urban landscape', 'business district', 'city lights'])
             
-            for term in related_terms[:5]:
-                # Only search for videos
-                for provider in self.media_fetcher.providers:
-                    try:
-                        videos = provider.search_videos(term, per_page=3)
-                        for media in videos:
-                            if (media and media.get('url') and 
-                                media.get('type') == 'video' and
-                                media['url'] not in used_urls):
-                                if any(ext in media['url'].lower() for ext in ['.mp4', '.mov', '.webm', '.avi']):
-                                    all_media.append(media)
-                                    used_urls.add(media['url'])
-                                    if len(all_media) >= target_count:
-                                        break
-                        if len(all_media) >= target_count:
-                            break
-                    except:
-                        pass
-                if len(all_media) >= target_count:
-                    break
+            if related_terms and time.time() < deadline:
+                all_media += self.media_fetcher.search_videos_fanout(
+                    related_terms[:5], per_page=3, target_count=target_count - len(all_media),
+                    is_usable=lambda media: is_video(media) and media['url'] not in used_urls,
+                    deadline=deadline
+                )
         
         # If no media found, use fallback
         if not all_media:
@@ -395,10 +560,16 @@ Return ONLY a JSON array of keywords: ["keyword1", "keyword2", ...]"""
     
     def _create_high_quality_visuals(self, script: str, duration: float, topic: str, broll_media: List[Dict]) -> List:
         """Create high-quality visual sequence with real b-roll"""
-        print("🎨 Creating high-quality visuals...")
-        
-        clips = []
-        
+        plan = self._plan_segments(script, duration, broll_media)
+        return self._create_visuals_from_plan(plan, topic)
+    
+    def _plan_segments(self, script: str, duration: float, broll_media: List[Dict],
+                       media_paths: Optional[Dict[int, Optional[str]]] = None) -> List[Dict]:
+        """
+        Build the render-backend-independent segment plan
+        Each entry: index, text, duration, media, media_path, background_color
+        media_paths: b-roll already downloaded by _prefetch_segment_media, by segment index
+        """
         # Split script into segments with rhythm-aware timing
         segments = self._split_script_into_segments(script)
         
@@ -407,14 +578,10 @@ Return ONLY a JSON array of keywords: ["keyword1", "keyword2", ...]"""
         timings = rhythm_sync.calculate_visual_timing(duration, len(segments) if segments else 1)
         
         # Calculate segment durations with rhythm variation
-        if segments:
-            segment_durations = [(end - start) for start, end in timings[:len(segments)]]
-        else:
-            segment_duration = duration
+        segment_durations = [(end - start) for start, end in timings[:len(segments)]] if segments else []
         
+        plan = []
         for i, segment in enumerate(segments):
-            print(f"📝 Processing segment {i+1}/{len(segments)}: {segment[:50]}...")
-            
             # Get unique b-roll for this segment (no duplicates!)
             if i < len(broll_media):
                 media = broll_media[i]  # Use different media for each segment
@@ -423,27 +590,56 @@ Return ONLY a JSON array of keywords: ["keyword1", "keyword2", ...]"""
                 media = self._create_fallback_media()
             
             # Get duration with rhythm variation
-            current_segment_duration = segment_durations[i] if segments and i < len(segment_durations) else (duration / len(segments) if segments else duration)
+            current_segment_duration = segment_durations[i] if i < len(segment_durations) else (duration / len(segments))
+            
+            # Download b-roll up front so every backend reads the same local files
+            media_path = (media_paths or {}).get(i)
+            if not media_path and media and media.get('url') and media.get('provider') != 'fallback':
+                media_path = self._fetch_segment_media(media, i, current_segment_duration)
+            
+            plan.append({
+                'index': i,
+                'text': segment,
+                'duration': current_segment_duration,
+                'media': media,
+                'media_path': media_path,
+                'background_color': self.BACKGROUND_COLORS[i % len(self.BACKGROUND_COLORS)]
+            })
+        
+        return plan
+    
+    @traced('compose.visuals')
+    def _create_visuals_from_plan(self, plan: List[Dict], topic: str) -> List:
+        """Create MoviePy clips for a segment plan"""
+        print("🎨 Creating high-quality visuals...")
+        
+        clips = []
+        for segment in plan:
+            i = segment['index']
+            media = segment['media']
+            print(f"📝 Processing segment {i+1}/{len(plan)}: {segment['text'][:50]}...")
             
             # Create visual for segment - prefer b-roll, only use fallback if media has no URL
-            if not media or not media.get('url') or media.get('provider') == 'fallback':
-                print(f"⚠️ Segment {i+1}: Using fallback (no b-roll media available)")
-                clip = self._create_fallback_visual(segment, topic, i, current_segment_duration)
-            else:
-                print(f"✅ Segment {i+1}: Using b-roll media from {media.get('provider', 'unknown')}")
-                clip = self._create_broll_visual(segment, media, i, current_segment_duration)
+            with span('compose.segment', index=i, broll=bool(segment.get('media_path'))):
+                if not segment.get('media_path'):
+                    print(f"⚠️ Segment {i+1}: Using fallback (no b-roll media available)")
+                    clip = self._create_fallback_visual(segment['text'], topic, i, segment['duration'])
+                else:
+                    print(f"✅ Segment {i+1}: Using b-roll media from {media.get('provider', 'unknown')}")
+                    clip = self._create_broll_visual(segment['text'], media, i, segment['duration'], segment['media_path'])
             
             clips.append(clip)
         
         print(f"✅ Created {len(clips)} visual segments")
         return clips
     
-    def _create_broll_visual(self, text: str, media: Dict, index: int, duration: float) -> CompositeVideoClip:
-        """Create visual using real b-roll media"""
+    def _create_broll_visual(self, text: str, media: Dict, index: int, duration: float,
+                             media_path: Optional[str] = None) -> CompositeVideoClip:
+        """Create visual using real b-roll media (downloads it unless media_path is given)"""
         try:
             # Download and process the media
-            if media.get('url'):
-                media_path = self._download_media(media['url'], index)
+            if media_path or media.get('url'):
+                media_path = media_path or self._download_media(media['url'], index)
                 
                 if media_path and os.path.exists(media_path):
                     # Create base clip from b-roll - prefer videos
@@ -517,17 +713,7 @@ Return ONLY a JSON array of keywords: ["keyword1", "keyword2", ...]"""
     
     def _create_animated_background(self, index: int, duration: float) -> ColorClip:
         """Create animated gradient background"""
-        # Create gradient colors
-        colors = [
-            (41, 128, 185),    # Blue
-            (142, 68, 173),    # Purple
-            (231, 76, 60),     # Red
-            (243, 156, 18),    # Orange
-            (46, 204, 113),    # Green
-            (52, 152, 219),    # Light Blue
-        ]
-        
-        color = colors[index % len(colors)]
+        color = self.BACKGROUND_COLORS[index % len(self.BACKGROUND_COLORS)]
         
         # Create color clip with slight animation
         bg_clip = ColorClip(
@@ -538,10 +724,10 @@ Return ONLY a JSON array of keywords: ["keyword1", "keyword2", ...]"""
         
         return bg_clip
     
-    def _create_kinetic_text(self, text: str, index: int, content_mood: str = "informative") -> TextClip:
-        """Create modern YouTube Shorts style subtitles with dynamic colors and design"""
+    def _caption_style(self, text: str, index: int, content_mood: str = "informative") -> Dict:
+        """Resolve font, size, wrap width and mood colors for a caption"""
         # PRIORITIZE Google Fonts - modern YouTube Shorts style
-        font_families = ["Bebas Neue", "Montserrat", "Poppins", "Roboto", "Inter"]
+        font_families = self.CAPTION_FONT_FAMILIES
         font_name = font_families[index % len(font_families)]  # Rotate fonts
         
         # Get font from Google Fonts (downloads if needed) - ALWAYS use bold (900 weight for extra bold)
@@ -618,6 +804,38 @@ Return ONLY a JSON array of keywords: ["keyword1", "keyword2", ...]"""
         else:
             colors = color_schemes['serious']  # Default: clean white on black
         
+        return {
+            'font_name': font_name,
+            'font_path': font_path,
+            'font_size': font_size,
+            'max_width': max_width,
+            'colors': colors
+        }
+    
+    @traced('captions.kinetic')
+    def _create_kinetic_text(self, text: str, index: int, content_mood: str = "informative") -> TextClip:
+        """Create modern YouTube Shorts style subtitles with dynamic colors and design"""
+        style = self._caption_style(text, index, content_mood)
+        font_path = style['font_path']
+        font_size = style['font_size']
+        max_width = style['max_width']
+        colors = style['colors']
+        
+        # Built-in Pillow engine: cached PNG overlay, no ImageMagick round-trip
+        if Config.CAPTION_ENGINE == 'pil':
+            try:
+                caption_path = self._render_caption_png(text, style)
+                text_clip = (ImageClip(caption_path)
+                            .set_position(('center', self.video_size[1] * 0.78))
+                            .set_duration(5.0)
+                            .fadein(0.25)
+                            .fadeout(0.25)
+                            .set_start(0.05))
+                print(f"✅ Text styled (PIL): {colors['text_color']} text, {colors['stroke_color']} outline (8px)")
+                return text_clip
+            except Exception as e:
+                print(f"⚠️ PIL caption failed, trying ImageMagick: {e}")
+        
         # Create text clip with MODERN YouTube Shorts styling
         try:
             # Primary text with bold stroke
@@ -663,25 +881,115 @@ Return ONLY a JSON array of keywords: ["keyword1", "keyword2", ...]"""
         
         return text_clip
     
+    def _render_caption_image(self, text: str, index: int, content_mood: Optional[str] = None) -> str:
+        """Rasterize a caption to a transparent PNG overlay (used by the ffmpeg backend)"""
+        if content_mood is None:
+            content_mood = self.current_content_mood if hasattr(self, 'current_content_mood') else "informative"
+        style = self._caption_style(text, index, content_mood)
+        font_path = style['font_path']
+        
+        if Config.CAPTION_ENGINE == 'pil':
+            try:
+                return self._render_caption_png(text, style)
+            except Exception as e:
+                print(f"⚠️ PIL caption failed, trying ImageMagick: {e}")
+        
+        text_clip = TextClip(
+            text,
+            fontsize=style['font_size'],
+            color=style['colors']['text_color'],
+            font=font_path if font_path and font_path != "Arial-Bold" else 'Arial-Bold',
+            stroke_color=style['colors']['stroke_color'],
+            stroke_width=8,
+            method='caption',
+            size=(style['max_width'], None),
+            align='center',
+            bg_color='transparent'
+        )
+        caption_path = os.path.join(self.temp_dir, f"caption_{index}_{random.randint(10000, 99999)}.png")
+        text_clip.save_frame(caption_path, t=0, withmask=True)
+        text_clip.close()
+        return caption_path
+    
+    def _render_caption_png(self, text: str, style: Dict) -> str:
+        """Rasterize a caption with the built-in Pillow engine (disk-cached)"""
+        return self.caption_renderer.render(
+            text,
+            font_path=style['font_path'],
+            font_size=style['font_size'],
+            text_color=style['colors']['text_color'],
+            stroke_color=style['colors']['stroke_color'],
+            stroke_width=8,
+            max_width=style['max_width']
+        )
+    
+    def _fetch_segment_media(self, media: Dict, index: int, duration: Optional[float] = None) -> Optional[str]:
+        """Get a local file for a b-roll item, via the normalized mezzanine cache for videos"""
+        with span('broll.download', index=index, url=media['url'][:120]) as download_span:
+            media_path, source = self._fetch_segment_media_file(media, index, duration)
+            download_span.set(source=source, ok=media_path is not None)
+        return media_path
+    
+    def _fetch_segment_media_file(self, media: Dict, index: int, duration: Optional[float] = None):
+        """(local path or None, where it came from: 'mezzanine_cache', 'partial' or 'full')"""
+        url = media['url']
+        is_video = media.get('type') == 'video'
+        # Only the first few seconds of a stock clip end up on screen
+        needed_seconds = duration + Config.BROLL_PARTIAL_MARGIN_SECONDS if duration and is_video else None
+        
+        if self.mezzanine_cache and is_video:
+            cached = self.mezzanine_cache.lookup(url, min_seconds=needed_seconds)
+            if cached:
+                print(f"♻️ Mezzanine cache hit: {url[:50]}")
+                return cached, 'mezzanine_cache'
+        
+        media_path = None
+        covered_seconds = None
+        if needed_seconds and Config.BROLL_PARTIAL_FETCH:
+            media_path = self._download_media_prefix(url, index, needed_seconds)
+            covered_seconds = needed_seconds if media_path else None
+        source = 'partial' if media_path else 'full'
+        media_path = media_path or self._download_media(url, index)
+        
+        if media_path and self.mezzanine_cache and is_video and media_path.endswith('.mp4'):
+            media_path = self.mezzanine_cache.ingest(media_path, url, covered_seconds=covered_seconds)
+        return media_path, source
+    
+    def _download_media_prefix(self, url: str, index: int, seconds: float) -> Optional[str]:
+        """Download only the first `seconds` of a faststart MP4 (None = use a full download)"""
+        media_path = os.path.join(self.temp_dir, f"media_{index}_{random.randint(10000, 99999)}.mp4")
+        try:
+            result = MP4RangeFetcher().fetch_prefix(url, media_path, seconds)
+            saved = (1 - result['bytes'] / result['total_bytes']) * 100 if result['total_bytes'] else 0
+            print(f"✂️ Fetched first {seconds:.1f}s only: {result['bytes'] / 1024 / 1024:.1f} MB ({saved:.0f}% less)")
+            return media_path
+        except (MP4LayoutError, DownloadError) as e:
+            print(f"ℹ️ Partial fetch not possible ({e}), downloading full clip")
+        except Exception as e:
+            print(f"⚠️ Partial fetch failed ({e}), downloading full clip")
+        return None
+    
     def _download_media(self, url: str, index: int) -> Optional[str]:
-        """Download media from URL"""
+        """Download media from URL (streamed to disk, resumable)"""
         try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            
-            # Determine file extension
-            ext = '.jpg'
-            if 'video' in response.headers.get('content-type', ''):
-                ext = '.mp4'
-            elif 'png' in response.headers.get('content-type', ''):
-                ext = '.png'
-            
-            # Save file
-            media_path = os.path.join(self.temp_dir, f"media_{index}_{random.randint(10000, 99999)}{ext}")
-            with open(media_path, 'wb') as f:
-                f.write(response.content)
+            # Stable partial-file name so a retry for the same URL resumes instead of restarting
+            url_key = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+            download_path = os.path.join(self.temp_dir, f"download_{url_key}")
+            with _DOWNLOAD_LOCKS[int(url_key, 16) % len(_DOWNLOAD_LOCKS)]:
+                result = get_downloader().download(url, download_path, allowed_types=MEDIA_TYPES, min_bytes=1)
+                
+                # Determine file extension
+                ext = '.jpg'
+                if 'video' in result['content_type'] or url.lower().split('?')[0].endswith(('.mp4', '.mov', '.webm')):
+                    ext = '.mp4'
+                elif 'png' in result['content_type']:
+                    ext = '.png'
+                
+                # Save file (inside the lock: the next caller for this URL must start a fresh partial)
+                media_path = os.path.join(self.temp_dir, f"media_{index}_{random.randint(10000, 99999)}{ext}")
+                os.replace(download_path, media_path)
             
-            print(f"✅ Downloaded media: {media_path}")
+            print(f"✅ Downloaded media: {media_path} ({result['bytes'] / 1024 / 1024:.1f} MB{', resumed' if result['resumed'] else ''})")
             return media_path
             
         except Exception as e:
@@ -690,36 +998,7 @@ Return ONLY a JSON array of keywords: ["keyword1", "keyword2", ...]"""
     
     def _resize_for_shorts(self, clip) -> VideoFileClip:
         """Resize clip to fit 9:16 aspect ratio for YouTube Shorts"""
-        # Get current dimensions
-        w, h = clip.size
-        
-        # Calculate target dimensions (9:16 aspect ratio)
-        target_w, target_h = self.video_size
-        
-        # Calculate scale factor to fill the frame
-        scale_w = target_w / w
-        scale_h = target_h / h
-        scale = max(scale_w, scale_h)  # Use larger scale to fill frame
-        
-        # Resize
-        new_w = int(w * scale)
-        new_h = int(h * scale)
-        
-        # Use high-quality resize (MoviePy uses good default algorithm)
-        clip = clip.resize((new_w, new_h))
-        
-        # Crop to exact size if needed
-        if new_w > target_w or new_h > target_h:
-            x_center = new_w // 2
-            y_center = new_h // 2
-            clip = clip.crop(
-                x_center=x_center,
-                y_center=y_center,
-                width=target_w,
-                height=target_h
-            )
-        
-        return clip
+        return resize_to_fill(clip, self.video_size)
     
     def _split_script_into_segments(self, script: str) -> List[str]:
         """Split script into visual segments"""
@@ -737,6 +1016,7 @@ Return ONLY a JSON array of keywords: ["keyword1", "keyword2", ...]"""
         
         return grouped if grouped else [script]
     
+    @traced('compose.audio_video')
     def _combine_audio_video(self, video_clips: List, audio_path: str, duration: float, music_path: Optional[str] = None) -> CompositeVideoClip:
         """Combine video clips with audio and optional background music"""
         if not video_clips:
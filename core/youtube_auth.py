@@ -0,0 +1,232 @@
+"""
+Process-wide YouTube credentials
+Loads token.pickle (or builds credentials from YOUTUBE_REFRESH_TOKEN) once per process, keeps the
+access token fresh from a background thread that refreshes it CREDENTIAL_REFRESH_MARGIN_SECONDS
+before it expires, and hands out API service objects built from a local copy of the discovery
+document - one per thread, because httplib2 transports aren't thread-safe; they all share the
+one credentials object, so a refresh reaches every thread. Creating a YouTubeUploader (or
+starting an upload) therefore never waits on an OAuth round-trip or a discovery fetch
+"""
+import os
+import json
+import time
+import pickle
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+from core.config import Config
+
+TOKEN_FILE = 'token.pickle'
+TOKEN_URI = "https://oauth2.googleapis.com/token"
+DISCOVERY_URL = "https://www.googleapis.com/discovery/v1/apis/youtube/v3/rest"
+RETRY_SECONDS = 60  # After a failed background refresh
+
+
+class CredentialManager:
+    """Owns the YouTube credentials and service object for the whole process"""
+
+    def __init__(self, token_file: str = TOKEN_FILE):
+        self.token_file = token_file
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()  # One token refresh at a time
+        self._credentials = None
+        self._local = threading.local()  # Per-thread service + authorized transport
+        self._generation = 0  # Bumped when the credentials are replaced, so threads rebuild their service
+        self.transports = 0
+        self._discovery: Optional[Dict] = None
+        self._refresh_token = None  # The refresh token the current credentials were built from
+        self._wake = threading.Event()
+        self._thread = None
+        self.last_refresh = None
+        self.last_error = None
+
+    # --- credentials ---------------------------------------------------------
+
+    def _load(self):
+        """token.pickle if it's still good, otherwise fresh credentials from the configured refresh token"""
+        from google.oauth2.credentials import Credentials
+        creds = None
+        if os.path.exists(self.token_file) and self._refresh_token is None:
+            try:
+                with open(self.token_file, 'rb') as token:
+                    creds = pickle.load(token)
+            except Exception as e:
+                print(f"⚠️ Could not read {self.token_file}: {e}")
+
+        if creds and not creds.valid:
+            if creds.expired and creds.refresh_token:
+                try:
+                    self._refresh(creds)
+                except Exception as e:
+                    print(f"Token refresh failed, using refresh token from config: {e}")
+                    creds = None  # Force recreation
+            else:
+                creds = None
+
+        if not creds or not creds.valid:
+            refresh_token = self._refresh_token or Config.YOUTUBE_REFRESH_TOKEN
+            if not refresh_token:
+                raise Exception("No refresh token available. Cannot authenticate.")
+            creds = Credentials(
+                None,  # No initial token needed for refresh
+                refresh_token=refresh_token,
+                token_uri=TOKEN_URI,
+                client_id=Config.YOUTUBE_CLIENT_ID,
+                client_secret=Config.YOUTUBE_CLIENT_SECRET
+            )
+            try:
+                self._refresh(creds)
+            except Exception as e:
+                raise Exception(f"YouTube refresh token expired. Please regenerate: {e}")
+            print("✅ Successfully refreshed YouTube credentials")
+        return creds
+
+    def _refresh(self, creds):
+        from google.auth.transport.requests import Request
+        with self._refresh_lock:
+            creds.refresh(Request())
+            self.last_refresh = time.time()
+            self.last_error = None
+            self._save(creds)
+
+    def _save(self, creds):
+        try:
+            with open(self.token_file, 'wb') as token:
+                pickle.dump(creds, token)
+        except Exception as e:
+            print(f"⚠️ Could not save {self.token_file}: {e}")
+
+    def get_credentials(self):
+        """Valid credentials; only the very first call (or a dead background refresh) goes to the network"""
+        with self._lock:
+            if self._credentials is None:
+                self._credentials = self._load()
+                self._start_refresher()
+            elif not self._credentials.valid:
+                # The background refresh fell behind (e.g. the machine slept) - catch up inline
+                self._refresh(self._credentials)
+            return self._credentials
+
+    def refresh_now(self):
+        """Force a refresh (after a 401) - refreshes in place, so existing service objects pick it up"""
+        with self._lock:
+            if self._credentials is None:
+                return self.get_credentials()
+            self._refresh(self._credentials)
+            return self._credentials
+
+    def use_refresh_token(self, refresh_token: str):
+        """Switch to a regenerated refresh token (token recovery) and drop everything built on the old one"""
+        with self._lock:
+            self._refresh_token = refresh_token
+            self._credentials = None
+            self._generation += 1
+        self._wake.set()
+
+    def seconds_until_expiry(self) -> Optional[float]:
+        creds = self._credentials
+        if creds is None or creds.expiry is None:
+            return None
+        # google-auth keeps expiry as a naive UTC datetime
+        return (creds.expiry - datetime.utcnow()).total_seconds()
+
+    # --- background refresh --------------------------------------------------
+
+    def _start_refresher(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._refresh_loop, name="youtube-token-refresh", daemon=True)
+            self._thread.start()
+
+    def _next_wait(self) -> float:
+        remaining = self.seconds_until_expiry()
+        if remaining is None:
+            return RETRY_SECONDS
+        return max(0.0, remaining - Config.CREDENTIAL_REFRESH_MARGIN_SECONDS)
+
+    def _refresh_loop(self):
+        while True:
+            wait = self._next_wait() if self.last_error is None else RETRY_SECONDS
+            self._wake.wait(wait)
+            self._wake.clear()
+            creds = self._credentials
+            if creds is None:
+                continue  # use_refresh_token() - the next get_credentials() builds new ones
+            remaining = self.seconds_until_expiry()
+            if remaining is not None and remaining > Config.CREDENTIAL_REFRESH_MARGIN_SECONDS:
+                continue  # Someone else already refreshed
+            try:
+                # Refreshed in place without holding _lock: callers keep using the current
+                # (still valid) token meanwhile
+                self._refresh(creds)
+                print(f"🔑 YouTube access token refreshed ahead of expiry "
+                      f"(valid for {int(self.seconds_until_expiry() or 0) // 60} min)")
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"⚠️ Background YouTube token refresh failed (retrying in {RETRY_SECONDS}s): {e}")
+
+    # --- API service ---------------------------------------------------------
+
+    def discovery_document(self) -> Dict:
+        """youtube/v3 discovery document from disk (the copy bundled with the client library, or a saved one)"""
+        if self._discovery is not None:
+            return self._discovery
+        doc = None
+        try:
+            from googleapiclient.discovery_cache import get_static_doc
+            doc = get_static_doc('youtube', 'v3')
+        except ImportError:
+            pass  # Older client library without bundled documents
+        path = Config.YOUTUBE_DISCOVERY_DOC
+        if doc is None and os.path.exists(path):
+            with open(path) as f:
+                doc = f.read()
+        if doc is None:
+            import requests
+            print("📥 Downloading the YouTube API discovery document (once)...")
+            response = requests.get(DISCOVERY_URL, timeout=30)
+            response.raise_for_status()
+            doc = response.text
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(doc)
+        self._discovery = json.loads(doc)
+        return self._discovery
+
+    def get_service(self):
+        """This thread's youtube/v3 service object (built on first use per thread, no network)"""
+        local = self._local
+        if getattr(local, 'service', None) is None or local.generation != self._generation:
+            import httplib2
+            from google_auth_httplib2 import AuthorizedHttp
+            from googleapiclient.discovery import build_from_document
+            with self._lock:
+                credentials, generation = self.get_credentials(), self._generation
+                document = self.discovery_document()
+                self.transports += 1
+            http = AuthorizedHttp(credentials, http=httplib2.Http(timeout=60))
+            local.service = build_from_document(document, http=http)
+            local.generation = generation
+        return local.service
+
+    def status(self) -> Dict:
+        remaining = self.seconds_until_expiry()
+        return {
+            'authenticated': self._credentials is not None,
+            'expires_in_seconds': int(remaining) if remaining is not None else None,
+            'last_refresh': self.last_refresh,
+            'last_error': self.last_error,
+            'transports_built': self.transports
+        }
+
+
+_manager: Optional[CredentialManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_credential_manager() -> CredentialManager:
+    """Process-wide credential manager (main, the dashboard and workers share one token)"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = CredentialManager()
+        return _manager
@@ -3,15 +3,13 @@ YouTube upload automation
 Handles OAuth authentication and video uploads
 """
 import os
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-import pickle
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional
 from core.config import Config
+from core.tracing import span
 from core.quota_manager import QuotaManager
+from core.resumable_upload import ResumableUpload
+from core.upload_slots import UploadSlot, get_upload_slots
+from core.youtube_auth import get_credential_manager
 
 # YouTube API scopes
 # YouTube API scopes - need both upload and basic read access
@@ -22,61 +20,23 @@ SCOPES = [
 
 class YouTubeUploader:
     def __init__(self):
-        self.service = None
-        self.credentials = None
+        # Credentials and the API service are shared process-wide, so this is cheap after the first time
+        self.auth = get_credential_manager()
         self.quota_manager = QuotaManager()
         self._authenticate()
     
+    @property
+    def credentials(self):
+        return self.auth.get_credentials()
+    
+    @property
+    def service(self):
+        return self.auth.get_service()
+    
     def _authenticate(self, retry=False):
-        """Authenticate with YouTube API with automatic refresh and recovery"""
-        creds = None
-        token_file = 'token.pickle'
-        
+        """Make sure the shared credentials and service exist (network only on the first call per process)"""
         try:
-            # Load existing token
-            if os.path.exists(token_file):
-                with open(token_file, 'rb') as token:
-                    creds = pickle.load(token)
-            
-            # Check if credentials need refresh
-            if creds and not creds.valid:
-                if creds.expired and creds.refresh_token:
-                    try:
-                        creds.refresh(Request())
-                    except Exception as e:
-                        print(f"Token refresh failed, using refresh token from config: {e}")
-                        creds = None  # Force recreation
-        
-            # If no valid credentials, create new ones using refresh token
-            if not creds or not creds.valid:
-                if Config.YOUTUBE_REFRESH_TOKEN:
-                    try:
-                        creds = Credentials(
-                            None,  # No initial token needed for refresh
-                            refresh_token=Config.YOUTUBE_REFRESH_TOKEN,
-                            token_uri="https://oauth2.googleapis.com/token",
-                            client_id=Config.YOUTUBE_CLIENT_ID,
-                            client_secret=Config.YOUTUBE_CLIENT_SECRET
-                        )
-                        creds.refresh(Request())
-                        print("✅ Successfully refreshed YouTube credentials")
-                    except Exception as e:
-                        if not retry:
-                            print(f"⚠️ Refresh token invalid, attempting recovery: {e}")
-                            # Refresh token might be expired - log error but continue
-                            raise Exception(f"YouTube refresh token expired. Please regenerate: {e}")
-                        else:
-                            raise
-                else:
-                    raise Exception("No refresh token available. Cannot authenticate.")
-            
-            # Save credentials for next time
-            with open(token_file, 'wb') as token:
-                pickle.dump(creds, token)
-            
-            self.credentials = creds
-            self.service = build('youtube', 'v3', credentials=creds)
-            
+            self.auth.get_service()
         except Exception as e:
             print(f"❌ Authentication failed: {e}")
             if not retry and Config.YOUTUBE_REFRESH_TOKEN:
@@ -85,27 +45,34 @@ class YouTubeUploader:
             raise
     
     def upload_video(self, video_path: str, title: str, description: str, 
-                     tags: list, category_id: str = "22") -> Optional[Dict]:
+                     tags: list, category_id: str = "22",
+                     progress: Optional[Callable[[float], None]] = None,
+                     publish_at: Optional[str] = None) -> Optional[Dict]:
         """
-        Upload video to YouTube
+        Upload video to YouTube (safe to call from several threads at once)
         
+        progress: called with the uploaded fraction (0..1) after each chunk
+        publish_at: future UTC time (ISO 8601) - upload as private and let YouTube publish it then
         Returns: Video information including URL and ID
         """
         if not self.service:
             raise ValueError("YouTube service not initialized")
         
-        # Check quota before attempting upload
-        if not self.quota_manager.can_upload():
-            usage = self.quota_manager.get_quota_usage_estimate()
-            raise Exception(f"Quota exceeded: {usage['percentage']:.1f}% used. Cannot upload safely.")
-        
+        uploader = ResumableUpload(auth=self.auth)
+        # An interrupted upload of this file already paid for its videos.insert - finish it regardless
+        resuming = uploader.find_session(video_path) is not None
+        # Waits for one of UPLOAD_MAX_CONCURRENT slots; raises if the quota can't cover another upload
+        with get_upload_slots().slot(reserve=not resuming) as slot:
+            return self._upload(uploader, slot, video_path, title, description, tags, category_id, progress,
+                                publish_at)
+    
+    def _upload(self, uploader: ResumableUpload, slot: UploadSlot, video_path: str, title: str,
+                description: str, tags: list, category_id: str,
+                progress: Optional[Callable[[float], None]], publish_at: Optional[str] = None) -> Optional[Dict]:
         # Check token validity without consuming quota
         if not self._is_token_valid():
             raise Exception("YouTube token is invalid or expired. Please refresh token before uploading.")
         
-        # Log quota usage
-        self.quota_manager.log_quota_usage("upload_attempt", self.quota_manager.upload_cost)
-        
         try:
             # Prepare metadata - handle None values
             safe_title = (title or "Untitled Video")[:100]
@@ -125,100 +92,40 @@ class YouTubeUploader:
                     'selfDeclaredMadeForKids': False
                 }
             }
+            if publish_at:
+                # Scheduled publishing only works on private videos; YouTube flips it public at publishAt
+                body['status']['privacyStatus'] = 'private'
+                body['status']['publishAt'] = publish_at
             
             # YouTube Shorts specific settings
             body['snippet']['tags'].append('shorts')
             body['snippet']['tags'].append('youtubeshorts')
             
-            # Insert video
-            media = MediaFileUpload(
-                video_path,
-                chunksize=-1,
-                resumable=True,
-                mimetype='video/mp4'
-            )
-            
-            insert_request = self.service.videos().insert(
-                part=','.join(body.keys()),
-                body=body,
-                media_body=media
-            )
+            # Chunked resumable upload: a dropped connection, token refresh or restart picks up
+            # from the last byte YouTube confirmed. videos.insert is charged (whether or not the
+            # upload then succeeds) when a new session is started
+            def report_progress(fraction: float):
+                print(f"Upload progress: {int(fraction * 100)}%")
+                if progress:
+                    progress(fraction)
             
-            # Execute upload with retry logic
-            response = None
-            max_retries = 3
-            retry_count = 0
-            
-            while response is None and retry_count < max_retries:
-                try:
-                    while response is None:
-                        status, response = insert_request.next_chunk()
-                        if status:
-                            print(f"Upload progress: {int(status.progress() * 100)}%")
-                except Exception as upload_error:
-                    retry_count += 1
-                    error_str = str(upload_error)
-                    
-                    # Check for authentication errors
-                    if '401' in error_str or 'Unauthorized' in error_str or 'invalid_grant' in error_str:
-                        print(f"⚠️ Authentication error detected (attempt {retry_count}/{max_retries})...")
-                        
-                        # Check if it's a permanent token issue
-                        if 'invalid_grant' in error_str.lower():
-                            print("\n" + "="*70)
-                            print("❌ REFRESH TOKEN EXPIRED - REGENERATION REQUIRED")
-                            print("="*70)
-                            print("\nYour YouTube refresh token has expired.")
-                            print("\nTo fix:")
-                            print("1. In Replit, check if 'manual_auth.py' exists")
-                            print("2. Run: python manual_auth.py (if it exists)")
-                            print("3. Follow prompts to get new refresh token")
-                            print("4. Update YOUTUBE_REFRESH_TOKEN in Replit Secrets")
-                            print("5. Restart the app")
-                            print("\nOr manually:")
-                            print("  - Go to Google Cloud Console")
-                            print("  - Regenerate OAuth token")
-                            print("  - Update Replit Secrets")
-                            print("\nThe app will automatically retry once token is updated.")
-                            print("="*70 + "\n")
-                            raise Exception("Refresh token expired. See instructions above to regenerate.")
-                        
-                        # Try re-authenticating (might be a temporary issue)
-                        try:
-                            self._authenticate(retry=True)
-                            self.service = build('youtube', 'v3', credentials=self.credentials)
-                            insert_request = self.service.videos().insert(
-                                part=','.join(body.keys()),
-                                body=body,
-                                media_body=media
-                            )
-                            response = None
-                            print("✅ Re-authenticated, retrying upload...")
-                        except Exception as auth_error:
-                            if 'invalid_grant' in str(auth_error).lower() or 'expired' in str(auth_error).lower():
-                                raise Exception("Refresh token expired. Regenerate token in Replit Secrets.")
-                            raise auth_error
-                    else:
-                        if retry_count >= max_retries:
-                            raise
-                        print(f"Upload error (attempt {retry_count}/{max_retries}): {upload_error}")
-                        import time
-                        time.sleep(5)  # Wait before retry
-                        response = None  # Retry
+            with span('upload.youtube', bytes=os.path.getsize(video_path), scheduled=bool(publish_at)):
+                response = uploader.upload(
+                    video_path, body, part=','.join(body.keys()), progress=report_progress,
+                    on_new_session=slot.charge)
             
             if response and 'id' in response:
                 video_id = response['id']
                 video_url = f"https://www.youtube.com/shorts/{video_id}"
-                
                 return {
                     'video_id': video_id,
                     'url': video_url,
                     'title': title,
+                    'publish_at': publish_at,
                     'response': response
                 }
             else:
-                # Check if we got 401 errors consistently - likely token issue
-                raise Exception("Upload failed after retries - likely expired refresh token. Run 'python scripts/regenerate_youtube_token.py' to fix.")
+                raise Exception(f"Upload finished without a video ID: {response}")
             
         except Exception as e:
             error_str = str(e).lower()
@@ -253,9 +160,11 @@ class YouTubeUploader:
                         print("\n✅ Token regenerated successfully!")
                         # Update the token in memory with the NEW token
                         if update_config_token(new_token):
+                            self.auth.use_refresh_token(new_token)
                             print("✅ Token updated in memory - continuing upload...")
                             # Retry the upload with the new token
-                            return self.upload_video(video_path, title, description, tags, category_id)
+                            return self._upload(ResumableUpload(auth=self.auth), slot, video_path, title,
+                                                description, tags, category_id, progress, publish_at)
                         else:
                             print("⚠️ Please restart the app for the new token to take effect.")
                     else:
@@ -314,6 +223,7 @@ class YouTubeUploader:
             # Use a very low-cost API call to test connection
             # This costs only 1 unit (vs 1600 for upload)
             request = self.service.channels().list(part='id', mine=True)
+            self.quota_manager.log_quota_usage("channels.list", 1)
             response = request.execute()
             
             if response.get('items'):
@@ -338,6 +248,7 @@ class YouTubeUploader:
                 part='id',
                 mine=True
             )
+            self.quota_manager.log_quota_usage("channels.list", 1)
             response = request.execute()
             
             if response.get('items'):
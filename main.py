@@ -8,6 +8,7 @@ import logging
 from datetime import datetime, date
 from typing import Optional
 import traceback
+import threading
 
 from core.config import Config
 from core.database import Database
@@ -17,6 +18,13 @@ from core.video_creator import VideoCreator
 from core.youtube_uploader import YouTubeUploader
 from core.scheduler import VideoScheduler
 from core.email_reporter import EmailReporter
+from core.batch_pipeline import BatchPipeline, PipelineStage
+from core.job_queue import JobQueue, JobWorker, JobContext
+from core.render_dispatch import RemoteRenderDispatcher
+from core.upload_scheduler import UploadScheduler
+from core.inventory import InventoryManager
+from core.events import publish
+from core import tracing
 from fastapi import FastAPI
 from fastapi.responses import JSONResponse, HTMLResponse
 from fastapi.staticfiles import StaticFiles
@@ -42,6 +50,12 @@ class YouTubeShortsGenerator:
         self.youtube_uploader = YouTubeUploader()
         self.email_reporter = EmailReporter()
         self.scheduler = None
+        self.pipeline = None
+        self.job_queue = JobQueue()
+        self.job_worker = None
+        self.stats_ingester = None
+        self.upload_scheduler = None
+        self.inventory = None
         
         logger.info("YouTube Shorts Generator initialized")
     
@@ -70,6 +84,11 @@ class YouTubeShortsGenerator:
                     self.db.update_video_file_path(video_id, file_path)
                     logger.info(f"Found and updated file path for {video_id}: {file_path}")
             
+            if Config.UPLOAD_SCHEDULER_ENABLED:
+                # The upload scheduler owns the queue: oldest due video, quota refusals don't count as failures
+                summary = self.get_upload_scheduler().drain(max_uploads=1)
+                return summary['results'][0] if summary['results'] else None
+            
             # Get failed uploads (now with updated paths)
             failed_videos = self.db.get_failed_uploads(max_retries=max_retries)
             
@@ -103,7 +122,7 @@ class YouTubeShortsGenerator:
                 video_path=video_path,
                 title=video_data['title'],
                 description=video_data['description'],
-                tags=[]
+                tags=video_data.get('tags', [])
             )
             
             if upload_result:
@@ -145,15 +164,17 @@ class YouTubeShortsGenerator:
             logger.error(traceback.format_exc())
             return None
     
-    def generate_and_upload_video(self, retry_failed_first: bool = True) -> Optional[dict]:
+    def generate_and_upload_video(self, retry_failed_first: bool = True,
+                                  render_backend: Optional[str] = None) -> Optional[dict]:
         """
         Main workflow: Generate one video and upload it
         Optionally retries failed uploads first before generating new video
+        render_backend overrides Config.RENDER_BACKEND for this job ("moviepy" or "ffmpeg")
         
         Returns: Video info dict or None if failed
         """
-        # First, try to retry a failed upload if any exist
-        if retry_failed_first:
+        # First, try to retry a failed upload if any exist (the upload scheduler drains those on its own)
+        if retry_failed_first and not Config.UPLOAD_SCHEDULER_ENABLED:
             logger.info("Checking for failed uploads to retry...")
             retry_result = self.retry_failed_upload()
             if retry_result:
@@ -166,160 +187,22 @@ class YouTubeShortsGenerator:
             logger.info("Starting video generation workflow")
             logger.info("=" * 60)
             
-            # Step 1: Discover trending topic
-            logger.info("Step 1: Discovering trending topic...")
-            topic_data = self.topic_agent.select_best_topic()
-            
-            if not topic_data:
-                logger.error("No suitable topic found")
+            job = self._discover_and_write()
+            if not job:
                 return None
             
-            topic = topic_data['topic']
-            trend_score = topic_data['score']
-            logger.info(f"Selected topic: {topic} (Score: {trend_score})")
-            
-            # Save trend to database
-            self.db.add_trend(
-                topic=topic,
-                source=topic_data.get('source', 'unknown'),
-                score=trend_score,
-                metadata=topic_data.get('metadata', {})
-            )
-            
-            # Step 2: Generate content
-            logger.info("Step 2: Generating video content...")
-            content = self.content_generator.generate_video_content(topic)
-            logger.info(f"Generated title: {content['title']}")
-            
-            # Step 2.5: Get post-content enhancements
-            enhancements = self.content_generator.get_post_content_enhancements(content, topic)
-            total_issues = sum(len(v) for k, v in enhancements.items() if k != "overall_suggestions")
-            if total_issues > 0:
-                logger.info(f"📊 Content analysis: {total_issues} enhancement suggestions found")
-                # Log key suggestions
-                if enhancements.get("script_enhancements"):
-                    logger.info(f"   Script: {enhancements['script_enhancements'][0]}")
-                if enhancements.get("title_enhancements"):
-                    logger.info(f"   Title: {enhancements['title_enhancements'][0]}")
-            else:
-                logger.info("✅ Content quality check passed - all enhancements OK")
-            
             # Step 3: Create video
             logger.info("Step 3: Creating video file...")
-            video_path = self.video_creator.create_video(content, topic)
+            video_path = self.video_creator.create_video(job['content'], job['topic'], render_backend=render_backend)
             logger.info(f"Video created: {video_path}")
             
-            # Step 4: Save video to database
-            video_id = os.path.basename(video_path).replace('.mp4', '')
-            video_db_data = {
-                'video_id': video_id,
-                'title': content['title'],
-                'description': content['description'],
-                'topic': topic,
-                'trend_score': trend_score,
-                'status': 'created',
-                'video_file_path': video_path
-            }
-            self.db.add_video(video_db_data)
-            
-            # Step 5: Upload to YouTube
-            logger.info("Step 4: Uploading to YouTube...")
-            try:
-                upload_result = self.youtube_uploader.upload_video(
-                    video_path=video_path,
-                    title=content['title'],
-                    description=content['description'],
-                    tags=content.get('tags', [])
-                )
-                
-                if upload_result:
-                    # Update database
-                    self.db.update_video_upload(
-                        video_id=video_id,
-                        youtube_url=upload_result['url']
-                    )
-                    
-                    # Update daily stats
-                    today = date.today().isoformat()
-                    self.db.update_daily_stats(
-                        today,
-                        videos_created=1,
-                        videos_uploaded=1
-                    )
-                    
-                    # Send email notification
-                    self.email_reporter.send_video_upload_notification(
-                        content['title'],
-                        upload_result['url']
-                    )
-                    
-                    logger.info(f"Successfully uploaded: {upload_result['url']}")
-                    return upload_result
-                else:
-                    logger.error("Upload failed - no result returned")
-            
-            except Exception as upload_error:
-                logger.error(f"Upload error: {upload_error}")
-                logger.error(traceback.format_exc())
-                
-                # Check if it's a recoverable error
-                from core.error_recovery import ErrorRecovery
-                if ErrorRecovery.handle_api_error(upload_error, "YouTube", max_retries=1):
-                    logger.info("Attempting automatic recovery...")
-                    # Retry upload once after error recovery
-                    try:
-                        upload_result = self.youtube_uploader.upload_video(
-                            video_path=video_path,
-                            title=content['title'],
-                            description=content['description'],
-                            tags=content.get('tags', [])
-                        )
-                        if upload_result:
-                            self.db.update_video_upload(video_id, upload_result['url'])
-                            today = date.today().isoformat()
-                            self.db.update_daily_stats(today, videos_created=1, videos_uploaded=1)
-                            logger.info(f"✅ Recovery successful: {upload_result['url']}")
-                            return upload_result
-                    except Exception as retry_error:
-                        logger.error(f"Recovery attempt failed: {retry_error}")
-                
-                # Video was created but upload failed - save for retry
-                error_msg = str(upload_error)
-                self.db.mark_upload_failed(video_id, error_msg)
-                
-                # Check if it's a token expiration issue - send alert
-                if 'invalid_grant' in error_msg.lower() or 'expired' in error_msg.lower():
-                    try:
-                        from email_reporter import EmailReporter
-                        emailer = EmailReporter()
-                        emailer._send_email(
-                            subject="🚨 YouTube Token Expired - Action Required",
-                            body=f"""
-                            <h2>YouTube Token Expiration Alert</h2>
-                            <p>Your YouTube refresh token has expired and needs regeneration.</p>
-                            <p><strong>Error:</strong> {error_msg[:200]}</p>
-                            <p><strong>To fix:</strong></p>
-                            <ol>
-                                <li>In Replit Shell, run: <code>python regenerate_youtube_token.py</code></li>
-                                <li>Follow the prompts to get a new refresh token</li>
-                                <li>Update YOUTUBE_REFRESH_TOKEN in Replit Secrets</li>
-                                <li>Restart the app</li>
-                                <li>Pending videos will automatically retry once token is fixed</li>
-                            </ol>
-                            <p>The system will continue creating videos but uploads will fail until token is regenerated.</p>
-                            """
-                        )
-                        logger.info("Email alert sent about token expiration")
-                    except Exception as email_error:
-                        logger.warning(f"Could not send email alert: {email_error}")
-                
-                # Update stats
-                today = date.today().isoformat()
-                self.db.update_daily_stats(today, videos_created=1)
-                
-                logger.warning(f"Video created but upload failed. Saved to retry queue. Error: {error_msg[:100]}")
-            
-            return None
+            self._save_created_video(job, video_path)
+            if Config.UPLOAD_SCHEDULER_ENABLED:
+                self._queue_created_video(job)
+                summary = self.get_upload_scheduler().drain()
+                # None if the quota is gone - the video stays queued for the scheduler
+                return next((r for r in summary['results'] if r.get('local_video_id') == job['video_id']), None)
+            return self._upload_created_video(job)
         
         except Exception as e:
             logger.error(f"Error in video generation workflow: {e}")
@@ -331,13 +214,433 @@ class YouTubeShortsGenerator:
             
             return None
     
+    def _discover_and_write(self) -> Optional[dict]:
+        """Steps 1-2: pick a trending topic and generate its content (returns a job dict or None)"""
+        # Step 1: Discover trending topic
+        logger.info("Step 1: Discovering trending topic...")
+        topic_data = self.topic_agent.select_best_topic()
+        
+        if not topic_data:
+            logger.error("No suitable topic found")
+            return None
+        
+        topic = topic_data['topic']
+        trend_score = topic_data['score']
+        logger.info(f"Selected topic: {topic} (Score: {trend_score})")
+        
+        # Save trend to database
+        self.db.add_trend(
+            topic=topic,
+            source=topic_data.get('source', 'unknown'),
+            score=trend_score,
+            metadata=topic_data.get('metadata', {})
+        )
+        
+        # Step 2: Generate content
+        logger.info("Step 2: Generating video content...")
+        content = self.content_generator.generate_video_content(topic)
+        logger.info(f"Generated title: {content['title']}")
+        
+        # Step 2.5: Get post-content enhancements
+        enhancements = self.content_generator.get_post_content_enhancements(content, topic)
+        total_issues = sum(len(v) for k, v in enhancements.items() if k != "overall_suggestions")
+        if total_issues > 0:
+            logger.info(f"📊 Content analysis: {total_issues} enhancement suggestions found")
+            # Log key suggestions
+            if enhancements.get("script_enhancements"):
+                logger.info(f"   Script: {enhancements['script_enhancements'][0]}")
+            if enhancements.get("title_enhancements"):
+                logger.info(f"   Title: {enhancements['title_enhancements'][0]}")
+        else:
+            logger.info("✅ Content quality check passed - all enhancements OK")
+        
+        return {'topic': topic, 'trend_score': trend_score, 'content': content}
+    
+    def _save_created_video(self, job: dict, video_path: str) -> dict:
+        """Step 4: record the rendered video so it can be uploaded (or retried later)"""
+        # Step 4: Save video to database
+        video_id = os.path.basename(video_path).replace('.mp4', '')
+        video_db_data = {
+            'video_id': video_id,
+            'title': job['content']['title'],
+            'description': job['content']['description'],
+            'topic': job['topic'],
+            'trend_score': job['trend_score'],
+            'status': 'created',
+            'video_file_path': video_path,
+            'tags': job['content'].get('tags', [])
+        }
+        self.db.add_video(video_db_data)
+        trace = tracing.current_trace()
+        if trace:
+            trace.video_id = video_id  # Lets /jobs/{id}/trace pull in the video's later upload trace
+        job['video_id'] = video_id
+        job['video_path'] = video_path
+        return job
+    
+    def _upload_created_video(self, job: dict) -> Optional[dict]:
+        """Step 5: upload a created video; failures are saved to the retry queue"""
+        content = job['content']
+        video_id = job['video_id']
+        video_path = job['video_path']
+        
+        # Step 5: Upload to YouTube
+        logger.info("Step 4: Uploading to YouTube...")
+        try:
+            upload_result = self.youtube_uploader.upload_video(
+                video_path=video_path,
+                title=content['title'],
+                description=content['description'],
+                tags=content.get('tags', []),
+                progress=self._progress_reporter(job, 'upload')
+            )
+            
+            if upload_result:
+                # Update database
+                self.db.update_video_upload(
+                    video_id=video_id,
+                    youtube_url=upload_result['url']
+                )
+                
+                # Update daily stats
+                today = date.today().isoformat()
+                self.db.update_daily_stats(
+                    today,
+                    videos_created=1,
+                    videos_uploaded=1
+                )
+                
+                # Send email notification
+                self.email_reporter.send_video_upload_notification(
+                    content['title'],
+                    upload_result['url']
+                )
+                
+                logger.info(f"Successfully uploaded: {upload_result['url']}")
+                return upload_result
+            else:
+                logger.error("Upload failed - no result returned")
+        
+        except Exception as upload_error:
+            logger.error(f"Upload error: {upload_error}")
+            logger.error(traceback.format_exc())
+            
+            # Check if it's a recoverable error
+            from core.error_recovery import ErrorRecovery
+            if ErrorRecovery.handle_api_error(upload_error, "YouTube", max_retries=1):
+                logger.info("Attempting automatic recovery...")
+                # Retry upload once after error recovery
+                try:
+                    upload_result = self.youtube_uploader.upload_video(
+                        video_path=video_path,
+                        title=content['title'],
+                        description=content['description'],
+                        tags=content.get('tags', [])
+                    )
+                    if upload_result:
+                        self.db.update_video_upload(video_id, upload_result['url'])
+                        today = date.today().isoformat()
+                        self.db.update_daily_stats(today, videos_created=1, videos_uploaded=1)
+                        logger.info(f"✅ Recovery successful: {upload_result['url']}")
+                        return upload_result
+                except Exception as retry_error:
+                    logger.error(f"Recovery attempt failed: {retry_error}")
+            
+            # Video was created but upload failed - save for retry
+            error_msg = str(upload_error)
+            self.db.mark_upload_failed(video_id, error_msg)
+            
+            # Check if it's a token expiration issue - send alert
+            if 'invalid_grant' in error_msg.lower() or 'expired' in error_msg.lower():
+                try:
+                    from email_reporter import EmailReporter
+                    emailer = EmailReporter()
+                    emailer._send_email(
+                        subject="🚨 YouTube Token Expired - Action Required",
+                        body=f"""
+                        <h2>YouTube Token Expiration Alert</h2>
+                        <p>Your YouTube refresh token has expired and needs regeneration.</p>
+                        <p><strong>Error:</strong> {error_msg[:200]}</p>
+                        <p><strong>To fix:</strong></p>
+                        <ol>
+                            <li>In Replit Shell, run: <code>python regenerate_youtube_token.py</code></li>
+                            <li>Follow the prompts to get a new refresh token</li>
+                            <li>Update YOUTUBE_REFRESH_TOKEN in Replit Secrets</li>
+                            <li>Restart the app</li>
+                            <li>Pending videos will automatically retry once token is fixed</li>
+                        </ol>
+                        <p>The system will continue creating videos but uploads will fail until token is regenerated.</p>
+                        """
+                    )
+                    logger.info("Email alert sent about token expiration")
+                except Exception as email_error:
+                    logger.warning(f"Could not send email alert: {email_error}")
+            
+            # Update stats
+            today = date.today().isoformat()
+            self.db.update_daily_stats(today, videos_created=1)
+            
+            logger.warning(f"Video created but upload failed. Saved to retry queue. Error: {error_msg[:100]}")
+        
+        return None
+    
+    def _queue_created_video(self, job: dict) -> dict:
+        """Step 5 with the upload scheduler: queue the video for upload and let rendering move on"""
+        self.db.update_daily_stats(date.today().isoformat(), videos_created=1)
+        publish_at = None
+        ticket = job.get('ticket')
+        if self.inventory and ticket and ticket['ctx'].payload.get('source') == 'inventory':
+            # Rendered ahead: takes the next free publish slot, uploaded with publishAt
+            publish_at = self.inventory.assign_slot(job['video_id'])
+        self.get_upload_scheduler().submit(job['video_id'])
+        logger.info(f"Queued for upload: {job['content']['title']}"
+                    + (f" (publishes at {publish_at})" if publish_at else ""))
+        return {'video_id': job['video_id'], 'queued': True, 'publish_at': publish_at}
+    
+    def get_upload_scheduler(self) -> UploadScheduler:
+        """The upload scheduler (created on first use; start_autonomous_mode also starts its loop)"""
+        if self.upload_scheduler is None:
+            self.upload_scheduler = UploadScheduler(self.youtube_uploader, on_uploaded=self._notify_uploaded,
+                                                    db=self.db)
+        return self.upload_scheduler
+    
+    def _notify_uploaded(self, video: dict, upload_result: dict):
+        self.email_reporter.send_video_upload_notification(video['title'], upload_result['url'])
+    
+    def build_pipeline(self, render_backend: Optional[str] = None) -> BatchPipeline:
+        """
+        Cross-video pipeline: prepare (topic, content, TTS, b-roll) → render → upload
+        Video N+1 is prepared while video N renders and video N-1 uploads;
+        upload spacing only delays the upload stage. With the upload scheduler the last stage
+        only queues the video, so rendering carries on even when the upload quota is used up
+        Items are dicts; an item carrying a 'ticket' (see _run_generate_job) is reported back when it finishes
+        """
+        render_local = threading.local()
+        
+        def prepare(item):
+            job = self._discover_and_write()
+            if not job:
+                return None
+            job['ticket'] = item.get('ticket') if isinstance(item, dict) else None
+            job['render_backend'] = item.get('render_backend') if isinstance(item, dict) else None
+            job['assets'] = self.video_creator.prepare_assets(job['content'], job['topic'])
+            return job
+        
+        def render(job):
+            # Each render worker gets its own VideoCreator (per-render caption state)
+            if not hasattr(render_local, 'video_creator'):
+                render_local.video_creator = VideoCreator()
+            backend = job.get('render_backend') or render_backend
+            assets = job.pop('assets')
+            video_path = None
+            if Config.REMOTE_RENDER_ENABLED:
+                # Hand the render to a remote worker; None means nobody claimed it in time
+                ticket = job.get('ticket')
+                video_path = RemoteRenderDispatcher(self.job_queue).render(
+                    assets, backend, ctx=ticket['ctx'] if ticket else None)
+            if not video_path:
+                logger.info(f"Rendering: {job['topic']}")
+                video_path = render_local.video_creator.render_prepared(
+                    assets, render_backend=backend, progress=self._progress_reporter(job, 'render'))
+            logger.info(f"Video created: {video_path}")
+            return self._save_created_video(job, video_path)
+        
+        if Config.UPLOAD_SCHEDULER_ENABLED:
+            # Spacing and quota are the scheduler's business
+            upload_stage = PipelineStage('upload', self._tracked_stage('upload', self._queue_created_video, final=True))
+        else:
+            upload_stage = PipelineStage('upload', self._tracked_stage('upload', self._upload_created_video, final=True),
+                                         workers=Config.PIPELINE_UPLOAD_WORKERS,
+                                         min_interval_seconds=Config.UPLOAD_SPACING_SECONDS)
+        
+        return BatchPipeline([
+            PipelineStage('prepare', self._tracked_stage('prepare', prepare),
+                          workers=Config.PIPELINE_PREPARE_WORKERS),
+            PipelineStage('render', self._tracked_stage('render', render),
+                          workers=Config.PIPELINE_RENDER_WORKERS),
+            upload_stage
+        ], queue_size=Config.PIPELINE_QUEUE_SIZE)
+    
+    @staticmethod
+    def _progress_reporter(job: dict, stage: str, job_id: Optional[int] = None):
+        """Callback publishing a 'progress' event (job id, stage, percent) each time the percentage changes"""
+        ticket = job.get('ticket') if isinstance(job, dict) else None
+        if job_id is None and ticket:
+            job_id = ticket['ctx'].job['id']
+        title = (job.get('content') or {}).get('title') if isinstance(job, dict) else None
+        last = {'percent': -1}
+        
+        def report(fraction: float):
+            percent = max(0, min(100, int(fraction * 100)))
+            if percent != last['percent']:
+                last['percent'] = percent
+                publish('progress', job_id=job_id, stage=stage, percent=percent, title=title)
+        return report
+    
+    @staticmethod
+    def _tracked_stage(stage: str, func, final: bool = False):
+        """
+        Wrap a pipeline stage so a queued job waiting on the item sees its stage, failure or result
+        Spans go to the waiting job's trace; batch items get a trace of their own, stored when they leave
+        """
+        def run(item):
+            ticket = item.get('ticket') if isinstance(item, dict) else None
+            if ticket:
+                ticket['ctx'].set_stage(stage)
+            trace = item.get('trace') if isinstance(item, dict) else None
+            if trace is None:
+                trace = ticket['ctx'].trace if ticket else tracing.start_trace('video')
+            try:
+                with tracing.activate(trace), tracing.span(f"pipeline.{stage}"):
+                    output = func(item)
+            except Exception as e:
+                if ticket:
+                    ticket.update(stage=stage, error=e)
+                    ticket['done'].set()
+                else:
+                    tracing.save(trace, e)
+                raise
+            if isinstance(output, dict) and not final:
+                output['trace'] = trace
+            if output is None or final:
+                if ticket:
+                    ticket.update(stage=stage, job=item, output=output)
+                    ticket['done'].set()
+                else:
+                    tracing.save(trace)
+            return output
+        return run
+    
+    def _run_generate_job(self, ctx: JobContext) -> dict:
+        """
+        Job handler: optionally retry a failed upload, otherwise push one video through the pipeline
+        Waits for the video to leave the pipeline so the job's lease covers the whole run
+        """
+        payload = ctx.payload
+        if payload.get('retry_failed_first', True) and not Config.UPLOAD_SCHEDULER_ENABLED:
+            ctx.set_stage('retry_upload')
+            retry_result = self.retry_failed_upload()
+            if retry_result:
+                logger.info("Successfully retried a failed upload, skipping new generation")
+                return {'retried_upload': True, 'url': retry_result.get('url')}
+        
+        ticket = {'ctx': ctx, 'done': threading.Event()}
+        ctx.set_stage('waiting_for_pipeline')
+        self.pipeline.submit({'ticket': ticket, 'render_backend': payload.get('render_backend')})
+        ticket['done'].wait()
+        
+        if ticket.get('error') is not None:
+            raise RuntimeError(f"{ticket['stage']} failed: {ticket['error']}")
+        job = ticket.get('job') or {}
+        if ticket['stage'] != 'upload':
+            raise RuntimeError(f"video dropped at {ticket['stage']} stage (no suitable topic?)")
+        # A failed upload is already in the retry queue - don't regenerate the video for it
+        output = ticket.get('output')
+        queued = bool(output and output.get('queued'))
+        return {
+            'video_id': job.get('video_id'),
+            'title': job.get('content', {}).get('title'),
+            'uploaded': bool(output) and not queued,
+            'queued_for_upload': queued,
+            'publish_at': output.get('publish_at') if output else None,
+            'url': output.get('url') if output else None
+        }
+    
+    def _run_retry_upload_job(self, ctx: JobContext) -> dict:
+        """Job handler: upload queued/failed videos (all the quota allows with the scheduler, otherwise one)"""
+        ctx.set_stage('retry_upload')
+        if Config.UPLOAD_SCHEDULER_ENABLED:
+            summary = self.get_upload_scheduler().drain()
+            return {
+                'retried_upload': bool(summary['uploaded']),
+                'uploaded': summary['uploaded'],
+                'failed': summary['failed'],
+                'remaining': summary['remaining'],
+                'stopped': summary['stopped'],
+                'urls': [r['url'] for r in summary['results']]
+            }
+        result = self.retry_failed_upload()
+        return {'retried_upload': bool(result), 'url': result.get('url') if result else None}
+    
+    def _run_generate_no_upload_job(self, ctx: JobContext) -> dict:
+        """Job handler: create a video from the top trending topic without uploading it (dashboard button)"""
+        ctx.set_stage('discover')
+        topics = self.topic_agent.discover_trending_topics()
+        if not topics:
+            raise RuntimeError("No topics found")
+        
+        topic = topics[0]
+        topic_title = topic.get('title', topic.get('topic', 'Unknown Topic'))
+        logger.info(f"📝 Selected topic: {topic_title}")
+        
+        ctx.set_stage('content')
+        content = self.content_generator.generate_video_content(topic_title)
+        
+        ctx.set_stage('render')
+        # Own VideoCreator: jobs can run alongside the pipeline's renders
+        video_path = VideoCreator().create_video(
+            content, topic_title,
+            progress=self._progress_reporter({'content': content}, 'render', job_id=ctx.job['id']))
+        logger.info(f"✅ Video created: {video_path}")
+        
+        video_id = os.path.splitext(os.path.basename(video_path))[0]
+        self.db.add_video({
+            'video_id': video_id,
+            'title': content.get('title', topic_title),
+            'topic': topic_title,
+            'status': 'created',
+            'video_file_path': video_path,
+            'tags': content.get('tags', [])
+        })
+        return {
+            'video_id': video_id,
+            'video_path': video_path,
+            'title': content.get('title', topic_title)
+        }
+    
+    def start_job_worker(self) -> JobWorker:
+        """Start the pipeline and the worker threads that drain the job queue"""
+        if self.pipeline is None:
+            self.pipeline = self.build_pipeline().start()
+        if self.job_worker is None:
+            self.job_worker = JobWorker(self.job_queue, {
+                'generate': self._run_generate_job,
+                'retry_upload': self._run_retry_upload_job,
+                'generate_no_upload': self._run_generate_no_upload_job
+            }).start()
+        return self.job_worker
+    
+    def _enqueue_scheduled_video(self):
+        """Scheduler callback: queue a scheduled video (manual requests run ahead of it)"""
+        job_id = self.job_queue.enqueue('generate', {'source': 'schedule'}, priority=JobQueue.PRIORITY_SCHEDULED)
+        logger.info(f"Queued scheduled video generation (job {job_id})")
+    
+    def _enqueue_inventory_video(self):
+        """Inventory callback: queue a render-ahead video (manual requests run ahead of it)"""
+        job_id = self.job_queue.enqueue('generate', {'source': 'inventory'}, priority=JobQueue.PRIORITY_SCHEDULED)
+        logger.info(f"Queued render-ahead video generation (job {job_id})")
+    
     def start_autonomous_mode(self, start_web_server=True):
         """Start fully autonomous operation with scheduled generation"""
         logger.info("Starting autonomous mode...")
         
-        # Create scheduler
-        self.scheduler = VideoScheduler(self.generate_and_upload_video)
+        # Scheduled and manual videos are queued as jobs and flow through the pipeline,
+        # so overlapping slots prepare/render/upload concurrently
+        self.start_job_worker()
+        
+        # Create scheduler (in inventory mode it only picks the publish slots; videos are rendered ahead)
+        inventory_mode = Config.INVENTORY_MODE_ENABLED and Config.UPLOAD_SCHEDULER_ENABLED
+        if Config.INVENTORY_MODE_ENABLED and not Config.UPLOAD_SCHEDULER_ENABLED:
+            logger.warning("INVENTORY_MODE_ENABLED needs UPLOAD_SCHEDULER_ENABLED - generating at the slots instead")
+        self.scheduler = VideoScheduler(self._enqueue_scheduled_video, inventory_mode=inventory_mode)
         self.scheduler.start()
+        if inventory_mode:
+            self.inventory = InventoryManager(self.scheduler, self._enqueue_inventory_video, db=self.db,
+                                              job_queue=self.job_queue).start()
+        
+        # Uploads drain the queue of rendered videos on their own schedule
+        if Config.UPLOAD_SCHEDULER_ENABLED:
+            self.get_upload_scheduler().start()
         
         # Schedule daily report email (evening)
         from apscheduler.schedulers.background import BackgroundScheduler
@@ -348,6 +651,31 @@ class YouTubeShortsGenerator:
             hour=22,  # 10 PM
             minute=0
         )
+        
+        # Refresh views/likes of uploaded videos (due videos only, cheap ETag-conditional batches)
+        if Config.STATS_INGEST_ENABLED:
+            from core.stats_ingester import StatsIngester
+            from core.youtube_auth import get_credential_manager
+            # The manager, not a credentials snapshot: refreshes stay under its lock and token recovery reaches us
+            self.stats_ingester = StatsIngester(auth=get_credential_manager())
+            report_scheduler.add_job(
+                func=self.stats_ingester.run_once,
+                trigger='interval',
+                minutes=Config.STATS_INGEST_INTERVAL_MINUTES,
+                max_instances=1,
+                coalesce=True
+            )
+        
+        # Keep the publish slots ahead of us filled (idle hours fill the buffer)
+        if self.inventory:
+            report_scheduler.add_job(
+                func=self.inventory.top_up,
+                trigger='interval',
+                minutes=Config.INVENTORY_CHECK_MINUTES,
+                next_run_time=datetime.now(),
+                max_instances=1,
+                coalesce=True
+            )
         report_scheduler.start()
         
         logger.info("Autonomous mode active - system will run continuously")
@@ -366,26 +694,25 @@ class YouTubeShortsGenerator:
                             "generate": "POST /generate - Trigger manual video generation",
                             "retry_upload": "POST /retry-upload - Retry failed upload",
                             "failed_uploads": "GET /failed-uploads - List failed uploads",
+                            "jobs": "GET /jobs - Recent jobs, GET /jobs/{id} - Job status",
+                            "trace": "GET /jobs/{id}/trace - Stage timings as Chrome trace JSON (Perfetto)",
                             "health": "GET /health - Check system health"
                         }
                     }
                 
                 @app.post("/generate")
-                def trigger_generation():
-                    """Manual trigger to generate one video now (for testing)"""
+                def trigger_generation(backend: Optional[str] = None):
+                    """Manual trigger to generate one video now (queued ahead of scheduled runs)"""
                     try:
-                        logger.info("Manual video generation triggered via API")
-                        # Run in background thread to avoid blocking
-                        import threading
-                        def generate_async():
-                            self.generate_and_upload_video()
-                        
-                        thread = threading.Thread(target=generate_async, daemon=True)
-                        thread.start()
-                        
+                        logger.info(f"Manual video generation triggered via API (backend: {backend or Config.RENDER_BACKEND})")
+                        job_id = self.job_queue.enqueue(
+                            'generate', {'source': 'api', 'render_backend': backend},
+                            priority=JobQueue.PRIORITY_MANUAL
+                        )
                         return {
                             "status": "success",
-                            "message": "Video generation started in background - check logs for progress"
+                            "job_id": job_id,
+                            "message": f"Video generation queued as job {job_id} - see GET /jobs/{job_id}"
                         }
                     except Exception as e:
                         logger.error(f"Manual generation error: {e}")
@@ -396,21 +723,46 @@ class YouTubeShortsGenerator:
                     """Retry uploading a failed video"""
                     try:
                         logger.info("Manual retry of failed upload triggered via API")
-                        import threading
-                        def retry_async():
-                            self.retry_failed_upload()
-                        
-                        thread = threading.Thread(target=retry_async, daemon=True)
-                        thread.start()
-                        
+                        job_id = self.job_queue.enqueue('retry_upload', {'source': 'api'},
+                                                        priority=JobQueue.PRIORITY_MANUAL)
                         return {
                             "status": "success",
-                            "message": "Retry upload started in background - check logs for progress"
+                            "job_id": job_id,
+                            "message": f"Retry upload queued as job {job_id} - see GET /jobs/{job_id}"
                         }
                     except Exception as e:
                         logger.error(f"Retry upload error: {e}")
                         return {"status": "error", "message": str(e)}
                 
+                @app.get("/jobs")
+                def list_jobs(state: Optional[str] = None, limit: int = 50):
+                    """Recent jobs and counts per state"""
+                    try:
+                        return {
+                            "status": "success",
+                            "counts": self.job_queue.get_stats(),
+                            "jobs": self.job_queue.list_jobs(state=state, limit=min(limit, 500))
+                        }
+                    except Exception as e:
+                        return {"status": "error", "message": str(e)}
+                
+                @app.get("/jobs/{job_id}")
+                def get_job(job_id: int):
+                    """State, stage, timings and result of one job"""
+                    job = self.job_queue.get(job_id)
+                    if not job:
+                        return {"status": "error", "message": f"Job {job_id} not found"}
+                    return {"status": "success", "job": job}
+                
+                @app.get("/jobs/{job_id}/trace")
+                def get_job_trace(job_id: int):
+                    """Chrome trace JSON of a job (and its video's upload) - open it in https://ui.perfetto.dev"""
+                    traces = tracing.job_traces(self.db, job_id)
+                    if not traces:
+                        return {"status": "error", "message": f"No trace stored for job {job_id}"}
+                    return JSONResponse(tracing.chrome_trace(traces), headers={
+                        "Content-Disposition": f'attachment; filename="job-{job_id}-trace.json"'})
+                
                 @app.get("/failed-uploads")
                 def get_failed_uploads():
                     """Get list of failed uploads"""
@@ -438,6 +790,9 @@ class YouTubeShortsGenerator:
                     return {
                         "status": "healthy",
                         "scheduler_running": self.scheduler is not None,
+                        "jobs": self.job_queue.get_stats(),
+                        "uploads": self.upload_scheduler.get_status() if self.upload_scheduler else None,
+                        "inventory": self.inventory.status() if self.inventory else None,
                         "videos_per_day": Config.VIDEOS_PER_DAY
                     }
                 
@@ -451,6 +806,12 @@ class YouTubeShortsGenerator:
                     logger.warning(f"Could not mount web UI dashboard: {ui_error}")
                     logger.info("Dashboard is optional - API endpoints still work")
                 
+                # Render worker API (remote machines pull render jobs)
+                if Config.WORKER_TOKEN:
+                    from web.worker_api import app as worker_app
+                    app.mount("/worker", worker_app)
+                    logger.info("Render worker API mounted at /worker")
+                
                 # Start FastAPI server in background thread
                 import threading
                 def run_server():
@@ -477,6 +838,12 @@ class YouTubeShortsGenerator:
             logger.info("Shutting down...")
             if self.scheduler:
                 self.scheduler.stop()
+            if self.job_worker:
+                self.job_worker.stop()
+            if self.pipeline:
+                self.pipeline.close()
+            if self.upload_scheduler:
+                self.upload_scheduler.stop()
             report_scheduler.shutdown()
     
     def generate_batch(self, count: Optional[int] = None):
@@ -486,17 +853,29 @@ class YouTubeShortsGenerator:
         
         logger.info(f"Generating batch of {count} videos...")
         
+        # Like generate_and_upload_video: a successful retry of a failed upload takes a slot
         results = []
-        for i in range(count):
-            logger.info(f"\n--- Video {i+1}/{count} ---\n")
-            result = self.generate_and_upload_video()
-            results.append(result)
-            
-            if i < count - 1:
-                # Wait between videos to avoid rate limits
-                import time
-                logger.info("Waiting 5 minutes before next video...")
-                time.sleep(300)
+        while len(results) < count and not Config.UPLOAD_SCHEDULER_ENABLED:
+            retry_result = self.retry_failed_upload()
+            if not retry_result:
+                break
+            results.append(retry_result)
+        
+        remaining = count - len(results)
+        if remaining:
+            pipeline = self.build_pipeline()
+            results += pipeline.run({} for _ in range(remaining))
+            for stage, stats in pipeline.get_stats().items():
+                logger.info(f"Pipeline {stage}: {stats['processed']} done, {stats['failed']} failed, "
+                            f"busy {stats['busy_seconds']:.0f}s ({stats['workers']} worker(s))")
+        
+        if Config.UPLOAD_SCHEDULER_ENABLED:
+            # The pipeline only queued the new videos - upload as many as today's quota allows
+            summary = self.get_upload_scheduler().drain()
+            results = [r for r in results if r and not r.get('queued')] + summary['results']
+            if summary['remaining']:
+                logger.info(f"{summary['remaining']} video(s) left in the upload queue "
+                            f"(stopped: {summary['stopped']}) - the scheduler uploads them later")
         
         logger.info(f"\nBatch complete: {len([r for r in results if r])}/{count} videos uploaded")
         
@@ -505,8 +884,33 @@ class YouTubeShortsGenerator:
         
         return results
 
+def run_render_worker(args: list):
+    """Pull render jobs from the main server (RENDER_SERVER_URL / WORKER_TOKEN) until interrupted"""
+    import argparse
+    from core.render_worker import RenderWorker
+    
+    parser = argparse.ArgumentParser(prog="main.py worker")
+    parser.add_argument("--server", default=Config.RENDER_SERVER_URL, help="Main server URL")
+    parser.add_argument("--name", default=None, help="Worker name (default: hostname-pid)")
+    options = parser.parse_args(args)
+    
+    worker = RenderWorker(server_url=options.server, name=options.name)
+    try:
+        worker.run_forever()
+    except KeyboardInterrupt:
+        logger.info("Render worker stopped")
+
 def main():
     """Main entry point"""
+    # Render workers only render - they don't need YouTube/email clients
+    if len(sys.argv) > 1 and sys.argv[1] == "worker":
+        run_render_worker(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "rebuild-stats":
+        Database().rebuild_stats_aggregates()
+        logger.info("Stats aggregates rebuilt from the videos table")
+        return
+    
     generator = YouTubeShortsGenerator()
     
     # Check command line arguments
@@ -525,6 +929,8 @@ def main():
             print("  python main.py autonomous  # Start autonomous mode (default)")
             print("  python main.py batch [count]  # Generate batch of videos")
             print("  python main.py single  # Generate one video")
+            print("  python main.py worker [--server URL] [--name NAME]  # Remote render worker")
+            print("  python main.py rebuild-stats  # Recompute dashboard stats aggregates")
     else:
         # Default: autonomous mode
         generator.start_autonomous_mode()
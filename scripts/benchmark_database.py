@@ -0,0 +1,119 @@
+"""
+Database micro-benchmark
+Compares the old access pattern (new sqlite3 connection per call, rollback journal, schema
+setup on every Database()) with pooled per-thread WAL connections, while reader threads
+hammer get_daily_stats and one writer runs add_video
+
+Usage: python scripts/benchmark_database.py [seconds] [readers]
+"""
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+import threading
+from datetime import date
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.database import Database, _migration_initial_schema, _migration_video_tags
+
+
+class LegacyDatabase(Database):
+    """The pre-pool behavior: every call opens its own connection, every construction re-runs schema setup"""
+
+    def get_connection(self):
+        return sqlite3.connect(self.db_path)
+
+    def init_database(self):
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        _migration_initial_schema(cursor)
+        _migration_video_tags(cursor)  # add_video writes tags
+        conn.commit()
+        conn.close()
+
+
+def is_lock_error(error: sqlite3.OperationalError) -> bool:
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+
+def run(db_factory, db_path: str, seconds: float, readers: int):
+    today = date.today().isoformat()
+    db_factory(db_path).update_daily_stats(today, videos_created=1)
+    stop = threading.Event()
+    counts = {'writes': 0, 'reads': 0, 'errors': 0}
+    failures = []  # Anything but contention (schema mismatch, bad SQL ...) invalidates the run
+    lock = threading.Lock()
+
+    def count_error(error: sqlite3.OperationalError):
+        with lock:
+            if is_lock_error(error):
+                counts['errors'] += 1
+            else:
+                failures.append(error)
+                stop.set()
+
+    def writer():
+        n = 0
+        while not stop.is_set():
+            try:
+                # New Database() per operation, like web_ui/QuotaManager/NotificationManager do
+                db_factory(db_path).add_video({'video_id': f"bench_{threading.get_ident()}_{n}",
+                                               'title': 'bench', 'topic': 'bench', 'status': 'created'})
+                n += 1
+                with lock:
+                    counts['writes'] += 1
+            except sqlite3.OperationalError as e:
+                count_error(e)
+
+    def reader():
+        while not stop.is_set():
+            try:
+                db_factory(db_path).get_daily_stats(today)
+                with lock:
+                    counts['reads'] += 1
+            except sqlite3.OperationalError as e:
+                count_error(e)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    stop.wait(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    if failures:
+        raise RuntimeError(f"{len(failures)} non-lock database error(s), first: {failures[0]}")
+    return {key: value / seconds for key, value in counts.items()}
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    work = tempfile.mkdtemp(prefix="db_bench_")
+
+    print(f"📊 {seconds:.0f}s per run, 1 writer (add_video) + {readers} readers (get_daily_stats)\n")
+    results = {}
+    for label, factory in (("before (connect per call)", LegacyDatabase), ("after (pooled WAL)", Database)):
+        db_path = os.path.join(work, f"{label.split()[0]}.sqlite")
+        try:
+            results[label] = run(factory, db_path, seconds, readers)
+        except RuntimeError as e:
+            print(f"❌ {label}: {e}")
+            return 1
+        r = results[label]
+        print(f"{label:<28} add_video {r['writes']:>9.0f} ops/s   get_daily_stats {r['reads']:>9.0f} ops/s   "
+              f"lock errors {r['errors']:.1f}/s")
+
+    before, after = results.values()
+    print(f"\nSpeedup: add_video x{after['writes'] / max(before['writes'], 1e-9):.1f}, "
+          f"get_daily_stats x{after['reads'] / max(before['reads'], 1e-9):.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
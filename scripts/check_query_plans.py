@@ -0,0 +1,166 @@
+"""
+Query plan check and large-table benchmark
+Runs the hot Database/QuotaManager/NotificationManager queries, captures the SQL they
+actually execute and fails if EXPLAIN QUERY PLAN shows a full table scan or a sort
+that an index should have avoided. With --seed it first fills a throwaway database with
+N rows per table and reports the per-call latency of each query
+
+Usage: python scripts/check_query_plans.py [--seed 1000000] [--db path] [--repeat 200]
+Exit code 1 if any plan regresses (use in CI)
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import Config
+from core.database import Database
+from core.db_pool import get_connection_manager
+
+FULL_SCAN = re.compile(r'^SCAN (videos|trends|quota_logs|topic_totals)\b(?!.*USING)')
+SORT = 'USE TEMP B-TREE FOR ORDER BY'
+
+
+def hot_queries(db_path: str):
+    """(label, call, allow_sort) for every query that must stay indexed"""
+    from core.quota_manager import QuotaManager
+    from core.notifications import NotificationManager
+    from core.stats_ingester import StatsIngester
+
+    db = Database(db_path)
+    quota = QuotaManager()
+    quota.db = db
+    notifications = NotificationManager()
+    notifications.db = db
+    ingester = StatsIngester(db_path=db_path)
+    today = datetime.now().date().isoformat()
+    return [
+        ("get_failed_uploads", lambda: db.get_failed_uploads(max_retries=3), False),
+        ("get_upload_queue", lambda: db.get_upload_queue(max_retries=3, limit=50), False),
+        ("get_scheduled_videos",
+         lambda: db.get_scheduled_videos(datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'), limit=50), False),
+        ("get_unused_trends", lambda: db.get_unused_trends(limit=10), False),
+        ("get_most_watched_videos", lambda: db.get_most_watched_videos(limit=10), False),
+        ("get_recent_videos (first page)", lambda: db.get_recent_videos(limit=20), False),
+        ("get_recent_videos (deep page)", lambda: db.get_recent_videos(limit=20, after=1000), False),
+        ("get_daily_stats", lambda: db.get_daily_stats(today), False),
+        ("get_overall_stats", db.get_overall_stats, False),
+        ("get_most_watched_topics", lambda: db.get_most_watched_topics(limit=10), False),
+        ("quota usage (ledger)", quota.get_quota_usage_estimate, False),
+        # Groups a 7-day index range by day - sorting those few groups is fine
+        ("get_quota_history", lambda: quota.get_quota_history(7), True),
+        ("check_token_expiry", notifications.check_token_expiry, False),
+        # Sorts only the last 7 days' matches
+        ("check_viral_videos", lambda: notifications.check_viral_videos(10000), True),
+        ("stats ingester due videos", lambda: ingester._due_batches(datetime.utcnow(), 20), False),
+    ]
+
+
+def capture_sql(db_path: str, call):
+    """Run call() and return the SELECT statements it sent to SQLite (parameters inlined)"""
+    conn = get_connection_manager(db_path).connection()._conn
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        call()
+    finally:
+        conn.set_trace_callback(None)
+    return [s for s in statements if s.lstrip().upper().startswith('SELECT')]
+
+
+def check_plans(db_path: str) -> bool:
+    conn = get_connection_manager(db_path).connection()
+    ok = True
+    for label, call, allow_sort in hot_queries(db_path):
+        for sql in capture_sql(db_path, call):
+            plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()]
+            problems = [step for step in plan if FULL_SCAN.match(step) or (SORT in step and not allow_sort)]
+            status = "❌" if problems else "✅"
+            ok = ok and not problems
+            print(f"{status} {label}: {' | '.join(plan)}")
+    return ok
+
+
+def seed(db_path: str, rows: int):
+    """Fill videos, trends and quota_logs with `rows` rows each, spread over ten years"""
+    Database(db_path)
+    conn = get_connection_manager(db_path).connection()
+    now = datetime.now()
+    span = timedelta(days=3650).total_seconds()
+    rng = random.Random(42)
+
+    def stamp(i):
+        # Oldest first, the last rows land on today
+        return (now - timedelta(seconds=span * (1 - i / rows))).strftime('%Y-%m-%d %H:%M:%S')
+
+    print(f"🌱 Seeding {rows:,} rows per table...")
+    started = time.time()
+    conn.executemany("""
+        INSERT INTO videos (video_id, title, topic, created_at, youtube_url, views, likes, status,
+                            video_file_path, retry_count)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        (f"seed_{i}", f"Video {i}", f"topic {i % 500}", stamp(i),
+         None if i % 20000 == 0 else f"https://youtube.com/shorts/{i}",
+         rng.randint(0, 50000), rng.randint(0, 2000),
+         'upload_failed' if i % 20000 == 0 else 'uploaded',
+         f"output/seed_{i}.mp4", rng.randint(0, 5) if i % 20000 == 0 else 0)
+        for i in range(rows)
+    ))
+    conn.executemany("INSERT INTO trends (topic, source, score, discovered_at, used) VALUES (?, ?, ?, ?, ?)", (
+        (f"trend {i}", 'seed', rng.random() * 100, stamp(i), 0 if i % 1000 == 0 else 1) for i in range(rows)
+    ))
+    conn.executemany("INSERT INTO quota_logs (operation, cost, timestamp, pacific_day) VALUES (?, ?, ?, ?)", (
+        ('videos.insert' if i % 2 else 'channels.list', 1600 if i % 2 else 1, stamp(i), stamp(i)[:10])
+        for i in range(rows)
+    ))
+    conn.commit()
+    conn.execute("ANALYZE")
+    print(f"🌱 Seeded in {time.time() - started:.1f}s")
+
+
+def benchmark(db_path: str, repeat: int):
+    print(f"\n⏱️ Median latency over {repeat} calls:")
+    for label, call, _ in hot_queries(db_path):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        median = timings[len(timings) // 2] * 1000
+        flag = "⚠️" if median > 1 else "  "
+        print(f"{flag} {label:<30} {median:8.3f} ms  (p95 {timings[int(len(timings) * 0.95)] * 1000:.3f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", help="Database to check (default: a fresh temporary one)")
+    parser.add_argument("--seed", type=int, default=0, help="Rows per table to seed before checking")
+    parser.add_argument("--repeat", type=int, default=200, help="Calls per query for the benchmark")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="query_plans_"), "plans.sqlite")
+    # QuotaManager/NotificationManager open Config.DATABASE_PATH - point them at the same file
+    Config.DATABASE_PATH = db_path
+    Database(db_path)
+    if args.seed:
+        seed(db_path, args.seed)
+
+    ok = check_plans(db_path)
+    if args.seed:
+        benchmark(db_path, args.repeat)
+    print("\n✅ All hot queries use indexes" if ok else "\n❌ Query plan regression")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Export stored traces as Chrome trace JSON
+Open the output in https://ui.perfetto.dev (or chrome://tracing) to see where a job's time went;
+a per-span summary (total seconds, calls) is printed as well
+
+Usage: python scripts/export_trace.py (--job 42 | --video 20260101_120000 | --latest [N]) [-o trace.json]
+"""
+import sys
+import json
+import argparse
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core import tracing
+from core.database import Database
+
+
+def print_summary(traces):
+    for trace in traces:
+        label = trace['name'] + (f" job {trace['job_id']}" if trace['job_id'] else '') \
+            + (f" ({trace['video_id']})" if trace['video_id'] else '')
+        error = trace['attrs'].get('error')
+        print(f"\n🧵 {label}: {trace['duration_seconds']:.2f}s, {len(trace['spans'])} spans"
+              + (f" - ❌ {error}" if error else ''))
+        totals = {}
+        for record in trace['spans']:
+            seconds, calls = totals.get(record['name'], (0.0, 0))
+            totals[record['name']] = (seconds + record['end'] - record['start'], calls + 1)
+        for name, (seconds, calls) in sorted(totals.items(), key=lambda item: -item[1][0]):
+            print(f"   {name:<28} {seconds:9.3f}s  x{calls}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export stored traces as Chrome trace JSON")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--job', type=int, help="Job id (includes the upload of the video it made)")
+    target.add_argument('--video', help="Local video id")
+    target.add_argument('--latest', type=int, nargs='?', const=1, help="The N most recent traces")
+    parser.add_argument('-o', '--output', default='trace.json', help="Output file (default: trace.json)")
+    args = parser.parse_args()
+
+    db = Database()
+    if args.job is not None:
+        traces = tracing.job_traces(db, args.job)
+    elif args.video:
+        traces = db.get_traces(video_id=args.video)
+    else:
+        traces = db.get_traces(limit=args.latest)
+
+    if not traces:
+        print("❌ No traces found (is TRACING_ENABLED on, and did the job run since?)")
+        return 1
+
+    print_summary(traces)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(tracing.chrome_trace(traces), f)
+    print(f"\n✅ Wrote {args.output} - open it in https://ui.perfetto.dev")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,244 @@
+"""
+Local stand-in for the YouTube resumable upload endpoint
+Speaks the same protocol as https://www.googleapis.com/upload/youtube/v3/videos:
+POST ?uploadType=resumable returns a session URI in Location, PUTs with Content-Range append
+to the session (308 + Range: bytes=0-N until the last byte, then 200 with the video resource),
+and PUT with "Content-Range: bytes */<size>" asks how far the server got. Faults can be injected
+to exercise the client: random 503s, connections dropped mid-chunk and chunks only partly kept.
+Point the app at it with YOUTUBE_UPLOAD_BASE_URL=http://127.0.0.1:8767/upload/youtube/v3
+
+--demo uploads a random file in small chunks through ResumableUpload, "crashes" the process
+half way (the progress callback raises), then starts a fresh uploader like a restarted app
+would and checks it resumes from the stored offset and that the server got the exact file
+
+Usage: python scripts/fake_upload_server.py [--port 8767] [--fail-rate 0.1] [--drop-rate 0.05]
+       python scripts/fake_upload_server.py --demo [--size-mb 20]
+"""
+import os
+import sys
+import json
+import uuid
+import random
+import hashlib
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+class FakeUploads:
+    """Upload sessions in memory, fault injection knobs and byte counters"""
+
+    def __init__(self, fail_rate: float = 0.0, drop_rate: float = 0.0, partial_rate: float = 0.0,
+                 seed: int = 1):
+        self.fail_rate = fail_rate
+        self.drop_rate = drop_rate
+        self.partial_rate = partial_rate
+        self.rng = random.Random(seed)
+        self.sessions = {}
+        self.videos = {}
+        self.lock = threading.Lock()
+        self.bytes_received = 0
+        self.faults = {'503': 0, 'dropped': 0, 'partial': 0}
+        self.open_sessions = 0  # Started and not finished - i.e. uploads in progress
+        self.peak_open_sessions = 0
+
+    def fault(self) -> str:
+        with self.lock:
+            roll = self.rng.random()
+            if roll < self.fail_rate:
+                kind = '503'
+            elif roll < self.fail_rate + self.drop_rate:
+                kind = 'dropped'
+            elif roll < self.fail_rate + self.drop_rate + self.partial_rate:
+                kind = 'partial'
+            else:
+                return ''
+            self.faults[kind] += 1
+            return kind
+
+
+def make_handler(api: FakeUploads):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _reply(self, status: int, body: dict = None, headers: dict = None):
+            payload = json.dumps(body).encode() if body is not None else b''
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            if body is not None:
+                self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _range_header(self, session: dict) -> dict:
+            received = len(session['data'])
+            return {'Range': f"bytes=0-{received - 1}"} if received else {}
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            if url.path.rstrip('/') != '/upload/youtube/v3/videos' or query.get('uploadType') != ['resumable']:
+                self._reply(404, {'error': 'not found'})
+                return
+            metadata = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            session_id = uuid.uuid4().hex
+            with api.lock:
+                api.sessions[session_id] = {'size': int(self.headers['X-Upload-Content-Length']),
+                                            'metadata': metadata, 'data': bytearray()}
+                api.open_sessions += 1
+                api.peak_open_sessions = max(api.peak_open_sessions, api.open_sessions)
+            location = f"http://{self.headers['Host']}/upload/youtube/v3/videos?uploadType=resumable" \
+                       f"&upload_id={session_id}"
+            self._reply(200, headers={'Location': location})
+
+        def do_PUT(self):
+            session_id = parse_qs(urlparse(self.path).query).get('upload_id', [''])[0]
+            session = api.sessions.get(session_id)
+            length = int(self.headers.get('Content-Length', 0))
+            content_range = self.headers.get('Content-Range', '')
+            if session is None:
+                self.rfile.read(length)
+                self._reply(404, {'error': 'upload session not found'})
+                return
+
+            if content_range.startswith('bytes */'):
+                # Status query
+                if session.get('video'):
+                    self._reply(200, session['video'])
+                else:
+                    self._reply(308, headers=self._range_header(session))
+                return
+
+            fault = api.fault()
+            if fault == 'dropped':
+                # Read part of the chunk and hang up without answering
+                self.rfile.read(length // 2)
+                self.close_connection = True
+                self.connection.shutdown(2)
+                return
+            chunk = self.rfile.read(length)
+            with api.lock:
+                api.bytes_received += len(chunk)
+            if fault == '503':
+                self._reply(503, {'error': 'backendError'})
+                return
+
+            start = int(content_range.split(' ', 1)[1].split('-', 1)[0])
+            if start != len(session['data']):
+                # Client out of step - tell it where we really are
+                self._reply(308, headers=self._range_header(session))
+                return
+            if fault == 'partial':
+                # Keep only a 256 KiB-aligned prefix, like the real server may
+                chunk = chunk[:len(chunk) // 2 // (256 * 1024) * (256 * 1024)]
+            session['data'] += chunk
+
+            if len(session['data']) < session['size']:
+                self._reply(308, headers=self._range_header(session))
+                return
+            video_id = hashlib.sha1(session_id.encode()).hexdigest()[:11]
+            session['video'] = {'kind': 'youtube#video', 'id': video_id,
+                                'snippet': session['metadata'].get('snippet', {}),
+                                'status': {'uploadStatus': 'uploaded'}}
+            with api.lock:
+                api.videos[video_id] = hashlib.sha256(bytes(session['data'])).hexdigest()
+                api.open_sessions -= 1
+            self._reply(200, session['video'])
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(api: FakeUploads, port: int) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(api))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class SimulatedCrash(Exception):
+    pass
+
+
+def demo(api: FakeUploads, port: int, size_mb: float):
+    from core.config import Config
+    work = tempfile.mkdtemp(prefix="upload_demo_")
+    Config.DATABASE_PATH = os.path.join(work, "demo.sqlite")
+    Config.YOUTUBE_UPLOAD_BASE_URL = f"http://127.0.0.1:{port}/upload/youtube/v3"
+    Config.UPLOAD_BACKOFF_MAX_SECONDS = 0.5  # Keep the demo quick
+
+    from core.resumable_upload import ResumableUpload
+    video_path = os.path.join(work, "video.mp4")
+    with open(video_path, 'wb') as f:
+        f.write(os.urandom(int(size_mb * 1024 * 1024)))
+    size = os.path.getsize(video_path)
+    with open(video_path, 'rb') as f:
+        expected = hashlib.sha256(f.read()).hexdigest()
+    metadata = {'snippet': {'title': 'Resume demo'}, 'status': {'privacyStatus': 'private'}}
+    sessions_started = []
+
+    def crash_half_way(fraction: float):
+        if fraction >= 0.5:
+            raise SimulatedCrash(f"process killed at {fraction:.0%}")
+
+    first = ResumableUpload(chunk_size=1024 * 1024)
+    try:
+        first.upload(video_path, metadata, progress=crash_half_way,
+                     on_new_session=lambda: sessions_started.append(1))
+    except SimulatedCrash as e:
+        print(f"💥 {e}")
+    stored = first.find_session(video_path)
+    print(f"Stored session: byte {stored['confirmed_offset']:,} of {size:,} confirmed")
+    sent_before_crash = api.bytes_received
+
+    # A brand new uploader, as after a restart: it only knows what the database kept
+    second = ResumableUpload(chunk_size=1024 * 1024)
+    video = second.upload(video_path, metadata, on_new_session=lambda: sessions_started.append(1))
+    resent = api.bytes_received - sent_before_crash
+
+    assert api.videos[video['id']] == expected, "server copy differs from the file"
+    assert second.find_session(video_path) is None, "finished session should be forgotten"
+    print(f"✅ Uploaded {video['id']}: server copy matches (sha256 {expected[:12]}...)")
+    print(f"Sessions started (= videos.insert charged): {len(sessions_started)}")
+    print(f"After the restart sent {resent:,} bytes for the remaining {size - stored['confirmed_offset']:,}; "
+          f"{api.bytes_received:,} bytes in total for a {size:,} byte file")
+    print(f"Injected faults: {api.faults}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of chunks answered with 503")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Share of chunks whose connection is cut")
+    parser.add_argument("--partial-rate", type=float, default=0.0, help="Share of chunks only half kept")
+    parser.add_argument("--demo", action="store_true", help="Run a crash/resume upload against the stand-in")
+    parser.add_argument("--size-mb", type=float, default=20, help="File size for --demo")
+    args = parser.parse_args()
+
+    if args.demo:
+        # Some faults by default so the retry path gets exercised too
+        api = FakeUploads(args.fail_rate or 0.1, args.drop_rate or 0.05, args.partial_rate or 0.1)
+        server = serve(api, args.port)
+        demo(api, args.port, args.size_mb)
+        server.shutdown()
+        return
+
+    api = FakeUploads(args.fail_rate, args.drop_rate, args.partial_rate)
+    server = serve(api, args.port)
+    print(f"🎭 Fake YouTube upload endpoint on http://127.0.0.1:{args.port}/upload/youtube/v3 (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Local stand-in for the YouTube Data API videos.list endpoint (statistics only)
+Answers GET /youtube/v3/videos?part=statistics&id=a,b,c like the real API, including a
+response ETag and 304 Not Modified when If-None-Match still matches. Point the app at it with
+YOUTUBE_API_BASE_URL=http://127.0.0.1:8766/youtube/v3
+
+--demo seeds a throwaway database with uploaded videos of different ages and runs the
+StatsIngester against the stand-in: first a full refresh, then a second pass where only a few
+videos gained views (unchanged batches come back as 304), and prints the quota used
+
+Usage: python scripts/fake_youtube_api.py [--port 8766] [--grow-every 60]
+       python scripts/fake_youtube_api.py --demo [--videos 500]
+"""
+import os
+import sys
+import json
+import random
+import hashlib
+import argparse
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+class FakeYouTube:
+    """Statistics per video ID (created on first request) plus request counters"""
+
+    def __init__(self, seed: int = 1):
+        self.rng = random.Random(seed)
+        self.stats = {}
+        self.deleted = set()
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.not_modified = 0
+
+    def video(self, video_id: str) -> dict:
+        if video_id not in self.stats:
+            self.stats[video_id] = {'viewCount': self.rng.randint(0, 5000), 'likeCount': self.rng.randint(0, 200),
+                                    'commentCount': self.rng.randint(0, 30)}
+        return self.stats[video_id]
+
+    def grow(self, fraction: float = 0.2):
+        """Some videos gain views/likes (the rest keep their batch ETags valid)"""
+        with self.lock:
+            for video_id in self.stats:
+                if self.rng.random() < fraction:
+                    self.stats[video_id]['viewCount'] += self.rng.randint(1, 500)
+                    self.stats[video_id]['likeCount'] += self.rng.randint(0, 20)
+
+    def videos_list(self, ids: list) -> dict:
+        with self.lock:
+            items = [{'kind': 'youtube#video', 'id': video_id,
+                      'statistics': {key: str(value) for key, value in self.video(video_id).items()}}
+                     for video_id in ids if video_id not in self.deleted]
+        body = {'kind': 'youtube#videoListResponse', 'items': items,
+                'pageInfo': {'totalResults': len(items), 'resultsPerPage': len(items)}}
+        body['etag'] = hashlib.md5(json.dumps(items, sort_keys=True).encode()).hexdigest()
+        return body
+
+
+def make_handler(api: FakeYouTube):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path.rstrip('/') != '/youtube/v3/videos':
+                self.send_error(404)
+                return
+            query = parse_qs(url.query)
+            ids = [i for i in query.get('id', [''])[0].split(',') if i]
+            if len(ids) > 50:
+                self.send_error(400, "Too many IDs (max 50)")
+                return
+            body = api.videos_list(ids)
+            etag = f'"{body["etag"]}"'
+            api.requests += 1
+            if self.headers.get('If-None-Match') == etag:
+                api.not_modified += 1
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            payload = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(api: FakeYouTube, port: int) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(api))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def demo(api: FakeYouTube, port: int, videos: int):
+    from core.config import Config
+    work = tempfile.mkdtemp(prefix="stats_demo_")
+    Config.DATABASE_PATH = os.path.join(work, "demo.sqlite")
+    Config.YOUTUBE_API_BASE_URL = f"http://127.0.0.1:{port}/youtube/v3"
+
+    from core.db_pool import connect
+    from core.stats_ingester import StatsIngester
+    ingester = StatsIngester()
+    conn = connect()
+    now = datetime.utcnow()
+    rng = random.Random(7)
+    conn.executemany("""
+        INSERT INTO videos (video_id, title, topic, created_at, youtube_url, status)
+        VALUES (?, ?, ?, ?, ?, 'uploaded')
+    """, [(f"demo_{i}", f"Demo {i}", f"topic {i % 20}",
+           (now - timedelta(days=rng.choice([0.5, 5, 30, 400]))).strftime('%Y-%m-%d %H:%M:%S'),
+           f"https://www.youtube.com/shorts/yt{i:06d}") for i in range(videos)])
+    conn.commit()
+    api.deleted.add('yt000003')
+
+    def report(label, summary):
+        used = ingester.ledger.used()
+        print(f"{label:<34} calls {summary['calls']:>3}  304s {summary['not_modified']:>3}  "
+              f"updated {summary['updated']:>4}  missing {summary['missing']}  quota used today {used}")
+
+    report("1st pass (everything due)", ingester.run_once(max_calls=1000))
+    report("immediately again (nothing due)", ingester.run_once(max_calls=1000))
+
+    # Pretend the schedule came round for every video, with only ~2% of them changed on YouTube
+    api.grow(fraction=0.02)
+    conn.execute("UPDATE videos SET stats_next_check_at = ''")
+    conn.commit()
+    report("2nd pass (2% changed)", ingester.run_once(max_calls=1000))
+
+    tiers = conn.execute("""
+        SELECT ROUND((julianday(stats_next_check_at) - julianday(stats_checked_at)) * 24, 1), COUNT(*)
+        FROM videos GROUP BY 1 ORDER BY 1
+    """).fetchall()
+    print("\nNext refresh in (hours): " + ", ".join(f"{hours}h x{count}" for hours, count in tiers))
+    totals = conn.execute("SELECT total_views, total_likes FROM video_totals").fetchone()
+    print(f"Dashboard totals: {totals[0]:,} views, {totals[1]:,} likes")
+    print(f"Time series for demo_0: {ingester.history('demo_0')}")
+    print(f"Stand-in served {api.requests} requests, {api.not_modified} of them 304")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--grow-every", type=float, default=60, help="Seconds between view bumps (serve mode)")
+    parser.add_argument("--demo", action="store_true", help="Run the ingester against the stand-in and exit")
+    parser.add_argument("--videos", type=int, default=500, help="Videos to seed for --demo")
+    args = parser.parse_args()
+
+    api = FakeYouTube()
+    server = serve(api, args.port)
+    if args.demo:
+        demo(api, args.port, args.videos)
+        server.shutdown()
+        return
+
+    print(f"🎭 Fake YouTube Data API on http://127.0.0.1:{args.port}/youtube/v3 (Ctrl+C to stop)")
+    try:
+        while True:
+            threading.Event().wait(args.grow_every)
+            api.grow()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Remote render protocol demo - one server and several worker processes on this machine
+Starts the /worker API on a local port (throwaway database in a temp dir), queues render jobs
+with dummy inputs and spawns worker processes that pull, "render", heartbeat and push results.
+--kill-one SIGKILLs a worker mid-render to show its lease expiring and the job being reclaimed.
+--real spawns `python main.py worker` instead (needs MoviePy/ffmpeg and real prepared assets)
+
+Usage: python scripts/remote_render_demo.py [--jobs 6] [--workers 3] [--kill-one]
+"""
+import os
+import sys
+import time
+import signal
+import argparse
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def fake_render(assets, render_backend):
+    """Stand-in for VideoCreator.render_prepared: 'renders' by concatenating the inputs"""
+    time.sleep(float(os.getenv("DEMO_RENDER_SECONDS", "3")))
+    output = os.path.join(os.getcwd(), f"short_demo_{os.getpid()}_{int(time.time() * 1000)}.mp4")
+    with open(output, 'wb') as out:
+        for path in [assets['audio_path']] + [s['media_path'] for s in assets['plan'] if s.get('media_path')]:
+            with open(path, 'rb') as f:
+                out.write(f.read())
+    return output
+
+
+def run_worker(name: str, server: str):
+    from core.render_worker import RenderWorker
+    work_dir = os.path.join(os.getcwd(), f"worker_{name}")
+    RenderWorker(server_url=server, name=name, render_func=fake_render, poll_interval=1,
+                 work_dir=work_dir).run_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=6)
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--kill-one", action="store_true", help="SIGKILL one worker mid-job")
+    parser.add_argument("--real", action="store_true", help="spawn `main.py worker` processes")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)  # Internal: run as a worker process
+    args = parser.parse_args()
+
+    server = f"http://127.0.0.1:{args.port}"
+    if args.worker:
+        run_worker(args.worker, server)
+        return
+
+    # Everything (database, inputs, outputs) lives in a temp dir
+    work = tempfile.mkdtemp(prefix="render_demo_")
+    os.chdir(work)
+    os.environ.setdefault("WORKER_TOKEN", "demo-token")
+    os.environ.setdefault("JOB_LEASE_SECONDS", "6")
+    os.environ.setdefault("JOB_RETRY_BACKOFF_SECONDS", "1")
+
+    import uvicorn
+    from fastapi import FastAPI
+    from core.job_queue import JobQueue
+    from core.render_dispatch import pack_render_job
+    from web.worker_api import app as worker_app
+
+    app = FastAPI()
+    app.mount("/worker", worker_app)
+    threading.Thread(target=uvicorn.run, args=(app,),
+                     kwargs={'host': '127.0.0.1', 'port': args.port, 'log_level': 'warning'},
+                     daemon=True).start()
+
+    queue = JobQueue()
+    job_ids = []
+    for n in range(args.jobs):
+        inputs = []
+        for kind in ('audio', 'media_0', 'media_1'):
+            path = os.path.join(work, f"input_{n}_{kind}.bin")
+            with open(path, 'wb') as f:
+                f.write(os.urandom(256 * 1024))
+            inputs.append(path)
+        assets = {
+            'topic': f"demo topic {n}", 'script': 'demo', 'analysis': {}, 'audio_path': inputs[0],
+            'audio_duration': 10.0, 'duration': 10.0, 'music_path': None,
+            'plan': [{'index': i, 'text': 'demo', 'duration': 5.0, 'media': {}, 'media_path': inputs[i + 1],
+                      'background_color': (0, 0, 0)} for i in range(2)]
+        }
+        job_ids.append(queue.enqueue('render', pack_render_job(assets)))
+    print(f"📋 Queued {len(job_ids)} render jobs in {work}")
+
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    workers = []
+    for i in range(args.workers):
+        if args.real:
+            cmd = [sys.executable, str(ROOT / "main.py"), "worker", "--server", server, "--name", f"w{i}"]
+        else:
+            cmd = [sys.executable, os.path.abspath(__file__), "--port", str(args.port), "--worker", f"w{i}"]
+        workers.append(subprocess.Popen(cmd, env=env))
+
+    started = time.time()
+    killed = False
+    try:
+        while True:
+            jobs = [queue.get(job_id) for job_id in job_ids]
+            if args.kill_one and not killed and any(j['state'] == 'running' for j in jobs):
+                time.sleep(1)
+                victim = workers[0]
+                victim.send_signal(signal.SIGKILL)
+                killed = True
+                print(f"💀 Killed worker w0 (pid {victim.pid}) - its job is reclaimed when the lease expires")
+            if all(j['state'] in ('succeeded', 'failed') for j in jobs):
+                break
+            time.sleep(0.5)
+    finally:
+        for proc in workers:
+            proc.terminate()
+
+    print(f"\n⏱️ {len(job_ids)} jobs with {args.workers} workers in {time.time() - started:.1f}s")
+    for job in jobs:
+        result = job.get('result') or {}
+        print(f"  job {job['id']}: {job['state']:<9} attempts={job['attempts']} "
+              f"worker={result.get('worker', '-')} bytes={result.get('bytes', '-')} {job.get('error') or ''}")
+
+
+if __name__ == "__main__":
+    main()
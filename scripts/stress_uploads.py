@@ -0,0 +1,125 @@
+"""
+Concurrent upload stress test against the local upload stand-in (scripts/fake_upload_server.py)
+Starts --uploads threads that all call YouTubeUploader.upload_video at the same moment, with
+faults injected on the server, and checks that:
+  - no more than UPLOAD_MAX_CONCURRENT uploads were ever in progress,
+  - the quota ledger let exactly as many uploads start as the daily quota covers, charged each
+    once and never went over the limit,
+  - every upload that started arrived intact (sha256 of the server's copy),
+  - each thread got its own API service / HTTP transport
+
+Usage: python scripts/stress_uploads.py [--uploads 12] [--concurrency 3] [--quota-uploads 8] [--size-mb 3]
+"""
+import os
+import sys
+import time
+import hashlib
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_upload_server import FakeUploads, serve  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uploads", type=int, default=12, help="Uploads started at once")
+    parser.add_argument("--concurrency", type=int, default=3, help="UPLOAD_MAX_CONCURRENT")
+    parser.add_argument("--quota-uploads", type=int, default=8, help="Uploads today's quota can pay for")
+    parser.add_argument("--size-mb", type=float, default=3)
+    parser.add_argument("--port", type=int, default=8768)
+    args = parser.parse_args()
+
+    from core.config import Config
+    work = tempfile.mkdtemp(prefix="upload_stress_")
+    Config.DATABASE_PATH = os.path.join(work, "stress.sqlite")
+    Config.YOUTUBE_UPLOAD_BASE_URL = f"http://127.0.0.1:{args.port}/upload/youtube/v3"
+    Config.UPLOAD_MAX_CONCURRENT = args.concurrency
+    Config.UPLOAD_CHUNK_MB = 0.5
+    Config.UPLOAD_BACKOFF_MAX_SECONDS = 0.5
+    # Room for exactly --quota-uploads uploads (plus change that doesn't add up to another one)
+    Config.YOUTUBE_DAILY_QUOTA = args.quota_uploads * Config.YOUTUBE_UPLOAD_COST + Config.YOUTUBE_UPLOAD_COST // 2
+
+    from google.oauth2.credentials import Credentials
+    from core.youtube_auth import get_credential_manager
+    from core.youtube_uploader import YouTubeUploader
+    from core.quota_ledger import get_quota_ledger
+    from core.upload_slots import get_upload_slots
+
+    # Stand-in token (no expiry, so nothing tries to refresh it); the fake server doesn't check it
+    get_credential_manager()._credentials = Credentials(token="stress-test", refresh_token="stress-test")
+
+    api = FakeUploads(fail_rate=0.05, drop_rate=0.02, partial_rate=0.05, seed=3)
+    server = serve(api, args.port)
+
+    files = []
+    for i in range(args.uploads):
+        path = os.path.join(work, f"short_{i}.mp4")
+        with open(path, 'wb') as f:
+            f.write(os.urandom(int(args.size_mb * 1024 * 1024)))
+        with open(path, 'rb') as f:
+            files.append((path, hashlib.sha256(f.read()).hexdigest()))
+
+    uploader = YouTubeUploader()  # One shared instance, like main.py's
+    results = [None] * args.uploads
+    services = [None] * args.uploads
+    start = threading.Barrier(args.uploads)
+
+    def run(i: int):
+        path, _ = files[i]
+        start.wait()
+        services[i] = id(uploader.service)
+        try:
+            results[i] = uploader.upload_video(path, f"Stress {i}", "", ["stress"])
+        except Exception as e:
+            results[i] = e
+
+    began = time.time()
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(args.uploads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - began
+    server.shutdown()
+
+    uploaded = [(i, r) for i, r in enumerate(results) if isinstance(r, dict)]
+    refused = [r for r in results if isinstance(r, Exception) and 'Quota exceeded' in str(r)]
+    failed = [r for r in results if isinstance(r, Exception) and 'Quota exceeded' not in str(r)]
+    intact = sum(api.videos.get(r['video_id']) == files[i][1] for i, r in uploaded)
+    ledger = get_quota_ledger()
+    usage = ledger.get_usage()
+    slots = get_upload_slots().get_stats()
+
+    print(f"\n{len(uploaded)} uploaded, {len(refused)} refused for quota, {len(failed)} failed "
+          f"in {elapsed:.1f}s ({len(uploaded) * args.size_mb / elapsed:.1f} MB/s)")
+    for error in failed:
+        print(f"   ❌ {error}")
+    print(f"Peak uploads in progress: {slots['peak']} client-side, {api.peak_open_sessions} server-side "
+          f"(limit {slots['limit']})")
+    print(f"Quota: {usage['used']}/{usage['limit']} units, {usage['uploads_today']} videos.insert charged, "
+          f"{usage['reserved']} still reserved")
+    print(f"Server copies intact: {intact}/{len(uploaded)}; faults injected: {api.faults}")
+    print(f"Distinct service objects: {len(set(services))} for {args.uploads} threads")
+
+    checks = {
+        'concurrency cap held': slots['peak'] <= args.concurrency and api.peak_open_sessions <= args.concurrency,
+        'quota let exactly the affordable uploads through': len(uploaded) == min(args.uploads, args.quota_uploads),
+        'each upload charged once': usage['uploads_today'] == len(uploaded),
+        'never over the daily limit': usage['used'] <= usage['limit'],
+        'reservations all released': usage['reserved'] == 0,
+        'every upload intact': intact == len(uploaded),
+        'no unexpected failures': not failed,
+        'one transport per thread': len(set(services)) == args.uploads,
+    }
+    for name, ok in checks.items():
+        print(f"{'✅' if ok else '❌'} {name}")
+    sys.exit(0 if all(checks.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
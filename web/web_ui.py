@@ -3,17 +3,22 @@ Beautiful Web UI for YouTube Shorts Generator
 Accessible from anywhere, shows stats, videos, and manual trigger
 """
 from fastapi import FastAPI, Request, Form
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 try:
     from fastapi.templating import Jinja2Templates
 except ImportError:
     Jinja2Templates = None
 from fastapi.staticfiles import StaticFiles
-import sqlite3
-from datetime import datetime, date
+from datetime import datetime
+from typing import Dict, Optional
+import asyncio
+import hashlib
 import json
 from core.config import Config
-from core.database import Database
+from core.database import Database, mark_data_changed
+from core.dashboard_snapshot import DashboardSnapshot
+from core.events import get_event_bus
 import os
 
 app = FastAPI(title="YouTube Shorts Generator Dashboard")
@@ -29,6 +34,14 @@ if Jinja2Templates:
 else:
     templates = None
 
+def _etag_matches(request: Request, etag: str) -> bool:
+    """True if the client already has this version (If-None-Match)"""
+    header = request.headers.get('if-none-match', '')
+    return header.strip() == '*' or etag in [tag.strip() for tag in header.split(',')]
+
+# Revalidate on every load (cheap: unchanged pages are a bodiless 304)
+CACHE_HEADERS = {"Cache-Control": "no-cache"}
+
 @app.get("/", response_class=HTMLResponse)
 async def dashboard(request: Request):
     """Main dashboard with enhanced stats"""
@@ -36,87 +49,29 @@ async def dashboard(request: Request):
         if not templates:
             return HTMLResponse("<h1>Dashboard</h1><p>Jinja2 templates not available. Install: pip install jinja2</p>")
         
-        # Get stats from database using Database class
-        db_conn = Database()
-        
-        # Today's stats
-        today = date.today().isoformat()
-        today_stats = db_conn.get_daily_stats(today)
-        
-        if today_stats:
-            today_videos_created = today_stats.get('videos_created', 0)
-            today_uploaded = today_stats.get('videos_uploaded', 0)
-            today_views = today_stats.get('total_views', 0)
-            today_likes = today_stats.get('total_likes', 0)
-        else:
-            today_videos_created = today_uploaded = today_views = today_likes = 0
-        
-        # Overall stats (all-time)
-        overall_stats = db_conn.get_overall_stats()
-        
-        # Most watched videos
-        most_watched_videos = db_conn.get_most_watched_videos(limit=5)
-        
-        # Most watched topics
-        most_watched_topics = db_conn.get_most_watched_topics(limit=5)
-        
-        # Get quota information
-        quota_info = get_quota_info()
+        # Assembled once per DASHBOARD_CACHE_SECONDS (or after a write), shared by all requests.
+        # Off the event loop: a rebuild queries the database and must not stall the SSE streams
+        snapshot, etag = await run_in_threadpool(dashboard_snapshot.get)
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag, **CACHE_HEADERS})
         
-        # Recent videos (last 20)
-        db = sqlite3.connect(Config.DATABASE_PATH)
-        cursor = db.cursor()
-        try:
-            cursor.execute("""
-                SELECT video_id, title, topic, youtube_url, created_at, status, video_file_path
-                FROM videos
-                ORDER BY created_at DESC
-                LIMIT 20
-            """)
-            recent_videos_raw = cursor.fetchall()
-        except sqlite3.OperationalError:
-            recent_videos_raw = []
-        db.close()
-        
-        # Format recent videos
-        recent_videos = []
-        for video in recent_videos_raw:
-            recent_videos.append({
-                'video_id': video[0] if len(video) > 0 and video[0] else '',
-                'id': video[0] if len(video) > 0 and video[0] else '',
-                'title': video[1] if len(video) > 1 and video[1] else 'Untitled',
-                'topic': video[2] if len(video) > 2 and video[2] else '',
-                'url': video[3] if len(video) > 3 and video[3] else '',
-                'created': str(video[4]) if len(video) > 4 and video[4] else '',
-                'status': video[5] if len(video) > 5 and video[5] else 'pending',
-                'video_file_path': video[6] if len(video) > 6 and video[6] else None
-            })
-        
-        # Debug logging
-        import os
-        print(f"DEBUG: Rendering dashboard with {len(recent_videos)} videos")
-        print(f"DEBUG: Template exists: {os.path.exists('web/templates/dashboard.html')}")
-        
-        # Debug video data
-        for i, video in enumerate(recent_videos):
-            print(f"DEBUG: Video {i+1}: ID={video.get('video_id')}, Title={video.get('title')[:30]}..., FilePath={video.get('video_file_path')}, Status={video.get('status')}")
-        
-        response = templates.TemplateResponse("dashboard.html", {
+        return templates.TemplateResponse("dashboard.html", {
             "request": request,
-            "today_created": today_videos_created,
-            "today_uploaded": today_uploaded,
-            "today_views": today_views,
-            "today_likes": today_likes,
-            "overall_stats": overall_stats,
-            "most_watched_videos": most_watched_videos,
-            "most_watched_topics": most_watched_topics,
-            "recent_videos": recent_videos,
+            "today_created": snapshot['today']['created'],
+            "today_uploaded": snapshot['today']['uploaded'],
+            "today_views": snapshot['today']['views'],
+            "today_likes": snapshot['today']['likes'],
+            "overall_stats": snapshot['overall_stats'],
+            "most_watched_videos": snapshot['most_watched_videos'],
+            "most_watched_topics": snapshot['most_watched_topics'],
+            "recent_videos": snapshot['recent_videos'],
+            "next_after": snapshot['next_after'],
+            "snapshot_etag": etag,
+            "recent_videos_key": _live_stats(snapshot)['recent_videos_key'],
             "videos_per_day": Config.VIDEOS_PER_DAY,
-            "quota_info": quota_info
-        })
-        
-        print(f"DEBUG: Template response created successfully")
-        return response
+            "quota_info": snapshot['quota_info'],
+            "inventory_info": snapshot['inventory_info']
+        }, headers={"ETag": etag, **CACHE_HEADERS})
     except Exception as e:
         import traceback
         error_details = traceback.format_exc()
@@ -131,6 +86,115 @@ async def dashboard(request: Request):
             </body></html>
         """)
 
+@app.get("/api/dashboard")
+async def dashboard_data(request: Request):
+    """Dashboard snapshot as JSON (ETag/304 aware - poll it to see whether anything changed)"""
+    snapshot, etag = await run_in_threadpool(dashboard_snapshot.get)
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, **CACHE_HEADERS})
+    return JSONResponse(snapshot, headers={"ETag": etag, **CACHE_HEADERS})
+
+@app.get("/api/videos")
+async def list_videos(after: Optional[int] = None, limit: int = 20):
+    """Video history, newest first. Pass the returned next_after to get the following page"""
+    limit = max(1, min(limit, 100))
+    videos = await run_in_threadpool(lambda: Database().get_recent_videos(limit=limit, after=after))
+    return {
+        "videos": videos,
+        "next_after": videos[-1]['id'] if len(videos) == limit else None
+    }
+
+def _sse(event_type: str, data, event_id: Optional[int] = None) -> str:
+    """One server-sent event frame"""
+    frame = f"id: {event_id}\n" if event_id is not None else ""
+    return frame + f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def _live_stats(snapshot: Dict) -> Dict:
+    """The dashboard numbers that the events stream sends as deltas"""
+    overall = snapshot['overall_stats']
+    recent = [(v['id'], v['status'], v['url']) for v in snapshot['recent_videos']]
+    return {
+        'today_created': snapshot['today']['created'],
+        'today_uploaded': snapshot['today']['uploaded'],
+        'today_views': snapshot['today']['views'],
+        'total_videos': overall['total_videos'],
+        'total_views': overall['total_views'],
+        'total_likes': overall['total_likes'],
+        'success_rate': overall['success_rate'],
+        'avg_views': overall['avg_views'],
+        # Changes when a video is added, deleted or changes status (the page reloads its list)
+        'recent_videos_key': hashlib.sha1(json.dumps(recent).encode()).hexdigest()[:12]
+    }
+
+@app.get("/api/events")
+async def events(request: Request):
+    """
+    Server-sent events: 'job' (state/stage changes), 'progress' (render/upload percent),
+    'quota' (ledger updates) and 'stats' (changed dashboard numbers only)
+    """
+    bus = get_event_bus()
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=1000)
+
+    def offer(event):
+        if not queue.full():  # A stalled client drops events rather than growing without bound
+            queue.put_nowait(event)
+
+    def deliver(event):
+        loop.call_soon_threadsafe(offer, event)
+
+    last_event_id = request.headers.get('last-event-id', '')
+    bus.subscribe(deliver)
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            sent_id = 0
+            # Reconnect: replay what the client missed, then live events
+            if last_event_id.isdigit():
+                for event in bus.since(int(last_event_id)):
+                    if event['type'] != 'data_changed':
+                        yield _sse(event['type'], event['data'], event['id'])
+                    sent_id = event['id']
+            snapshot, _ = await run_in_threadpool(dashboard_snapshot.get)
+            stats = _live_stats(snapshot)
+            yield _sse('stats', stats)
+
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                batch = [event]
+                if event['type'] == 'data_changed':
+                    # Writes come in bursts (stats refresh, upload bookkeeping) - send one delta for all of them
+                    await asyncio.sleep(0.5)
+                while not queue.empty():
+                    batch.append(queue.get_nowait())
+
+                data_changed = False
+                for event in batch:
+                    if event['id'] <= sent_id:
+                        continue
+                    sent_id = event['id']
+                    if event['type'] == 'data_changed':
+                        data_changed = True
+                    else:
+                        yield _sse(event['type'], event['data'], event['id'])
+                if data_changed:
+                    snapshot, _ = await run_in_threadpool(dashboard_snapshot.get)
+                    current = _live_stats(snapshot)
+                    delta = {key: value for key, value in current.items() if stats.get(key) != value}
+                    stats = current
+                    if delta:
+                        yield _sse('stats', delta, sent_id)
+        finally:
+            bus.unsubscribe(deliver)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.post("/api/generate")
 async def trigger_generation():
     """API endpoint to trigger video generation (with upload)"""
@@ -146,59 +210,21 @@ async def trigger_generation():
 
 @app.post("/api/generate-no-upload")
 async def generate_video_no_upload():
-    """Generate video without uploading to YouTube"""
+    """Queue a video generation without uploading to YouTube (returns the job id immediately)"""
     try:
-        from core.topic_discovery import TopicDiscoveryAgent
-        from core.content_generator import ContentGenerator
-        from core.video_creator import VideoCreator
-        from core.database import Database
-        
-        print("🎬 Generating video (no upload)...")
-        
-        # Discover trending topic
-        discoverer = TopicDiscoveryAgent()
-        topics = discoverer.discover_trending_topics()
-        if not topics:
-            return JSONResponse({
-                "status": "error",
-                "message": "No topics found"
-            }, status_code=500)
-        
-        topic = topics[0]
-        topic_title = topic.get('title', topic.get('topic', 'Unknown Topic'))
-        print(f"📝 Selected topic: {topic_title}")
-        
-        # Generate content
-        generator = ContentGenerator()
-        content = generator.generate_video_content(topic_title)
-        
-        # Create video
-        creator = VideoCreator()
-        video_path = creator.create_video(content, topic_title)
-        print(f"✅ Video created: {video_path}")
-        
-        # Add to database
-        db = Database()
-        import os
-        video_id = os.path.splitext(os.path.basename(video_path))[0]
-        
-        db.add_video({
-            'video_id': video_id,
-            'title': content.get('title', topic_title),
-            'topic': topic_title,
-            'status': 'created',
-            'video_file_path': video_path
-        })
+        from core.job_queue import JobQueue
         
+        job_id = JobQueue().enqueue('generate_no_upload', {'source': 'dashboard'},
+                                    priority=JobQueue.PRIORITY_MANUAL)
+        print(f"🎬 Queued video generation (no upload) as job {job_id}")
         return JSONResponse({
-            "status": "success",
-            "message": f"Video generated successfully: {content.get('title', topic_title)}",
-            "video_id": video_id,
-            "video_path": video_path
+            "status": "queued",
+            "message": f"Video generation queued (job {job_id})",
+            "job_id": job_id
         })
         
     except Exception as e:
-        print(f"❌ Error generating video: {e}")
+        print(f"❌ Error queueing video generation: {e}")
         import traceback
         traceback.print_exc()
         return JSONResponse({
@@ -206,23 +232,29 @@ async def generate_video_no_upload():
             "message": str(e)
         }, status_code=500)
 
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: int):
+    """State, current stage and result of a queued job"""
+    from core.job_queue import JobQueue
+    
+    job = JobQueue().get(job_id)
+    if not job:
+        return JSONResponse({"status": "error", "message": f"Job {job_id} not found"}, status_code=404)
+    return {"status": "success", "job": job}
+
 @app.get("/api/stats")
 async def get_stats():
     """Get current statistics"""
     try:
-        db_conn = Database()
-        overall_stats = db_conn.get_overall_stats()
-        today = date.today().isoformat()
-        today_stats = db_conn.get_daily_stats(today)
+        snapshot, _ = await run_in_threadpool(dashboard_snapshot.get)
+        
+        from core.search_cache import get_search_cache
+        search_cache = get_search_cache()
         
         return {
-            "today": {
-                "created": today_stats.get('videos_created', 0) if today_stats else 0,
-                "uploaded": today_stats.get('videos_uploaded', 0) if today_stats else 0,
-                "views": today_stats.get('total_views', 0) if today_stats else 0,
-                "likes": today_stats.get('total_likes', 0) if today_stats else 0
-            },
-            "overall": overall_stats
+            "today": {key: snapshot['today'][key] for key in ('created', 'uploaded', 'views', 'likes')},
+            "overall": snapshot['overall_stats'],
+            "search_cache": await run_in_threadpool(search_cache.get_stats) if search_cache else {}
         }
     except Exception as e:
         return {"error": str(e), "today": {"created": 0, "uploaded": 0, "views": 0, "likes": 0}}
@@ -298,13 +330,7 @@ async def test_token():
             print(f"❌ Token test failed: {e}")
             result = {"valid": False, "error": str(e)}
         
-        # Log the test (1 unit cost)
-        if uploader.quota_manager:
-            print("🧪 Logging quota usage...")
-            uploader.quota_manager.log_quota_usage("token_test", 1)
-            print("✅ Quota usage logged")
-        else:
-            print("⚠️ No quota manager available")
+        # The 1-unit channels.list call is recorded in the quota ledger by test_token_connection()
         
         print(f"🧪 Returning result: {result}")
         return result
@@ -443,6 +469,7 @@ async def delete_video(video_id: str):
         # Delete from database
         cursor.execute("DELETE FROM videos WHERE video_id = ?", (video_id,))
         conn.commit()
+        mark_data_changed()
         conn.close()
         print(f"✅ Video deleted from database: {video_id}")
         
@@ -555,57 +582,20 @@ async def health():
 def get_quota_info():
     """Get YouTube API quota information"""
     try:
-        # Default quota is 10,000 units per day
-        DEFAULT_QUOTA = 10000
-        
-        # Estimate quota usage based on database operations
-        # Each upload attempt uses ~1600 units, each auth refresh uses ~1 unit
-        db_conn = Database()
-        
-        # Count upload attempts (successful and failed)
-        db = sqlite3.connect(Config.DATABASE_PATH)
-        cursor = db.cursor()
-        
-        try:
-            # Count videos that were attempted to upload
-            cursor.execute("""
-                SELECT COUNT(*) FROM videos 
-                WHERE status IN ('uploaded', 'upload_failed', 'processing')
-            """)
-            upload_attempts = cursor.fetchone()[0] or 0
-            
-            # Each upload attempt costs ~1600 units
-            # Each authentication refresh costs ~1 unit (we'll estimate 5 per video attempt)
-            estimated_used = (upload_attempts * 1600) + (upload_attempts * 5)
-            
-            # Cap at quota limit
-            estimated_used = min(estimated_used, DEFAULT_QUOTA)
-            estimated_remaining = max(0, DEFAULT_QUOTA - estimated_used)
-            quota_percentage = (estimated_used / DEFAULT_QUOTA) * 100
-            
-        except sqlite3.OperationalError:
-            estimated_used = 0
-            estimated_remaining = DEFAULT_QUOTA
-            quota_percentage = 0
-        finally:
-            db.close()
-        
-        # Check if we have a recent quota error in logs (if possible)
-        # This is an estimate - actual quota is only visible in Google Cloud Console
-        quota_status = "healthy"
-        if quota_percentage > 90:
-            quota_status = "critical"
-        elif quota_percentage > 70:
-            quota_status = "warning"
+        from core.quota_ledger import get_quota_ledger
         
+        # Every API call is recorded in the quota ledger; this reads its in-memory counter
+        usage = get_quota_ledger().get_usage()
         return {
-            "estimated_used": estimated_used,
-            "estimated_remaining": estimated_remaining,
-            "quota_limit": DEFAULT_QUOTA,
-            "percentage_used": round(quota_percentage, 1),
-            "status": quota_status,
+            "estimated_used": usage['used'],
+            "estimated_remaining": usage['remaining'],
+            "quota_limit": usage['limit'],
+            "percentage_used": usage['percentage'],
+            "status": usage['status'],
+            "pacific_day": usage['pacific_day'],
+            "resets_at": usage['resets_at'],
             "quota_console_url": "https://console.cloud.google.com/apis/api/youtube.googleapis.com/quotas",
-            "note": "This is an estimate. Check Google Cloud Console for exact usage."
+            "note": "Counted from this app's own API calls (Pacific day). Check Google Cloud Console for exact usage."
         }
     except Exception as e:
         return {
@@ -617,3 +607,16 @@ def get_quota_info():
             "quota_console_url": "https://console.cloud.google.com/apis/api/youtube.googleapis.com/quotas",
             "note": f"Error calculating quota: {str(e)}"
         }
+
+def get_inventory_info():
+    """Render-ahead inventory depth and upcoming slots (None unless inventory mode is running)"""
+    try:
+        from core.inventory import get_active_inventory
+        inventory = get_active_inventory()
+        return inventory.status() if inventory else None
+    except Exception as e:
+        print(f"Error reading inventory status: {e}")
+        return None
+
+# After get_quota_info / get_inventory_info: the snapshot calls them on every rebuild
+dashboard_snapshot = DashboardSnapshot(quota_info=get_quota_info, inventory_info=get_inventory_info)
@@ -0,0 +1,148 @@
+"""
+Render worker API - lets remote machines pull render jobs from this server
+Mounted at /worker by main.py. Every request needs the X-Worker-Token header (WORKER_TOKEN);
+the API is disabled when no token is configured
+
+Protocol (all bodies JSON unless noted):
+  POST /claim                      {"worker"} → 200 job | 204 nothing queued
+  GET  /jobs/{id}/files/{key}      ?worker=   → input file (audio, music, b-roll)
+  POST /jobs/{id}/heartbeat        {"worker", "stage"} → 200 | 409 lease lost
+  PUT  /jobs/{id}/result           ?worker=&video_id=&sha256=  raw MP4 body → 200 | 409
+  POST /jobs/{id}/fail             {"worker", "error", "retry"} → 200 | 409 lease lost
+"""
+import os
+import re
+import hmac
+import time
+import hashlib
+from fastapi import FastAPI, Request
+from fastapi.responses import FileResponse, JSONResponse, Response
+from core.config import Config
+from core.job_queue import JobQueue
+from core.render_dispatch import RemoteRenderDispatcher
+
+app = FastAPI(title="YouTube Shorts Generator Render Worker API")
+queue = JobQueue()
+
+_VIDEO_ID = re.compile(r'^[A-Za-z0-9_\-]{1,80}$')
+
+
+def _authorized(request: Request) -> bool:
+    token = request.headers.get('x-worker-token') or ''
+    # Constant-time compare, so response timing doesn't leak how much of the token matched
+    return bool(Config.WORKER_TOKEN) and hmac.compare_digest(token.encode(), Config.WORKER_TOKEN.encode())
+
+
+def _forbidden() -> JSONResponse:
+    return JSONResponse({"status": "error", "message": "missing or invalid worker token"}, status_code=403)
+
+
+def _leased_job(job_id: int, worker: str):
+    """The job if `worker` currently holds its lease, else None"""
+    job = queue.get(job_id)
+    if not job or job['state'] != 'running' or job['lease_owner'] != worker:
+        return None
+    return job
+
+
+@app.post("/claim")
+async def claim(request: Request):
+    """Lease the next render job; returns the assets with file keys instead of server paths"""
+    if not _authorized(request):
+        return _forbidden()
+    body = await request.json()
+    worker = body.get('worker') or 'unknown'
+    job = queue.claim(f"remote:{worker}", kinds=['render'])
+    if not job:
+        return Response(status_code=204)
+
+    payload = job['payload']
+    files = {}
+    for key, path in payload['files'].items():
+        files[key] = {'bytes': os.path.getsize(path) if os.path.exists(path) else None}
+    print(f"📡 Render job {job['id']} leased to worker {worker} (attempt {job['attempts']}/{job['max_attempts']})")
+    return {
+        "status": "success",
+        "job_id": job['id'],
+        "attempt": job['attempts'],
+        "lease_seconds": Config.JOB_LEASE_SECONDS,
+        "render_backend": payload.get('render_backend'),
+        "assets": payload['assets'],
+        "files": files
+    }
+
+
+@app.get("/jobs/{job_id}/files/{key}")
+async def get_file(job_id: int, key: str, worker: str, request: Request):
+    """Serve one input file of a leased job (only paths recorded in the job are reachable)"""
+    if not _authorized(request):
+        return _forbidden()
+    job = _leased_job(job_id, f"remote:{worker}")
+    if not job:
+        return JSONResponse({"status": "error", "message": "lease not held"}, status_code=409)
+    path = job['payload']['files'].get(key)
+    if not path or not os.path.exists(path):
+        return JSONResponse({"status": "error", "message": f"no file '{key}'"}, status_code=404)
+    return FileResponse(path, media_type='application/octet-stream')
+
+
+@app.post("/jobs/{job_id}/heartbeat")
+async def heartbeat(job_id: int, request: Request):
+    """Renew the lease; 409 tells the worker to give up (job was reclaimed)"""
+    if not _authorized(request):
+        return _forbidden()
+    body = await request.json()
+    if not queue.heartbeat(job_id, f"remote:{body.get('worker')}", stage=body.get('stage')):
+        return JSONResponse({"status": "error", "message": "lease lost"}, status_code=409)
+    return {"status": "success", "lease_seconds": Config.JOB_LEASE_SECONDS}
+
+
+@app.put("/jobs/{job_id}/result")
+async def push_result(job_id: int, worker: str, video_id: str, sha256: str, request: Request):
+    """Receive the rendered MP4 (streamed to disk), verify it and complete the job"""
+    if not _authorized(request):
+        return _forbidden()
+    worker_id = f"remote:{worker}"
+    if not _VIDEO_ID.match(video_id):
+        return JSONResponse({"status": "error", "message": "invalid video_id"}, status_code=400)
+    if not _leased_job(job_id, worker_id):
+        return JSONResponse({"status": "error", "message": "lease not held"}, status_code=409)
+
+    os.makedirs(Config.OUTPUT_DIR, exist_ok=True)
+    path, part_path = RemoteRenderDispatcher.result_path(video_id)
+    digest = hashlib.sha256()
+    size = 0
+    started = time.time()
+    with open(part_path, 'wb') as f:
+        async for chunk in request.stream():
+            digest.update(chunk)
+            size += len(chunk)
+            f.write(chunk)
+
+    if digest.hexdigest() != sha256.lower():
+        os.remove(part_path)
+        return JSONResponse({"status": "error", "message": "checksum mismatch"}, status_code=400)
+
+    os.replace(part_path, path)
+    result = {'video_path': path, 'video_id': video_id, 'bytes': size, 'worker': worker}
+    if not queue.complete(job_id, worker_id, result):
+        # Lease expired while the body was streaming - another worker owns the job now
+        os.remove(path)
+        return JSONResponse({"status": "error", "message": "lease lost"}, status_code=409)
+    print(f"📥 Render job {job_id}: received {size / 1024 / 1024:.1f} MB from {worker} in {time.time() - started:.1f}s")
+    return {"status": "success", "video_path": path}
+
+
+@app.post("/jobs/{job_id}/fail")
+async def fail(job_id: int, request: Request):
+    """Report a render failure (requeued for another attempt unless retry is false or attempts are used up)"""
+    if not _authorized(request):
+        return _forbidden()
+    body = await request.json()
+    state = queue.fail(job_id, f"remote:{body.get('worker')}", body.get('error') or 'unknown error',
+                       retry=body.get('retry', True))
+    if state == 'lost':
+        # Reclaimed by another worker meanwhile - its attempt decides the job's fate, not this report
+        return JSONResponse({"status": "error", "message": "lease lost"}, status_code=409)
+    print(f"⚠️ Render job {job_id} failed on {body.get('worker')}: {body.get('error')} → {state}")
+    return {"status": "success", "state": state}